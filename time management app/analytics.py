@@ -0,0 +1,170 @@
+"""
+Time-usage analytics for the Time Manager.
+Projects tasks onto per-day 1440-minute occupancy grids and aggregates them.
+
+  python analytics.py --week [YYYY-MM-DD]     week containing the date (default today)
+  python analytics.py --month [YYYY-MM]       calendar month (default this month)
+  python analytics.py --from YYYY-MM-DD --to YYYY-MM-DD
+
+- A day grid is a Python int used as a 1440-bit set (bit m = minute m busy),
+  so union is |, masking a session is &, and counting is int.bit_count()
+- Weekly tasks are expanded week by week through resolve_tasks_for_week,
+  the same recurrence logic the week view uses; one-time tasks are bucketed
+  by date once, so each week only resolves its own candidates
+"""
+
+import argparse
+import datetime
+import functools
+
+from main import SESSIONS, load_tasks, resolve_tasks_for_week, time_to_min
+
+DAY_MINUTES = 24 * 60
+
+
+@functools.lru_cache(maxsize=4096)
+def interval_bits(start, end):
+    """'HH:MM', 'HH:MM' → bitset of the minutes in [start, end)."""
+    s, e = time_to_min(start), min(time_to_min(end), DAY_MINUTES)
+    if e <= s:
+        return 0
+    return ((1 << (e - s)) - 1) << s
+
+
+SESSION_BITS = {name: interval_bits(ss, se) for name, ss, se in SESSIONS}
+
+
+def occurrences(tasks, start: datetime.date, end: datetime.date):
+    """Yield (task, date) for every occurrence in [start, end]."""
+    weekly, once_by_date = [], {}
+    lo, hi = start.isoformat(), end.isoformat()
+    for t in tasks:
+        if t.get("type") == "weekly":
+            weekly.append(t)
+        elif lo <= t["date"] <= hi:
+            once_by_date.setdefault(t["date"], []).append(t)
+
+    monday = start - datetime.timedelta(days=start.weekday())
+    while monday <= end:
+        week_dates = [(monday + datetime.timedelta(days=i)).isoformat() for i in range(7)]
+        candidates = weekly + [t for d in week_dates for t in once_by_date.get(d, ())]
+        for t, d in resolve_tasks_for_week(candidates, week_dates):
+            if lo <= d <= hi:
+                yield t, d
+        monday += datetime.timedelta(days=7)
+
+
+def _project(tasks, start, end):
+    """One pass over occurrences → (grids, minutes per heading, planned minutes)."""
+    grids      = {}          # date → (once_bits, weekly_bits)
+    by_heading = {}
+    planned    = 0
+    for t, d in occurrences(tasks, start, end):
+        try:
+            bits = interval_bits(t["start"], t["end"])
+        except (ValueError, KeyError):
+            continue
+        once, weekly = grids.get(d, (0, 0))
+        if t.get("type") == "weekly":
+            grids[d] = (once, weekly | bits)
+        else:
+            grids[d] = (once | bits, weekly)
+        mins     = bits.bit_count()
+        planned += mins
+        by_heading[t["heading"]] = by_heading.get(t["heading"], 0) + mins
+    return grids, by_heading, planned
+
+
+def day_grids(tasks, start, end):
+    """{date: (once_bits, weekly_bits)} for every day in [start, end] that has tasks."""
+    return _project(tasks, start, end)[0]
+
+
+def analyze(tasks, start: datetime.date, end: datetime.date):
+    """Aggregate report for [start, end] (inclusive); all figures in minutes."""
+    days = (end - start).days + 1
+    grids, by_heading, planned = _project(tasks, start, end)
+
+    by_session = dict.fromkeys(SESSION_BITS, 0)
+    busy = once_only = weekly_only = 0
+    per_day = {}
+    for d, (once, weekly) in grids.items():
+        day = once | weekly
+        n   = day.bit_count()
+        busy        += n
+        once_only   += once.bit_count()
+        weekly_only += weekly.bit_count()
+        per_day[d]   = n
+        for name, mask in SESSION_BITS.items():
+            by_session[name] += (day & mask).bit_count()
+
+    capacity = {name: mask.bit_count() * days for name, mask in SESSION_BITS.items()}
+    in_sessions = sum(by_session.values())
+    total_cap   = sum(capacity.values())
+    return {
+        "from":             start.isoformat(),
+        "to":               end.isoformat(),
+        "days":             days,
+        "planned":          planned,                    # sum of durations
+        "busy":             busy,                       # union (overlaps counted once)
+        "free_in_sessions": total_cap - in_sessions,
+        "utilisation":      round(in_sessions / total_cap, 4) if total_cap else 0.0,
+        "once":             once_only,
+        "weekly":           weekly_only,
+        "by_session":       by_session,
+        "session_capacity": capacity,
+        "by_heading":       dict(sorted(by_heading.items(), key=lambda kv: -kv[1])),
+        "per_day":          per_day,
+    }
+
+
+def week_report(tasks, day: datetime.date):
+    monday = day - datetime.timedelta(days=day.weekday())
+    return analyze(tasks, monday, monday + datetime.timedelta(days=6))
+
+
+def month_report(tasks, year, month):
+    first = datetime.date(year, month, 1)
+    nxt   = datetime.date(year + month // 12, month % 12 + 1, 1)
+    return analyze(tasks, first, nxt - datetime.timedelta(days=1))
+
+
+def format_report(r, top=10):
+    def hm(m):
+        return f"{m // 60}h{m % 60:02d}"
+    lines = [
+        f"{r['from']} → {r['to']}  ({r['days']} days)",
+        f"  planned {hm(r['planned'])}   busy {hm(r['busy'])}   "
+        f"free in sessions {hm(r['free_in_sessions'])}   utilisation {r['utilisation']:.1%}",
+        f"  one-time {hm(r['once'])}   weekly {hm(r['weekly'])}",
+        "  sessions:",
+    ]
+    for name, mins in r["by_session"].items():
+        cap = r["session_capacity"][name]
+        lines.append(f"    {name:<10} {hm(mins):>8} / {hm(cap):<8} {mins / cap if cap else 0:.1%}")
+    lines.append("  headings:")
+    for heading, mins in list(r["by_heading"].items())[:top]:
+        lines.append(f"    {hm(mins):>8}  {heading}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time-usage report for the Time Manager.")
+    group  = parser.add_mutually_exclusive_group()
+    group.add_argument("--week", nargs="?", const="", metavar="YYYY-MM-DD")
+    group.add_argument("--month", nargs="?", const="", metavar="YYYY-MM")
+    parser.add_argument("--from", dest="start", metavar="YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", metavar="YYYY-MM-DD")
+    args = parser.parse_args()
+
+    tasks = load_tasks()
+    today = datetime.date.today()
+    if args.start and args.end:
+        report = analyze(tasks, datetime.date.fromisoformat(args.start),
+                         datetime.date.fromisoformat(args.end))
+    elif args.month is not None:
+        y, m = map(int, args.month.split("-")) if args.month else (today.year, today.month)
+        report = month_report(tasks, y, m)
+    else:
+        report = week_report(tasks, datetime.date.fromisoformat(args.week) if args.week else today)
+    print(format_report(report))
@@ -0,0 +1,413 @@
+"""
+Local JSON API for the Time Manager data store.
+Serves the same data.txt as the desktop app, through the data layer in main.py.
+
+  python api_server.py [--host 127.0.0.1] [--port 8765]
+
+  GET    /tasks?from=YYYY-MM-DD&to=YYYY-MM-DD   occurrences in [from, to]
+  GET    /next                                  next upcoming / ongoing task
+  GET    /free?date=YYYY-MM-DD[&min=30]         free slots inside sessions
+  POST   /tasks                                 add      (409 on conflict)
+  PUT    /tasks/{id}                            replace  (409 on conflict)
+  DELETE /tasks/{id}
+
+Task ids are list positions and are only valid for one store version
+(X-Store-Version header). Send If-Match: "<version>" on PUT/DELETE to get
+412 instead of touching the wrong task after the file changed.
+A POST/PUT that had to be merged with another writer's save is still
+stored; tasks it now overlaps are listed under "conflicts" in the response.
+GET responses carry a content ETag, so If-None-Match polling of an
+unchanged week returns 304 with no body even if other weeks changed.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import hashlib
+import json
+import os
+from urllib.parse import urlsplit, parse_qs
+
+from main import (
+    DATA_FILE, SESSIONS,
+    SharedTaskFile, load_tasks, store_snapshot, time_to_min, validate_task,
+    check_conflict, get_next_task,
+)
+
+MAX_RANGE_DAYS = 366
+MAX_BODY       = 1 << 20
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified",
+    400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    409: "Conflict", 412: "Precondition Failed", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.body   = {"error": message, **extra}
+
+
+# ════════════════════════════════════════════════════════════════
+# STORE
+# ════════════════════════════════════════════════════════════════
+
+class TaskStore:
+    """
+    In-memory view of data.txt with a version counter.
+    - Reloads when data.txt changes on disk (e.g. saved by the desktop app)
+    - Saves go through SharedTaskFile, so a desktop edit made since the last
+      reload is merged in rather than overwritten
+    - by-date / by-weekday lookups are rebuilt lazily once per version
+    - Rendered GET bodies are memoised per (path, query) for the current version
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.tasks   = []
+        self._stat   = None
+        self._lookup = None      # (by_date, by_wday) for the current version
+        self.shared  = SharedTaskFile()
+        self.memo    = {}        # (path, query) → (etag, body)
+        self.refresh()
+
+    def _disk_stat(self):
+        try:
+            st = os.stat(DATA_FILE)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def refresh(self):
+        """Reload if data.txt changed since we last read or wrote it."""
+        stat = self._disk_stat()
+        if stat is not None and stat == self._stat:
+            return
+        snapshot   = store_snapshot()
+        self.tasks = load_tasks()
+        self.shared.adopt(self.tasks, snapshot)
+        self._stat = snapshot[1]
+        self._bump()
+
+    def _bump(self):
+        self.version += 1
+        self._lookup = None
+        self.memo.clear()
+
+    def commit(self, tasks):
+        """
+        Save tasks (a new list; merged with other writers) and make it current.
+        Returns the merge's (ours, other) overlaps. On failure self.tasks is
+        left as it was, so nothing unsaved lingers for the next request.
+        """
+        try:
+            merged, conflicts = self.shared.commit(tasks)
+        except TimeoutError:
+            raise ApiError(503, f"{DATA_FILE} is locked by another writer, try again")
+        except OSError as exc:
+            raise ApiError(500, f"could not save {DATA_FILE}: {exc}")
+        self.tasks = merged
+        self._stat = self._disk_stat()
+        self._bump()
+        return conflicts
+
+    def lookup(self):
+        if self._lookup is None:
+            by_date, by_wday = {}, {}
+            for i, t in enumerate(self.tasks):
+                if t.get("type") == "weekly":
+                    try:
+                        by_wday.setdefault(int(t["date"][1:]), []).append(i)
+                    except ValueError:
+                        pass
+                else:
+                    by_date.setdefault(t["date"], []).append(i)
+            self._lookup = (by_date, by_wday)
+        return self._lookup
+
+    def on_date(self, d: datetime.date):
+        """(id, task) pairs occurring on d, sorted by start."""
+        by_date, by_wday = self.lookup()
+        ids = by_date.get(d.isoformat(), []) + by_wday.get(d.isoweekday(), [])
+        pairs = [(i, self.tasks[i]) for i in ids]
+        pairs.sort(key=lambda p: time_to_min(p[1]["start"]))
+        return pairs
+
+
+def task_json(i, t, occurrence=None):
+    out = {"id": i, **t}
+    if occurrence is not None:
+        out["occurrence"] = occurrence
+    return out
+
+
+def free_slots(pairs, min_len):
+    """Gaps of at least min_len minutes inside each session, given a day's tasks."""
+    busy  = sorted((time_to_min(t["start"]), time_to_min(t["end"])) for _i, t in pairs)
+    slots = []
+    for name, ss, se in SESSIONS:
+        cur, stop = time_to_min(ss), time_to_min(se)
+        for bs, be in busy:
+            if be <= cur or bs >= stop:
+                continue
+            if bs - cur >= min_len:
+                slots.append((name, cur, bs))
+            cur = max(cur, be)
+        if stop - cur >= min_len:
+            slots.append((name, cur, stop))
+    return [{"session": n, "start": f"{a // 60:02d}:{a % 60:02d}",
+             "end": f"{b // 60:02d}:{b % 60:02d}"} for n, a, b in slots]
+
+
+# ════════════════════════════════════════════════════════════════
+# HANDLERS
+# ════════════════════════════════════════════════════════════════
+
+def _arg_date(query, name):
+    try:
+        return datetime.date.fromisoformat(query[name][0])
+    except (KeyError, ValueError):
+        raise ApiError(400, f"query parameter '{name}' must be YYYY-MM-DD")
+
+
+def get_tasks(store, query):
+    start = _arg_date(query, "from")
+    end   = _arg_date(query, "to")
+    days  = (end - start).days + 1
+    if not 0 < days <= MAX_RANGE_DAYS:
+        raise ApiError(400, f"range must cover 1..{MAX_RANGE_DAYS} days")
+    out = []
+    for n in range(days):
+        d = start + datetime.timedelta(days=n)
+        out.extend(task_json(i, t, d.isoformat()) for i, t in store.on_date(d))
+    return {"from": start.isoformat(), "to": end.isoformat(), "tasks": out}
+
+
+def get_next(store, _query):
+    nt = get_next_task(store.tasks)
+    if nt is None:
+        return {"task": None}
+    # Same dict object lives in store.tasks, so its position is its id
+    i = next(i for i, t in enumerate(store.tasks) if t is nt)
+    return {"task": task_json(i, nt)}
+
+
+def get_free(store, query):
+    d = _arg_date(query, "date")
+    try:
+        min_len = int(query.get("min", ["30"])[0])
+    except ValueError:
+        raise ApiError(400, "query parameter 'min' must be an integer")
+    return {"date": d.isoformat(), "free": free_slots(store.on_date(d), max(min_len, 1))}
+
+
+def _task_from_body(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise ApiError(400, "body must be JSON")
+    if not isinstance(data, dict):
+        raise ApiError(400, "body must be a JSON object")
+    task = {
+        "date":    str(data.get("date", "")).strip(),
+        "start":   str(data.get("start", "")).strip(),
+        "end":     str(data.get("end", "")).strip(),
+        "heading": str(data.get("heading", "")).strip(),
+        "content": str(data.get("content", "")).strip(),
+        "type":    str(data.get("type", "once")).strip(),
+    }
+    if any("|" in v or "\n" in v for v in task.values()):
+        raise ApiError(400, "fields may not contain '|' or newlines")
+    error = validate_task(task["type"], task["date"], task["start"], task["end"], task["heading"])
+    if error:
+        raise ApiError(400, error[1], title=error[0])
+    return task
+
+
+def _check_slot(store, task, exclude_idx=None):
+    conflict = check_conflict(store.tasks, task["date"], task["start"], task["end"],
+                              task["type"], exclude_idx=exclude_idx)
+    if conflict:
+        raise ApiError(409, "time conflict", conflict=conflict)
+
+
+def _task_id(store, path, headers):
+    try:
+        i = int(path.rsplit("/", 1)[1])
+    except ValueError:
+        raise ApiError(404, "no such task")
+    match = headers.get("if-match")
+    if match is not None and match.strip('"') != str(store.version):
+        raise ApiError(412, "store changed", version=store.version)
+    if not 0 <= i < len(store.tasks):
+        raise ApiError(404, "no such task")
+    return i
+
+
+def _position(store, task):
+    """Id of task after a commit (a merge may have moved it)."""
+    return next(i for i, t in enumerate(store.tasks) if t is task)
+
+
+def _saved_json(store, task, conflicts):
+    """task_json for a just-committed task, plus what a merge made it overlap."""
+    out = task_json(_position(store, task), task)
+    if conflicts:
+        out["conflicts"] = [task_json(_position(store, other), other) for _ours, other in conflicts]
+    return out
+
+
+def post_task(store, body):
+    task = _task_from_body(body)
+    _check_slot(store, task)
+    conflicts = store.commit(store.tasks + [task])
+    return 201, _saved_json(store, task, conflicts)
+
+
+def put_task(store, path, headers, body):
+    i    = _task_id(store, path, headers)
+    task = _task_from_body(body)
+    _check_slot(store, task, exclude_idx=i)
+    conflicts = store.commit(store.tasks[:i] + [task] + store.tasks[i + 1:])
+    return 200, _saved_json(store, task, conflicts)
+
+
+def delete_task(store, path, headers):
+    i = _task_id(store, path, headers)
+    store.commit(store.tasks[:i] + store.tasks[i + 1:])
+    return 204, None
+
+
+GET_ROUTES = {"/tasks": get_tasks, "/next": get_next, "/free": get_free}
+
+
+def dispatch(store, method, target, headers, body):
+    """
+    Returns (status, extra_headers, body_bytes). Blocking (reads / locks
+    data.txt): the server runs it on the single store thread.
+    """
+    url   = urlsplit(target)
+    path  = url.path.rstrip("/") or "/"
+    query = parse_qs(url.query)
+
+    try:
+        try:
+            store.refresh()
+        except (OSError, ValueError) as exc:
+            raise ApiError(500, f"could not read {DATA_FILE}: {exc}")
+        ver = {"X-Store-Version": str(store.version)}
+        if method == "GET" and path in GET_ROUTES:
+            # /next depends on the clock, so it is never memoised
+            key = (path, url.query)
+            hit = store.memo.get(key) if path != "/next" else None
+            if hit is None:
+                payload = json.dumps(GET_ROUTES[path](store, query), ensure_ascii=False).encode("utf-8")
+                hit = ('"' + hashlib.blake2b(payload, digest_size=12).hexdigest() + '"', payload)
+                if path != "/next":
+                    store.memo[key] = hit
+            etag, payload = hit
+            if etag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+                return 304, {**ver, "ETag": etag}, b""
+            return 200, {**ver, "ETag": etag}, payload
+
+        if method == "POST" and path == "/tasks":
+            status, out = post_task(store, body)
+        elif method == "PUT" and path.startswith("/tasks/"):
+            status, out = put_task(store, path, headers, body)
+        elif method == "DELETE" and path.startswith("/tasks/"):
+            status, out = delete_task(store, path, headers)
+        elif path in GET_ROUTES or path.startswith("/tasks/"):
+            raise ApiError(405, "method not allowed")
+        else:
+            raise ApiError(404, "not found")
+    except ApiError as exc:
+        status, out = exc.status, exc.body
+
+    ver = {"X-Store-Version": str(store.version)}
+    payload = b"" if out is None else json.dumps(out, ensure_ascii=False).encode("utf-8")
+    return status, ver, payload
+
+
+# ════════════════════════════════════════════════════════════════
+# HTTP
+# ════════════════════════════════════════════════════════════════
+
+async def handle_client(store, pool, reader, writer):
+    """
+    Minimal HTTP/1.1 with keep-alive, enough for local polling clients.
+    Requests are dispatched on pool (one thread), which keeps file I/O and
+    lock waits off the event loop and never touches the store concurrently.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                method, target, _version = line.decode("latin-1").split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = h.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            raw = headers.get("content-length", "0") or "0"
+            length = int(raw) if raw.isascii() and raw.isdigit() else -1
+            if length < 0:
+                status, extra, payload = 400, {}, b'{"error": "bad content-length"}'
+                headers["connection"] = "close"
+            elif length > MAX_BODY:
+                status, extra, payload = 413, {}, b'{"error": "payload too large"}'
+                headers["connection"] = "close"
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, extra, payload = await loop.run_in_executor(
+                    pool, dispatch, store, method.upper(), target, headers, body)
+
+            keep = headers.get("connection", "").lower() != "close"
+            head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                    f"Content-Length: {len(payload)}",
+                    "Cache-Control: no-cache",
+                    f"Connection: {'keep-alive' if keep else 'close'}"]
+            if payload:
+                head.append("Content-Type: application/json; charset=utf-8")
+            head += [f"{k}: {v}" for k, v in extra.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+            await writer.drain()
+            if not keep:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port):
+    store  = TaskStore()
+    pool   = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    server = await asyncio.start_server(
+        lambda r, w: handle_client(store, pool, r, w), host, port)
+    print(f"Time Manager API on http://{host}:{port}  ({len(store.tasks)} tasks)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local JSON API for the Time Manager data store.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -9,9 +9,29 @@ Data format: DATE|HH:MM-HH:MM|Heading|Content|type
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
+import sys
+import mmap
+import array
+import struct
+import json
+import hashlib
+import tempfile
+import time
+import queue
+import threading
+import re
+import bisect
+import heapq
+import functools
+import itertools
+import collections
 import datetime
+import unicodedata
+import tracemalloc
 import calendar as cal_module
 
+from reminder import ReminderService
+
 # ════════════════════════════════════════════════════════════════
 # CONSTANTS & COLORS
 # ════════════════════════════════════════════════════════════════
@@ -43,6 +63,19 @@ C_OTHER_FG   = "#1E293B"
 
 DATA_FILE    = "data.txt"
 
+SEARCH_PLACEHOLDER = "Search notes"
+
+REMINDER_LEAD_MIN  = 10        # toast this many minutes before a task; None = off
+STORE_WATCH_MS     = 3000      # how often to look for saves by other instances
+
+# Read-only calendars drawn over the personal one, each a file in data.txt
+# format (missing files are just empty). "conflicts": True also refuses new
+# notes that overlap that calendar.
+CALENDAR_SOURCES = [
+    {"name": "Team",      "path": "team.txt",      "color": "#059669", "conflicts": False},
+    {"name": "Timetable", "path": "timetable.txt", "color": "#7C3AED", "conflicts": True},
+]
+
 WDAY_NAMES   = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
 WDAY_SHORT   = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
 
@@ -50,47 +83,443 @@ WDAY_SHORT   = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
 # DATA LAYER
 # ════════════════════════════════════════════════════════════════
 
-def load_tasks():
-    """Load all tasks from data.txt. Returns list of dicts."""
-    tasks = []
+def parse_task_line(line):
+    """One data.txt line → task dict, or None if blank / malformed."""
+    line = line.strip()
+    if not line:
+        return None
+    parts = line.split("|", 4)
+    if len(parts) < 4:
+        return None
+    date_str   = parts[0]
+    time_range = parts[1]
+    heading    = parts[2]
+    content    = parts[3]
+    task_type  = parts[4] if len(parts) > 4 else "once"
+    try:
+        start_str, end_str = time_range.split("-")
+    except ValueError:
+        return None
+    return {
+        "date":    date_str,
+        "start":   start_str,
+        "end":     end_str,
+        "heading": heading,
+        "content": content,
+        "type":    task_type,
+    }
+
+
+def iter_task_chunks(chunk_size=2000):
+    """Yield tasks from data.txt in lists of up to chunk_size."""
     if not os.path.exists(DATA_FILE):
         open(DATA_FILE, "w", encoding="utf-8").close()
-        return tasks
+        return
+    chunk = []
     with open(DATA_FILE, "r", encoding="utf-8") as f:
         for line in f:
-            line = line.strip()
-            if not line:
+            t = parse_task_line(line)
+            if t is None:
                 continue
-            parts = line.split("|", 4)
-            if len(parts) < 4:
-                continue
-            date_str   = parts[0]
-            time_range = parts[1]
-            heading    = parts[2]
-            content    = parts[3]
-            task_type  = parts[4] if len(parts) > 4 else "once"
-            try:
-                start_str, end_str = time_range.split("-")
-                tasks.append({
-                    "date":    date_str,
-                    "start":   start_str,
-                    "end":     end_str,
-                    "heading": heading,
-                    "content": content,
-                    "type":    task_type,
-                })
-            except Exception:
-                pass
+            chunk.append(t)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_tasks():
+    """Load all tasks from data.txt (via the binary cache when fresh). Returns list of dicts."""
+    cached = load_task_cache()
+    if cached is not None:
+        return cached
+    tasks = []
+    for chunk in iter_task_chunks():
+        tasks.extend(chunk)
+    write_task_cache(tasks)
     return tasks
 
 
+def task_line(t):
+    """One task → its data.txt line (with trailing newline)."""
+    return (f"{t['date']}|{t['start']}-{t['end']}|"
+            f"{t['heading']}|{t['content']}|{t.get('type','once')}\n")
+
+
 def save_tasks(tasks):
-    """Persist all tasks to data.txt."""
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
+    """
+    Persist all tasks to data.txt.
+    Written to a temp file and swapped in, so a concurrent reader sees either
+    the old or the new file, never half of one. Unlocked: use SharedTaskFile
+    when other processes may be writing too.
+    """
+    tmp = DATA_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(task_line(t) for t in tasks)
+    _replace(tmp, DATA_FILE)
+    write_task_cache(tasks)
+
+
+def _replace(src, dst, attempts=20):
+    """os.replace, retried briefly: Windows refuses while a reader has dst open."""
+    for i in range(attempts):
+        try:
+            os.replace(src, dst)
+            return
+        except PermissionError:
+            if i == attempts - 1:
+                raise
+            time.sleep(0.025)
+
+
+# ── Binary task cache ─────────────────────────────────────────
+# data.txt stays the source of truth; CACHE_FILE is a parsed snapshot of it.
+# Layout (little-endian):
+#   header   magic, data.txt mtime_ns, size, blake2b-128, n_tasks, n_strings
+#   records  n_tasks × (date, start min, end min, type, heading idx, content idx)
+#            date = ordinal for once tasks, -n for W{n}
+#   offsets  (n_strings + 1) × uint32, in code points, into the decoded blob
+#   blob     UTF-8 headings / contents, each distinct string stored once
+#            (decoded in one go and sliced, instead of one decode per string)
+
+CACHE_FILE   = DATA_FILE + ".cache"
+_CACHE_MAGIC = b"TMC1"
+_CACHE_HEAD  = struct.Struct("<4sqq16sII")
+_CACHE_REC   = struct.Struct("<iHHBII")
+_CACHE_TYPES = ("once", "weekly")
+_HHMM        = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60 + 1)]
+
+
+def _file_digest(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.digest()
+
+
+def _pack_task(t, strings):
+    """Pack one task, or None if it would not round-trip exactly."""
+    try:
+        ttype = _CACHE_TYPES.index(t.get("type", "once"))
+        if ttype:
+            wday = int(t["date"][1:])
+            date = -wday
+            ok   = t["date"] == f"W{wday}" and 1 <= wday <= 7
+        else:
+            date = datetime.date.fromisoformat(t["date"]).toordinal()
+            ok   = datetime.date.fromordinal(date).isoformat() == t["date"]
+        start, end = time_to_min(t["start"]), time_to_min(t["end"])
+        ok = ok and _HHMM[start] == t["start"] and _HHMM[end] == t["end"]
+    except (ValueError, IndexError):
+        return None
+    if not ok:
+        return None
+    head = strings.setdefault(t["heading"], len(strings))
+    body = strings.setdefault(t["content"], len(strings))
+    return _CACHE_REC.pack(date, start, end, ttype, head, body)
+
+
+def write_task_cache(tasks):
+    """Snapshot tasks (parsed from the current data.txt) into CACHE_FILE. Returns success."""
+    try:
+        before = os.stat(DATA_FILE)
+        digest = _file_digest(DATA_FILE)
+        strings = {}
+        records = bytearray()
         for t in tasks:
-            line = (f"{t['date']}|{t['start']}-{t['end']}|"
-                    f"{t['heading']}|{t['content']}|{t.get('type','once')}\n")
-            f.write(line)
+            rec = _pack_task(t, strings)
+            if rec is None:
+                return False
+            records += rec
+        offsets = array.array("I", [0])
+        for s in strings:
+            offsets.append(offsets[-1] + len(s))
+        if sys.byteorder != "little":
+            offsets.byteswap()
+
+        after = os.stat(DATA_FILE)
+        if (after.st_mtime_ns, after.st_size) != (before.st_mtime_ns, before.st_size):
+            return False            # file changed under us; next load re-parses
+        # Own temp file per writer: the app, reminders, sync and the API may
+        # all refresh the cache at once, and must not interleave their bytes
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(CACHE_FILE) + ".",
+                                   dir=os.path.dirname(os.path.abspath(CACHE_FILE)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_CACHE_HEAD.pack(_CACHE_MAGIC, before.st_mtime_ns, before.st_size,
+                                         digest, len(tasks), len(strings)))
+                f.write(records)
+                f.write(offsets.tobytes())
+                f.write("".join(strings).encode("utf-8"))
+            _replace(tmp, CACHE_FILE)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        return True
+    except (OSError, OverflowError, struct.error):
+        return False
+
+
+def load_task_cache():
+    """Tasks from CACHE_FILE, or None if it is missing / stale / corrupt."""
+    try:
+        st = os.stat(DATA_FILE)
+        with open(CACHE_FILE, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            magic, mtime_ns, size, digest, n_tasks, n_strings = \
+                _CACHE_HEAD.unpack_from(view)
+            if (magic, mtime_ns, size) != (_CACHE_MAGIC, st.st_mtime_ns, st.st_size):
+                return None
+            if digest != _file_digest(DATA_FILE):
+                return None
+
+            rec_at  = _CACHE_HEAD.size
+            off_at  = rec_at + n_tasks * _CACHE_REC.size
+            blob_at = off_at + (n_strings + 1) * 4
+            offsets = array.array("I")
+            offsets.frombytes(view[off_at:blob_at])
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            blob    = str(view[blob_at:], "utf-8")
+            strings = [blob[a:b] for a, b in zip(offsets, offsets[1:])]
+
+            dates = {}
+            tasks = []
+            for date, start, end, ttype, head, body in \
+                    _CACHE_REC.iter_unpack(view[rec_at:off_at]):
+                d = dates.get(date)
+                if d is None:
+                    d = dates[date] = (f"W{-date}" if date < 0
+                                       else datetime.date.fromordinal(date).isoformat())
+                tasks.append({
+                    "date":    d,
+                    "start":   _HHMM[start],
+                    "end":     _HHMM[end],
+                    "heading": strings[head],
+                    "content": strings[body],
+                    "type":    _CACHE_TYPES[ttype],
+                })
+            return tasks
+    except (OSError, ValueError, IndexError, UnicodeDecodeError, struct.error):
+        return None
+
+
+# ── Shared access from several processes ──────────────────────
+# Several app instances (and api_server.py) may work on the same data.txt.
+#   LOCK_FILE     advisory lock, held only by writers for the length of a save
+#   VERSION_FILE  counter bumped by every locked save
+# Readers never take the lock: saves replace data.txt atomically.
+# Each writer remembers the version / stat / lines it last saw (its base); if
+# data.txt moved on since, its own edits are replayed onto the disk copy
+# (three-way merge by task line) instead of overwriting the other changes.
+
+LOCK_FILE    = DATA_FILE + ".lock"
+VERSION_FILE = DATA_FILE + ".version"
+JOURNAL_FILE = DATA_FILE + ".journal"      # only written once sync.py created it
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """Exclusive advisory lock on path (fcntl / msvcrt); raises TimeoutError."""
+
+    def __init__(self, path, timeout=10.0):
+        self.path    = path
+        self.timeout = timeout
+        self._f      = None
+
+    def _try_lock(self):
+        if os.name == "nt":
+            self._f.seek(0)
+            msvcrt.locking(self._f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(self._f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def __enter__(self):
+        self._f  = open(self.path, "a+b")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                self._try_lock()
+                return self
+            except OSError:
+                if time.monotonic() >= deadline:
+                    self._f.close()
+                    raise TimeoutError(f"{self.path} is locked by another process")
+                time.sleep(0.02)
+
+    def __exit__(self, *_exc):
+        try:
+            if os.name == "nt":
+                self._f.seek(0)
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._f.close()
+
+
+def read_version():
+    try:
+        with open(VERSION_FILE, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def store_snapshot():
+    """(version, data.txt (mtime_ns, size)) — changes whenever data.txt is rewritten."""
+    try:
+        st   = os.stat(DATA_FILE)
+        stat = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stat = None
+    return read_version(), stat
+
+
+def append_journal(old, new, origin):
+    """
+    Record the line diff of one locked save for sync.py (no-op until it has
+    created JOURNAL_FILE). old / new: Counters of task lines before / after.
+    """
+    if not os.path.exists(JOURNAL_FILE):
+        return
+    entry = {
+        "origin": origin,
+        "del":    [line[:-1] for line in (old - new).elements()],
+        "add":    [line[:-1] for line in (new - old).elements()],
+        "stat":   store_snapshot()[1],
+    }
+    with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def merge_tasks(base, ours, theirs):
+    """
+    Three-way merge by task line.
+    base:   Counter of lines both sides started from
+    ours:   our task list (base + our edits)
+    theirs: task list currently on disk (base + their edits)
+    Our removals are dropped from theirs, our additions appended after it;
+    a line both sides added is kept once.
+    Dict objects from ours are reused for lines both sides have, each at most
+    once, so merged never holds the same dict twice.
+    Returns (merged, added) where added are our additions not already on disk.
+    """
+    mine    = collections.Counter(task_line(t) for t in ours)
+    disk    = collections.Counter(task_line(t) for t in theirs)
+    added   = (mine - base) - (disk - base)
+    removed = base - mine
+    pool    = collections.defaultdict(list)         # line → our dicts for it
+    for t in reversed(ours):
+        pool[task_line(t)].append(t)
+
+    merged = []
+    used   = set()
+    for t in theirs:
+        line = task_line(t)
+        if removed[line] > 0:
+            removed[line] -= 1
+            continue
+        if pool[line]:
+            t = pool[line].pop()
+            used.add(id(t))
+        merged.append(t)
+    ours_added = []
+    for t in ours:
+        line = task_line(t)
+        if added[line] > 0 and id(t) not in used:
+            added[line] -= 1
+            merged.append(t)
+            ours_added.append(t)
+    return merged, ours_added
+
+
+def merge_conflicts(merged, added):
+    """(ours, other) pairs where one of our additions now overlaps another task."""
+    pos   = {id(t): i for i, t in enumerate(merged)}
+    pairs = []
+    for t in added:
+        if id(t) not in pos:                    # merged away (same line came from disk)
+            continue
+        try:
+            other = check_conflict(merged, t["date"], t["start"], t["end"],
+                                   t.get("type", "once"), exclude_idx=pos[id(t)])
+        except (ValueError, IndexError):
+            continue
+        if other is not None:
+            pairs.append((t, other))
+    return pairs
+
+
+class SharedTaskFile:
+    """
+    Optimistic-concurrency access to data.txt for one process.
+    adopt(tasks, snapshot)  record what was just loaded as the base
+    changed_on_disk()       cheap check (one stat + one small read)
+    commit(tasks, origin)   locked save; merges if someone else saved first
+    pull(tasks)             merge the latest disk copy in, without writing
+      = accept(fetch(tasks, base)); fetch only reads, so it may run on a
+        worker thread (StorePull) while accept stays with the owner
+    commit / pull return (tasks, conflicts); tasks is the list passed in
+    when nothing had to be merged.
+    """
+
+    def __init__(self):
+        self.base     = collections.Counter()
+        self.snapshot = (0, None)
+
+    def adopt(self, tasks, snapshot=None):
+        self.base     = collections.Counter(task_line(t) for t in tasks)
+        self.snapshot = store_snapshot() if snapshot is None else snapshot
+
+    def changed_on_disk(self):
+        return store_snapshot() != self.snapshot
+
+    def _merge_from_disk(self, tasks, base=None):
+        snapshot = store_snapshot()
+        theirs   = load_tasks()
+        merged, added = merge_tasks(self.base if base is None else base, tasks, theirs)
+        return merged, merge_conflicts(merged, added), theirs, snapshot
+
+    def commit(self, tasks, origin="local"):
+        with FileLock(LOCK_FILE):
+            conflicts = []
+            old       = self.base
+            if self.changed_on_disk():
+                tasks, conflicts, theirs, _snap = self._merge_from_disk(tasks)
+                old = collections.Counter(task_line(t) for t in theirs)
+            save_tasks(tasks)
+            version = read_version() + 1
+            tmp = VERSION_FILE + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(str(version))
+            _replace(tmp, VERSION_FILE)
+            self.adopt(tasks)
+            append_journal(old, self.base, origin)
+        return tasks, conflicts
+
+    def pull(self, tasks):
+        return self.accept(self.fetch(tasks, self.base))
+
+    def fetch(self, tasks, base):
+        """Read and merge for pull() against a given base; changes no state."""
+        return self._merge_from_disk(tasks, base)
+
+    def accept(self, fetched):
+        merged, conflicts, theirs, snapshot = fetched
+        # Base is what is on disk; our unsaved additions (if any) stay pending
+        self.adopt(theirs, snapshot)
+        return merged, conflicts
 
 
 def time_to_min(t_str):
@@ -161,6 +590,51 @@ def date_has_any_task(all_tasks, d: datetime.date):
     return False
 
 
+SESSIONS = [
+    ("Morning",   "06:00", "12:00"),
+    ("Afternoon", "13:00", "17:00"),
+    ("Evening",   "18:00", "23:00"),
+]
+
+REST_PERIODS = [
+    ("12:00", "13:00"),
+    ("17:00", "18:00"),
+    ("23:00", "23:59"),
+    ("00:00", "06:00"),
+]
+
+
+def validate_task(task_type, date_key, start, end, heading):
+    """
+    Field checks shared by the note form and the API.
+    Returns (title, message) for the first problem, or None if valid.
+    """
+    if task_type == "weekly":
+        if date_key not in [f"W{n}" for n in range(1, 8)]:
+            return ("Invalid Day", "Weekly tasks need a day W1 (Mon) … W7 (Sun).")
+    elif task_type == "once":
+        try:
+            datetime.date.fromisoformat(date_key)
+        except ValueError:
+            return ("Invalid Date", "Please enter date as YYYY-MM-DD.")
+    else:
+        return ("Invalid Type", "Task type must be 'once' or 'weekly'.")
+
+    try:
+        time_to_min(start)
+        time_to_min(end)
+    except Exception:
+        return ("Invalid Time", "Please enter times as HH:MM.")
+    if time_to_min(start) >= time_to_min(end):
+        return ("Invalid Time", "Start time must be before end time.")
+    for rs, re_ in REST_PERIODS:
+        if times_overlap(start, end, rs, re_):
+            return ("Rest Time", f"This time overlaps rest period {rs}–{re_}.")
+    if not heading:
+        return ("Missing Heading", "Please enter a heading.")
+    return None
+
+
 def check_conflict(tasks, date_key, start, end, task_type, exclude_idx=None):
     """
     Return the first conflicting task, or None.
@@ -203,30 +677,634 @@ def check_conflict(tasks, date_key, start, end, task_type, exclude_idx=None):
     return None
 
 
+def upcoming_key(task, week_dates, now):
+    """
+    (date, start min) of task's occurrence this week if it is upcoming or
+    ongoing at `now`, else None. get_next_task picks the smallest key.
+    """
+    resolved = resolve_tasks_for_week([task], week_dates)
+    if not resolved:
+        return None
+    d        = resolved[0][1]
+    now_date = now.date().isoformat()
+    if d < now_date:
+        return None
+    if d == now_date and time_to_min(task["end"]) <= now.hour * 60 + now.minute:
+        return None
+    return d, time_to_min(task["start"])
+
+
 def get_next_task(tasks):
     """Return the first upcoming/ongoing task in the current week, or None."""
     week_dates = get_week_dates()
-    resolved   = resolve_tasks_for_week(tasks, week_dates)
     now        = datetime.datetime.now()
-    now_date   = now.date().isoformat()
-    now_mins   = now.hour * 60 + now.minute
-    candidates = []
-    for (t, d) in resolved:
-        if d < now_date:
-            continue
-        if d == now_date and time_to_min(t["end"]) <= now_mins:
-            continue
-        candidates.append((d, time_to_min(t["start"]), t))
-    if not candidates:
-        return None
-    candidates.sort()
-    return candidates[0][2]
+    best       = None
+    for t in tasks:
+        key = upcoming_key(t, week_dates, now)
+        if key is not None and (best is None or key < best[0]):
+            best = (key, t)
+    return best[1] if best else None
+
+
+def occurs_on(task, d: datetime.date):
+    """True if task (once or weekly) takes place on d."""
+    if task.get("type") == "weekly":
+        return task["date"] == f"W{d.isoweekday()}"
+    return task["date"] == d.isoformat()
 
 
 def truncate(text, n):
     return text if len(text) <= n else text[:n - 3] + "..."
 
 
+# ════════════════════════════════════════════════════════════════
+# DAY LOAD TABLE
+# ════════════════════════════════════════════════════════════════
+
+# Heatmap scale: (from minutes, cell bg, border); below the first step = empty
+HEAT_STEPS = [
+    (1,   "#FFF7ED", "#FED7AA"),
+    (60,  "#FFEDD5", "#FDBA74"),
+    (120, "#FED7AA", "#FB923C"),
+    (240, "#FDBA74", "#F97316"),
+    (360, "#FB923C", "#EA580C"),
+]
+
+
+def heat_color(minutes):
+    """(bg, border) for a day with this many planned minutes."""
+    bg, bdr = C_WHITE, C_BORDER
+    for start, step_bg, step_bd in HEAT_STEPS:
+        if minutes >= start:
+            bg, bdr = step_bg, step_bd
+    return bg, bdr
+
+
+class DayLoadTable:
+    """
+    Planned minutes per day, maintained incrementally.
+    - one-time tasks: date string → [minutes, count]
+    - weekly tasks:   weekday 1..7 → [minutes, count], counted on every such day
+    A day's load is one dict lookup plus one list index – no task scan.
+    """
+
+    def __init__(self, tasks=()):
+        self._once   = {}
+        self._weekly = [[0, 0] for _ in range(8)]     # index 0 unused
+        for t in tasks:
+            self.add(t)
+
+    def _slot(self, task, create):
+        try:
+            mins = max(time_to_min(task["end"]) - time_to_min(task["start"]), 0)
+        except ValueError:
+            mins = 0            # still a task on that day, just no measurable load
+        if task.get("type") == "weekly":
+            try:
+                wday = int(task["date"][1:])
+            except ValueError:
+                return None, 0
+            return (self._weekly[wday] if 1 <= wday <= 7 else None), mins
+        if create:
+            return self._once.setdefault(task["date"], [0, 0]), mins
+        return self._once.get(task["date"]), mins
+
+    def add(self, task):
+        slot, mins = self._slot(task, create=True)
+        if slot is not None:
+            slot[0] += mins
+            slot[1] += 1
+
+    def remove(self, task):
+        slot, mins = self._slot(task, create=False)
+        if slot is not None:
+            slot[0] -= mins
+            slot[1] -= 1
+            if slot[1] == 0 and task.get("type") != "weekly":
+                del self._once[task["date"]]
+
+    def replace(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def minutes(self, d: datetime.date):
+        once = self._once.get(d.isoformat())
+        return (once[0] if once else 0) + self._weekly[d.isoweekday()][0]
+
+    def has_task(self, d: datetime.date):
+        return d.isoformat() in self._once or self._weekly[d.isoweekday()][1] > 0
+
+
+# ════════════════════════════════════════════════════════════════
+# CONFLICT INDEX
+# ════════════════════════════════════════════════════════════════
+
+class ConflictIndex:
+    """
+    Answers check_conflict() in O(log n + k) instead of scanning every task,
+    fast enough to run on every pointer motion while dragging.
+    Tasks are kept as (start min, end min, id) in lists sorted by start, under
+      ("d", "YYYY-MM-DD")  one-time tasks on that date
+      ("o", n)             one-time tasks on weekday n (a weekly task clashes with these)
+      ("w", n)             weekly tasks on weekday n
+    A query only looks at rows starting in (start - longest, end), where
+    longest is the longest task ever stored under that key.
+    """
+
+    def __init__(self, tasks=()):
+        self._rows = {}          # key → sorted [(start, end, id)]
+        self._long = {}          # key → longest duration stored
+        self._task = {}          # id → task
+        for t in tasks:
+            for key, row in self._entries(t):
+                self._rows.setdefault(key, []).append(row)
+                self._long[key] = max(self._long.get(key, 0), row[1] - row[0])
+            self._task[id(t)] = t
+        for rows in self._rows.values():
+            rows.sort()
+
+    @staticmethod
+    def _entries(t):
+        """[(key, row)] for t; [] if its date or times are malformed."""
+        try:
+            s, e = time_to_min(t["start"]), time_to_min(t["end"])
+            if t.get("type") == "weekly":
+                keys = [("w", int(t["date"][1:]))]
+            else:
+                keys = [("d", t["date"]),
+                        ("o", datetime.date.fromisoformat(t["date"]).isoweekday())]
+        except ValueError:
+            return []
+        return [(key, (s, e, id(t))) for key in keys]
+
+    def add(self, task):
+        for key, row in self._entries(task):
+            bisect.insort(self._rows.setdefault(key, []), row)
+            self._long[key] = max(self._long.get(key, 0), row[1] - row[0])
+        self._task[id(task)] = task
+
+    def remove(self, task):
+        for key, row in self._entries(task):
+            rows = self._rows.get(key, [])
+            i = bisect.bisect_left(rows, row)
+            if i < len(rows) and rows[i] == row:
+                del rows[i]
+        self._task.pop(id(task), None)
+
+    def replace(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def conflict(self, date_key, start, end, task_type, exclude=None):
+        """First task (by start) overlapping the slot, as check_conflict; exclude: a task."""
+        s, e = time_to_min(start), time_to_min(end)
+        if task_type == "weekly":
+            n    = int(date_key[1:])
+            keys = [("w", n), ("o", n)]
+        else:
+            keys = [("d", date_key), ("w", datetime.date.fromisoformat(date_key).isoweekday())]
+        best = None
+        for key in keys:
+            rows = self._rows.get(key)
+            if not rows:
+                continue
+            lo = bisect.bisect_right(rows, s - self._long[key], key=lambda r: r[0])
+            hi = bisect.bisect_left(rows, e, key=lambda r: r[0])
+            for row in itertools.islice(rows, lo, hi):
+                if best is not None and row >= best:
+                    break
+                if row[1] > s and self._task[row[2]] is not exclude:
+                    best = row
+                    break
+        return None if best is None else self._task[best[2]]
+
+
+# ════════════════════════════════════════════════════════════════
+# CALENDAR SOURCES
+# ════════════════════════════════════════════════════════════════
+
+def tint(color, amount):
+    """Blend '#RRGGBB' towards white (amount 0 = unchanged, 1 = white)."""
+    rgb = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+    return "#" + "".join(f"{round(c + (255 - c) * amount):02X}" for c in rgb)
+
+
+def bar_colors(task):
+    """(bg, border, fg, hover) of a task bar: by calendar source, else by type."""
+    src = task.get("source")
+    if src is not None:
+        return src.bg, src.bd, src.fg, src.hover
+    if task.get("type") == "weekly":
+        return C_WKLY_BG, C_WKLY_BD, C_WKLY_FG, "#BFDBFE"
+    return C_ONCE_BG, C_ONCE_BD, C_ONCE_FG, "#FED7AA"
+
+
+class CalendarSource:
+    """
+    One read-only calendar file.
+    - Parsed once per file change into per-date and per-weekday lists that
+      are already sorted by start, so a week comes out in (date, start) order
+      by merging two short sorted lists per day
+    - Its task dicts carry "source": self (colours, read-only); they never
+      end up in data.txt
+    """
+
+    def __init__(self, name, path, color, conflicts=False):
+        self.name      = name
+        self.path      = path
+        self.conflicts = conflicts
+        self.fg, self.bd, self.bg = color, tint(color, 0.5), tint(color, 0.9)
+        self.hover     = tint(color, 0.75)
+        self.tasks     = []
+        self.slots     = ConflictIndex()
+        self._stat     = None
+        self._once     = {}       # date → [(start min, task)], sorted
+        self._weekly   = {}       # n (1=Mon) → [(start min, task)], sorted
+
+    def refresh(self):
+        """Re-read the file if it changed on disk. True if it was re-read."""
+        try:
+            st   = os.stat(self.path)
+            stat = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stat = None
+        if stat == self._stat:
+            return False
+        self._stat = stat
+        tasks, once, weekly = [], {}, {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    t = parse_task_line(line)
+                    if t is None:
+                        continue
+                    try:
+                        start = time_to_min(t["start"])
+                        if t["type"] == "weekly":
+                            weekly.setdefault(int(t["date"][1:]), []).append((start, t))
+                        else:
+                            once.setdefault(t["date"], []).append((start, t))
+                    except ValueError:
+                        continue
+                    t["source"] = self
+                    tasks.append(t)
+        except (OSError, UnicodeDecodeError):
+            pass
+        for lst in itertools.chain(once.values(), weekly.values()):
+            lst.sort(key=lambda p: p[0])
+        self.tasks, self._once, self._weekly = tasks, once, weekly
+        if self.conflicts:
+            self.slots = ConflictIndex(tasks)
+        return True
+
+    def iter_week(self, week_dates):
+        """Yield (date, start min, task) for Mon–Sun week_dates, in (date, start) order."""
+        for n, d in enumerate(week_dates, 1):
+            for start, t in heapq.merge(self._once.get(d, ()), self._weekly.get(n, ()),
+                                        key=lambda p: p[0]):
+                yield d, start, t
+
+
+class CalendarOverlay:
+    """The personal week plus every CalendarSource, k-way merged by (date, start)."""
+
+    def __init__(self, specs=CALENDAR_SOURCES):
+        self.sources = [CalendarSource(**spec) for spec in specs]
+
+    def refresh(self):
+        """Re-read changed source files. True if any was re-read."""
+        return any([src.refresh() for src in self.sources])
+
+    def merge_week(self, week_dates, personal):
+        """
+        personal: {date: [tasks sorted by start]} for the week.
+        Returns the same shape with all sources merged in; each stream is
+        already sorted, so heapq.merge only interleaves them (personal first
+        on ties).
+        """
+        streams = [((d, time_to_min(t["start"]), t) for d in week_dates for t in personal[d])]
+        streams += [src.iter_week(week_dates) for src in self.sources]
+        by_date = {d: [] for d in week_dates}
+        for d, _start, t in heapq.merge(*streams, key=lambda p: p[:2]):
+            by_date[d].append(t)
+        return by_date
+
+    def conflict(self, date_key, start, end, task_type):
+        """(source, task) of the first clash in a source with conflicts on, or None."""
+        for src in self.sources:
+            if src.conflicts:
+                t = src.slots.conflict(date_key, start, end, task_type)
+                if t is not None:
+                    return src, t
+        return None
+
+
+# ════════════════════════════════════════════════════════════════
+# SEARCH INDEX
+# ════════════════════════════════════════════════════════════════
+
+_WORD_RE = re.compile(r"\w+")
+
+
+@functools.lru_cache(maxsize=65536)
+def fold_word(word):
+    """Lower-case and strip diacritics: 'Đàn' → 'dan'."""
+    if word.isascii():
+        return word.lower()
+    word = word.lower().replace("đ", "d")
+    return "".join(c for c in unicodedata.normalize("NFD", word)
+                   if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """Split into diacritic-free lower-case words (cached per distinct word)."""
+    return [fold_word(w) for w in _WORD_RE.findall(unicodedata.normalize("NFC", text))]
+
+
+class TaskSearchIndex:
+    """
+    Inverted index over task heading + content.
+    - postings: token → {task id: weight}  (heading hits weigh more)
+    - vocab is kept sorted, so a prefix query is one bisect range; only
+      prefixes of up to SHORT_PREFIX chars are capped (at MAX_EXPAND words),
+      so typing the first letter stays cheap and longer prefixes miss nothing
+    - add / remove are incremental; queries never scan the task list
+    """
+
+    HEADING_W    = 3    # content words weigh 1
+    MAX_EXPAND   = 64
+    SHORT_PREFIX = 2
+
+    def __init__(self, tasks=()):
+        self._postings = {}     # token → {id(task): weight}
+        self._docs     = {}     # id(task) → (task, tokens)
+        for t in tasks:
+            self._index(t)
+        self._vocab = sorted(self._postings)
+
+    def _index(self, task):
+        """Add task to postings; return tokens that are new to the vocab."""
+        key    = id(task)
+        counts = collections.Counter(tokenize(task.get("content", "")))
+        for tok in tokenize(task.get("heading", "")):
+            counts[tok] += self.HEADING_W
+        new_tokens = []
+        postings   = self._postings
+        for tok, w in counts.items():
+            posting = postings.get(tok)
+            if posting is None:
+                posting = postings[tok] = {}
+                new_tokens.append(tok)
+            posting[key] = w
+        self._docs[key] = (task, tuple(counts))
+        return new_tokens
+
+    def add(self, task):
+        for tok in self._index(task):
+            bisect.insort(self._vocab, tok)
+
+    def remove(self, task):
+        entry = self._docs.pop(id(task), None)
+        if entry is None:
+            return
+        for tok in entry[1]:
+            posting = self._postings[tok]
+            posting.pop(id(task), None)
+            if not posting:
+                del self._postings[tok]
+                i = bisect.bisect_left(self._vocab, tok)
+                if i < len(self._vocab) and self._vocab[i] == tok:
+                    del self._vocab[i]
+
+    def replace(self, old, new):
+        self.remove(old)
+        self.add(new)
+
+    def approx_bytes(self):
+        """Rough bytes held by the index: vocabulary, postings and per-task entries."""
+        return (sys.getsizeof(self._postings) + sys.getsizeof(self._docs)
+                + sys.getsizeof(self._vocab) + sum(sys.getsizeof(t) for t in self._vocab)
+                + sum(sys.getsizeof(p) for p in self._postings.values())
+                + sum(sys.getsizeof(d) + sys.getsizeof(d[1]) for d in self._docs.values()))
+
+    def _expand(self, term):
+        """Vocab words starting with term (exact word first)."""
+        lo  = bisect.bisect_left(self._vocab, term)
+        hi  = lo + self.MAX_EXPAND if len(term) <= self.SHORT_PREFIX else None
+        out = []
+        for tok in itertools.islice(self._vocab, lo, hi):
+            if not tok.startswith(term):
+                break
+            out.append(tok)
+        return out
+
+    def search(self, query, limit=50):
+        """Tasks matching every query term (as a prefix), best first."""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        expanded = []
+        for term in terms:
+            toks = self._expand(term)
+            if not toks:
+                return []
+            size = sum(len(self._postings[t]) for t in toks)
+            expanded.append((size, term, toks))
+        expanded.sort()                            # most selective term first
+
+        scores = None
+        for _size, term, toks in expanded:
+            hits = {}
+            for tok in toks:
+                boost   = 2 if tok == term else 1  # exact word beats prefix
+                posting = self._postings[tok]
+                if scores is not None and len(scores) < len(posting):
+                    pairs = ((k, posting[k]) for k in scores if k in posting)
+                else:
+                    pairs = posting.items()
+                for k, w in pairs:
+                    hits[k] = hits.get(k, 0) + w * boost
+            if scores is None:
+                scores = hits
+            else:
+                scores = {k: s + hits[k] for k, s in scores.items() if k in hits}
+            if not scores:
+                return []
+        best = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return [self._docs[k][0] for k, _ in best]
+
+
+# ════════════════════════════════════════════════════════════════
+# BACKGROUND LOADING
+# ════════════════════════════════════════════════════════════════
+
+class TaskLoader(threading.Thread):
+    """
+    Parses data.txt on a worker thread so the window shows up immediately.
+    Messages put on self.queue (drained by the UI via root.after):
+      ("chunk", [tasks])   parsed tasks, in file order
+      ("index", index)     TaskSearchIndex built over everything loaded
+      ("loads", table)     DayLoadTable built over everything loaded
+      ("slots", index)     ConflictIndex built over everything loaded
+      ("error", exc)       file could not be read or parsed; what was
+                           loaded is incomplete and must not be saved
+      ("done",  None)      always last, whatever happened
+    self.snapshot is the store_snapshot() taken before reading.
+    Tk is never touched from this thread.
+    """
+
+    def __init__(self, chunk_size=2000):
+        super().__init__(daemon=True)
+        self.queue      = queue.Queue()
+        self.chunk_size = chunk_size
+        self.snapshot   = (0, None)
+
+    def run(self):
+        loaded = []
+        try:
+            self.snapshot = store_snapshot()
+            cached = load_task_cache()
+            if cached is not None:
+                n      = self.chunk_size
+                chunks = (cached[i:i + n] for i in range(0, len(cached), n))
+            else:
+                chunks = iter_task_chunks(self.chunk_size)
+            for chunk in chunks:
+                loaded.extend(chunk)
+                self.queue.put(("chunk", chunk))
+            if cached is None:
+                write_task_cache(loaded)
+            self.queue.put(("index", TaskSearchIndex(loaded)))
+            self.queue.put(("loads", DayLoadTable(loaded)))
+            self.queue.put(("slots", ConflictIndex(loaded)))
+        except Exception as exc:            # bad encoding, bad line, … — report, never hang
+            self.queue.put(("error", exc))
+        finally:
+            self.queue.put(("done", None))
+
+
+class StorePull(threading.Thread):
+    """
+    SharedTaskFile.fetch on a worker thread, so a save by another instance
+    does not freeze the window while data.txt is re-read and merged.
+    Built on the Tk thread: tasks is copied and base / version record what
+    the result was computed from. Afterwards .result is the fetch tuple, or
+    None with .error set.
+    """
+
+    def __init__(self, store, tasks, version):
+        super().__init__(daemon=True)
+        self.store   = store
+        self.tasks   = list(tasks)
+        self.base    = store.base
+        self.version = version
+        self.result  = None
+        self.error   = None
+
+    def run(self):
+        try:
+            self.result = self.store.fetch(self.tasks, self.base)
+        except Exception as exc:            # unreadable data.txt: retried next tick
+            self.error = exc
+
+
+# ════════════════════════════════════════════════════════════════
+# TASK REPOSITORY
+# ════════════════════════════════════════════════════════════════
+
+TaskChange = collections.namedtuple("TaskChange", "kind old new")
+ADDED, UPDATED, REMOVED = "added", "updated", "removed"
+
+
+def apply_changes(index, changes):
+    """Feed TaskChanges to an index with add / replace / remove (search, loads, slots)."""
+    for c in changes:
+        if c.kind == ADDED:
+            index.add(c.new)
+        elif c.kind == UPDATED:
+            index.replace(c.old, c.new)
+        else:
+            index.remove(c.old)
+
+
+class TaskRepository:
+    """
+    Owns the task list; every edit goes through here and is announced to
+    subscribers as a list of TaskChange(kind, old, new):
+      added    (None, task)
+      updated  (previous dict, replacement) — same list position
+      removed  (task, None)
+    update / remove find their task by identity at call time, since a merge
+    from data.txt may have moved it (or dropped it: they then return False).
+    Subscribers are called in order with (changes, origin): "local" for edits
+    made in this window, "store" for changes merged in from data.txt, which
+    persistence must not write back. A subscriber may publish in turn (a save
+    that merged); that batch reaches everyone after the current one.
+    The initial bulk load appends to .tasks directly: TaskLoader builds the
+    indexes for it in one go.
+    """
+
+    def __init__(self, tasks=None):
+        self.tasks    = [] if tasks is None else tasks
+        self.version  = 0          # bumped by every published batch
+        self._subs    = []
+        self._queue   = collections.deque()
+        self._sending = False
+
+    def subscribe(self, fn):
+        self._subs.append(fn)
+
+    def publish(self, changes, origin="local"):
+        if not changes:
+            return
+        self.version += 1
+        self._queue.append((changes, origin))
+        if self._sending:
+            return
+        self._sending = True
+        try:
+            while self._queue:
+                batch, src = self._queue.popleft()
+                for fn in self._subs:
+                    fn(batch, src)
+        finally:
+            self._sending = False
+
+    def add(self, task):
+        self.tasks.append(task)
+        self.publish([TaskChange(ADDED, None, task)])
+
+    def _position(self, task):
+        return next((i for i, t in enumerate(self.tasks) if t is task), None)
+
+    def update(self, old, task):
+        idx = self._position(old)
+        if idx is None:
+            return False
+        self.tasks[idx] = task
+        self.publish([TaskChange(UPDATED, old, task)])
+        return True
+
+    def remove(self, task):
+        idx = self._position(task)
+        if idx is None:
+            return False
+        del self.tasks[idx]
+        self.publish([TaskChange(REMOVED, task, None)])
+        return True
+
+    def replace_all(self, tasks, origin="store"):
+        """Swap in a whole list (e.g. a merge result), publishing only the difference."""
+        if tasks is self.tasks:
+            return
+        old = {id(t): t for t in self.tasks}
+        new = {id(t) for t in tasks}
+        changes = [TaskChange(REMOVED, t, None) for k, t in old.items() if k not in new]
+        changes += [TaskChange(ADDED, None, t) for t in tasks if id(t) not in old]
+        self.tasks[:] = tasks
+        self.publish(changes, origin)
+
+
 # ════════════════════════════════════════════════════════════════
 # TIME-ENTRY WIDGET  
 # ════════════════════════════════════════════════════════════════
@@ -384,12 +1462,17 @@ def styled_entry(parent, textvariable=None, width=None, **kwargs):
 # NOTE FORM WINDOW  (Add / Edit)
 # ════════════════════════════════════════════════════════════════
 
+STALE_TASK_MSG = ("This task was changed or deleted elsewhere (another window or\n"
+                  "another instance) in the meantime.\n\n"
+                  "Open the task again to see its current version.")
+
+
 class NoteFormWindow:
     """Toplevel for creating or editing a task."""
 
-    def __init__(self, parent_app, task=None, task_idx=None):
-        self.app         = parent_app
-        self.editing_idx = task_idx
+    def __init__(self, parent_app, task=None):
+        self.app     = parent_app
+        self.editing = task
 
         self.win = tk.Toplevel(parent_app.root)
         self.win.title("Edit Task" if task else "Add Task")
@@ -575,6 +1658,8 @@ class NoteFormWindow:
     # ── Confirm ───────────────────────────────────────────────
 
     def _confirm(self):
+        if self.app.refuse_edit(self.win):
+            return
         task_type = self.type_var.get()
         start     = self.from_entry.get_time().strip()
         end       = self.to_entry.get_time().strip()
@@ -594,51 +1679,22 @@ class NoteFormWindow:
             date_key = f"W{wday_idx}"
         else:
             date_key = self.date_var.get().strip()
-            try:
-                datetime.date.fromisoformat(date_key)
-            except ValueError:
-                messagebox.showerror("Invalid Date", "Please enter date as YYYY-MM-DD.",
-                                     parent=self.win)
-                return
 
-        # Validate times
-        try:
-            time_to_min(start)
-            time_to_min(end)
-        except Exception:
-            messagebox.showerror("Invalid Time", "Please enter times as HH:MM.",
-                                 parent=self.win)
-            return
-        if time_to_min(start) >= time_to_min(end):
-            messagebox.showerror("Invalid Time", "Start time must be before end time.",
-                                 parent=self.win)
-            return
-        REST_PERIODS = [
-            ("12:00", "13:00"),
-            ("17:00", "18:00"),
-            ("23:00", "23:59"),
-            ("00:00", "06:00"),
-        ]
-        for rs, re in REST_PERIODS:
-            if times_overlap(start, end, rs, re):
-                messagebox.showerror(
-                    "Rest Time",
-                    f"This time overlaps rest period {rs}–{re}.",
-                    parent=self.win
-                )
-                return
-        if not heading:
-            messagebox.showerror("Missing Heading", "Please enter a heading.",
-                                 parent=self.win)
+        error = validate_task(task_type, date_key, start, end, heading)
+        if error:
+            messagebox.showerror(*error, parent=self.win)
             return
 
         # Conflict check
-        conflict = check_conflict(
-            self.app.tasks, date_key, start, end, task_type,
-            exclude_idx=self.editing_idx
-        )
+        conflict = self.app.slots.conflict(date_key, start, end, task_type, exclude=self.editing)
+        where = ""
+        if not conflict:
+            clash = self.app.overlay.conflict(date_key, start, end, task_type)
+            if clash:
+                where    = f" ({clash[0].name})"
+                conflict = clash[1]
         if conflict:
-            msg = (f"Time conflict with:\n\n"
+            msg = (f"Time conflict with{where}:\n\n"
                    f"  {conflict['start']}–{conflict['end']}  |  {conflict['heading']}\n\n"
                    f"Please choose a different time slot.")
             messagebox.showerror("Time Conflict", msg, parent=self.win)
@@ -653,14 +1709,11 @@ class NoteFormWindow:
             "type":    task_type,
         }
 
-        if self.editing_idx is not None:
-            self.app.tasks[self.editing_idx] = new_task
-        else:
-            self.app.tasks.append(new_task)
-
-        save_tasks(self.app.tasks)
-        self.app.refresh_calendar()
-        self.app.refresh_next_task()
+        if self.editing is None:
+            self.app.repo.add(new_task)
+        elif not self.app.repo.update(self.editing, new_task):
+            messagebox.showerror("Task Changed", STALE_TASK_MSG, parent=self.win)
+            return
         self.win.destroy()
 
 
@@ -671,10 +1724,9 @@ class NoteFormWindow:
 class TaskDetailWindow:
     """Shows task details + countdown + edit/delete buttons."""
 
-    def __init__(self, parent_app, task, task_idx):
-        self.app      = parent_app
-        self.task     = task
-        self.task_idx = task_idx
+    def __init__(self, parent_app, task):
+        self.app  = parent_app
+        self.task = task
 
         self.win = tk.Toplevel(parent_app.root)
         self.win.title("Task Detail")
@@ -811,17 +1863,18 @@ class TaskDetailWindow:
     # ── Actions ───────────────────────────────────────────────
 
     def _delete(self):
+        if self.app.refuse_edit(self.win):
+            return
         if messagebox.askyesno("Delete", f"Delete '{self.task['heading']}'?",
                                parent=self.win):
-            del self.app.tasks[self.task_idx]
-            save_tasks(self.app.tasks)
-            self.app.refresh_calendar()
-            self.app.refresh_next_task()
+            if not self.app.repo.remove(self.task):
+                messagebox.showerror("Task Changed", STALE_TASK_MSG, parent=self.win)
+                return
             self.win.destroy()
 
     def _edit(self):
         self.win.destroy()
-        NoteFormWindow(self.app, task=self.task, task_idx=self.task_idx)
+        NoteFormWindow(self.app, task=self.task)
 
 
 # ════════════════════════════════════════════════════════════════
@@ -829,7 +1882,15 @@ class TaskDetailWindow:
 # ════════════════════════════════════════════════════════════════
 
 class YearCalendarWindow:
-    """Month-grid calendar view for any month/year."""
+    """
+    Month-grid calendar view for any month/year.
+    - Dot mode marks days with tasks; heatmap mode colours days by planned minutes
+    - Year view draws all 12 months on one canvas (click a day → its month)
+    - Every day is a lookup in the app's DayLoadTable, never a task scan
+    """
+
+    MONTHS = ["January","February","March","April","May","June",
+              "July","August","September","October","November","December"]
 
     def __init__(self, parent_app):
         self.app  = parent_app
@@ -843,6 +1904,9 @@ class YearCalendarWindow:
         now             = datetime.date.today()
         self._year_var  = tk.IntVar(value=now.year)
         self._month_var = tk.IntVar(value=now.month)
+        self._heat      = False
+        self._view      = "month"        # "month" | "year"
+        self._year_hits = []             # [(x1, y1, x2, y2, month)] of the year view
 
         self._build()
         self._render()
@@ -865,10 +1929,8 @@ class YearCalendarWindow:
         center = tk.Frame(hdr, bg=C_SECONDARY)
         center.pack(side="left", expand=True)
 
-        MONTHS = ["January","February","March","April","May","June",
-                  "July","August","September","October","November","December"]
         self._month_cb = ttk.Combobox(
-            center, values=MONTHS, state="readonly",
+            center, values=self.MONTHS, state="readonly",
             font=("Segoe UI", 12), width=12)
         self._month_cb.current(self._month_var.get() - 1)
         self._month_cb.pack(side="left", padx=6)
@@ -886,22 +1948,56 @@ class YearCalendarWindow:
                       font=("Segoe UI", 12, "bold"), padx=14, pady=4
                       ).pack(side="right", padx=16)
 
-        # Legend
-        leg = tk.Frame(hdr, bg=C_SECONDARY)
-        leg.pack(side="right", padx=20)
-        for color, label in (("#FB923C", "Upcoming"), ("#22C55E", "Past")):
-            tk.Label(leg, text="■", bg=C_SECONDARY, fg=color,
-                     font=("Segoe UI", 13)).pack(side="left")
-            tk.Label(leg, text=label, bg=C_SECONDARY, fg=C_TEXT,
-                     font=("Segoe UI", 9)).pack(side="left", padx=(0, 10))
+        # Mode toggles
+        self._view_btn = styled_button(hdr, "Year view", self._toggle_view,
+                                       bg=C_SECONDARY, fg=C_TEXT,
+                                       hover_bg=C_ACCENT_LT, hover_fg=C_ACCENT_DK,
+                                       font=("Segoe UI", 9, "bold"), padx=10, pady=4)
+        self._view_btn.pack(side="right", padx=(0, 4))
+        self._heat_btn = styled_button(hdr, "Heatmap", self._toggle_heat,
+                                       bg=C_SECONDARY, fg=C_TEXT,
+                                       hover_bg=C_ACCENT_LT, hover_fg=C_ACCENT_DK,
+                                       font=("Segoe UI", 9, "bold"), padx=10, pady=4)
+        self._heat_btn.pack(side="right", padx=(0, 4))
+
+        # Legend (rebuilt per mode)
+        self._legend = tk.Frame(hdr, bg=C_SECONDARY)
+        self._legend.pack(side="right", padx=20)
 
         # ── Grid container ──
         self._grid_frame = tk.Frame(win, bg=C_BG)
         self._grid_frame.pack(fill="both", expand=True, padx=16, pady=12)
 
+        # Year overview canvas (shown instead of the month grid)
+        self._year_cv = tk.Canvas(win, bg=C_BG, highlightthickness=0)
+        self._year_cv.bind("<Configure>", lambda _e: self._view == "year" and self._render())
+        self._year_cv.bind("<Button-1>", self._on_year_click)
+
+    def _build_legend(self):
+        for w in self._legend.winfo_children():
+            w.destroy()
+        if self._heat:
+            tk.Label(self._legend, text="0h", bg=C_SECONDARY, fg=C_SUBTEXT,
+                     font=("Segoe UI", 8)).pack(side="left", padx=(0, 3))
+            for _mins, bg, _bd in HEAT_STEPS:
+                tk.Label(self._legend, text="■", bg=C_SECONDARY, fg=bg,
+                         font=("Segoe UI", 13)).pack(side="left")
+            tk.Label(self._legend, text=f"{HEAT_STEPS[-1][0] // 60}h+", bg=C_SECONDARY,
+                     fg=C_SUBTEXT, font=("Segoe UI", 8)).pack(side="left", padx=(3, 0))
+        else:
+            for color, label in (("#FB923C", "Upcoming"), ("#22C55E", "Past")):
+                tk.Label(self._legend, text="■", bg=C_SECONDARY, fg=color,
+                         font=("Segoe UI", 13)).pack(side="left")
+                tk.Label(self._legend, text=label, bg=C_SECONDARY, fg=C_TEXT,
+                         font=("Segoe UI", 9)).pack(side="left", padx=(0, 10))
+
     # ── Navigation ────────────────────────────────────────────
 
     def _prev(self):
+        if self._view == "year":
+            self._year_var.set(self._year_var.get() - 1)
+            self._render()
+            return
         m = self._month_var.get() - 1
         y = self._year_var.get()
         if m < 1:
@@ -912,6 +2008,10 @@ class YearCalendarWindow:
         self._render()
 
     def _next(self):
+        if self._view == "year":
+            self._year_var.set(self._year_var.get() + 1)
+            self._render()
+            return
         m = self._month_var.get() + 1
         y = self._year_var.get()
         if m > 12:
@@ -923,11 +2023,63 @@ class YearCalendarWindow:
 
     def _on_month_sel(self, _event):
         self._month_var.set(self._month_cb.current() + 1)
+        if self._view == "year":
+            self._toggle_view()
+            return
+        self._render()
+
+    def _toggle_heat(self):
+        self._heat = not self._heat
+        self._heat_btn.winfo_children()[0].config(text="Dots" if self._heat else "Heatmap")
         self._render()
 
+    def _toggle_view(self):
+        if self._view == "month":
+            self._view = "year"
+            self._grid_frame.pack_forget()
+            self._year_cv.pack(fill="both", expand=True, padx=16, pady=12)
+        else:
+            self._view = "month"
+            self._year_cv.pack_forget()
+            self._grid_frame.pack(fill="both", expand=True, padx=16, pady=12)
+        self._view_btn.winfo_children()[0].config(
+            text="Month view" if self._view == "year" else "Year view")
+        self._render()
+
+    def _on_year_click(self, e):
+        for x1, y1, x2, y2, month in self._year_hits:
+            if x1 <= e.x <= x2 and y1 <= e.y <= y2:
+                self._month_var.set(month)
+                self._month_cb.current(month - 1)
+                self._toggle_view()
+                return
+
     # ── Render ────────────────────────────────────────────────
 
+    def _day_colors(self, d, today, load):
+        """(cell_bg, border, mark_fg or None) for one day."""
+        minutes, has_task = load.minutes(d), load.has_task(d)
+        if self._heat:
+            bg, bdr = heat_color(minutes)
+            if d == today:
+                bdr = C_ACCENT
+            return bg, bdr, None
+        if d == today:
+            return C_ACCENT_LT, C_ACCENT, ("#FB923C" if has_task else None)
+        if has_task:
+            if d >= today:
+                return "#FFEDD5", "#FDBA74", "#FB923C"
+            return "#DCFCE7", "#86EFAC", "#22C55E"
+        return C_WHITE, C_BORDER, None
+
     def _render(self):
+        self._build_legend()
+        if self._view == "year":
+            self._render_year()
+        else:
+            self._render_month()
+
+    def _render_month(self):
         for w in self._grid_frame.winfo_children():
             w.destroy()
 
@@ -941,6 +2093,7 @@ class YearCalendarWindow:
         first_day  = datetime.date(year, month, 1)
         num_days   = cal_module.monthrange(year, month)[1]
         first_wday = first_day.weekday()          # 0=Mon
+        load       = self.app.day_load
 
         g = self._grid_frame
         for col in range(7):
@@ -959,20 +2112,8 @@ class YearCalendarWindow:
 
         for day in range(1, num_days + 1):
             d = datetime.date(year, month, day)
-            has_task = date_has_any_task(self.app.tasks, d)
             is_today = d == today
-
-            # Pick colors
-            if is_today:
-                cell_bg = C_ACCENT_LT
-                bdr     = C_ACCENT
-            elif has_task:
-                if d >= today:
-                    cell_bg, bdr = "#FFEDD5", "#FDBA74"
-                else:
-                    cell_bg, bdr = "#DCFCE7", "#86EFAC"
-            else:
-                cell_bg, bdr = C_WHITE, C_BORDER
+            cell_bg, bdr, dot_fg = self._day_colors(d, today, load)
 
             cell = tk.Frame(g, bg=cell_bg,
                             highlightbackground=bdr, highlightthickness=1)
@@ -984,8 +2125,11 @@ class YearCalendarWindow:
                      font=("Segoe UI", 12, "bold" if is_today else "normal")
                      ).pack(pady=(6, 0))
 
-            if has_task:
-                dot_fg = "#FB923C" if d >= today else "#22C55E"
+            minutes = load.minutes(d)
+            if self._heat and minutes:
+                tk.Label(cell, text=f"{minutes // 60}h{minutes % 60:02d}", bg=cell_bg,
+                         fg=C_TEXT, font=("Segoe UI", 8)).pack()
+            elif dot_fg:
                 tk.Label(cell, text="●", bg=cell_bg, fg=dot_fg,
                          font=("Segoe UI", 9)).pack()
 
@@ -1001,6 +2145,44 @@ class YearCalendarWindow:
                      ).grid(row=row, column=col, sticky="nsew", padx=2, pady=2)
             col += 1
 
+    def _render_year(self):
+        """12 mini months (4 × 3) drawn on one canvas."""
+        cv = self._year_cv
+        cv.delete("all")
+        self._year_hits = []
+        try:
+            year = int(self._year_var.get())
+        except (ValueError, tk.TclError):
+            return
+
+        today = datetime.date.today()
+        load  = self.app.day_load
+        W, H  = max(cv.winfo_width(), 560), max(cv.winfo_height(), 420)
+        cols, rows = 4, 3
+        mw, mh = W / cols, H / rows
+        cell   = min((mw - 16) / 7, (mh - 40) / 7)
+
+        for m in range(1, 13):
+            ox = ((m - 1) % cols) * mw + 8
+            oy = ((m - 1) // cols) * mh + 4
+            cv.create_text(ox, oy, anchor="nw", text=self.MONTHS[m - 1],
+                           fill=C_TEXT, font=("Segoe UI", 10, "bold"))
+            for i, name in enumerate(WDAY_SHORT):
+                cv.create_text(ox + i * cell + cell / 2, oy + 26, text=name[0],
+                               fill=C_SUBTEXT, font=("Segoe UI", 7))
+            first_wday = datetime.date(year, m, 1).weekday()
+            for day in range(1, cal_module.monthrange(year, m)[1] + 1):
+                d    = datetime.date(year, m, day)
+                slot = first_wday + day - 1
+                x    = ox + (slot % 7) * cell
+                y    = oy + 34 + (slot // 7) * cell
+                bg, bdr, dot_fg = self._day_colors(d, today, load)
+                if dot_fg and not self._heat:
+                    bg = dot_fg
+                cv.create_rectangle(x + 1, y + 1, x + cell - 1, y + cell - 1,
+                                    fill=bg, outline=bdr)
+            self._year_hits.append((ox, oy, ox + 7 * cell, oy + 34 + 6 * cell, m))
+
 
 # ════════════════════════════════════════════════════════════════
 # FLOATING ACTION BUTTON 
@@ -1052,6 +2234,7 @@ class FloatingButton:
         self.cv.lift()
 
         self.root.bind("<Configure>", self._on_root_resize)
+        self.app.redraw.register("fab", self._clamp_into_root)
 
     # ─────────────────────────────
 
@@ -1086,16 +2269,22 @@ class FloatingButton:
         self.cv.place(x=x, y=y)
 
     def _on_root_resize(self, event):
+        # <Configure> bubbles up from every child; only the root's size matters,
+        # and a window drag is clamped once per idle pass
+        if event.widget is self.root:
+            self.app.redraw.mark("fab")
+
+    def _clamp_into_root(self):
         # Keep button inside bounds if window shrinks
         x = self.cv.winfo_x()
         y = self.cv.winfo_y()
 
-        max_x = event.width - self.SIZE
-        max_y = event.height - self.SIZE
+        max_x = self.root.winfo_width() - self.SIZE
+        max_y = self.root.winfo_height() - self.SIZE
+
+        new_x = max(0, min(x, max_x))
+        new_y = max(0, min(y, max_y))
 
-        new_x = min(x, max_x)
-        new_y = min(y, max_y)
-        
         self.cv.place(x=new_x, y=new_y)
 
     # ─────────────────────────────
@@ -1154,17 +2343,507 @@ class FloatingButton:
             self._tip.destroy()
             self._tip = None
 
+# ════════════════════════════════════════════════════════════════
+# REDRAW SCHEDULER
+# ════════════════════════════════════════════════════════════════
+
+class RedrawScheduler:
+    """
+    Coalesces UI refreshes into a single after_idle pass.
+    - mark(region, ...) only flags regions dirty; repeated marks are free
+    - flush() runs each dirty region's handler once, in registration order
+    - covers maps a region to regions its redraw already refreshes
+      (e.g. a full week draw also resets the scrollregion)
+    """
+
+    def __init__(self, root, covers=None):
+        self.root      = root
+        self.covers    = covers or {}
+        self._handlers = {}      # region → callback, insertion order = flush order
+        self._dirty    = set()
+        self._pending  = None    # after_idle id while a pass is scheduled
+
+    def register(self, region, handler):
+        self._handlers[region] = handler
+
+    def mark(self, *regions):
+        self._dirty.update(regions)
+        if self._pending is None:
+            self._pending = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self._pending = None
+        dirty, self._dirty = self._dirty, set()
+        covered = set()
+        for region in dirty:
+            covered.update(self.covers.get(region, ()))
+        for region, handler in self._handlers.items():
+            if region in dirty and region not in covered:
+                handler()
+
+
+# ════════════════════════════════════════════════════════════════
+# WEEK CANVAS RENDERER
+# ════════════════════════════════════════════════════════════════
+
+# "canvas"  → whole week drawn on one tk.Canvas (WeekCanvasRenderer)
+# "widgets" → legacy nested Frame/Label grid
+WEEK_RENDERER = "canvas"
+
+
+class WeekCanvasRenderer:
+    """
+    Draws the week grid (header, session/rest rows, task bars) onto one Canvas.
+    - Every item is tagged "week" so a redraw is a single delete + re-create
+    - Clicks / hover go through a hit map (column → bars sorted by y),
+      so there are no per-bar widgets or bindings
+    - Bars can be dragged to another day / time: the pointer's row maps to a
+      time inside that session or rest row, snapped to SNAP_MIN (5 with Shift).
+      Each motion re-checks rest periods and the app's ConflictIndex; a valid
+      drop saves through the app like an edit in the note form
+    """
+
+    LABEL_W   = 82
+    LABEL_GAP = 3
+    HEADER_H  = 52
+    SESSION_H = 155
+    REST_H    = 22
+    MIN_COL_W = 120
+    CELL_PAD  = 2
+    BAR_H     = 38
+    BAR_GAP   = 8
+    BAR_PADX  = 5
+    DRAG_SLOP = 5          # px the pointer must move before a press becomes a drag
+    SNAP_MIN  = 15
+    SNAP_FINE = 5
+
+    DROP_OK   = ("#DCFCE7", "#16A34A")    # ghost fill, outline
+    DROP_BAD  = ("#FEE2E2", "#DC2626")
+    DROP_REST = ("#FEF3C7", "#D97706")
+
+    def __init__(self, parent_app, canvas: tk.Canvas):
+        self.app = parent_app
+        self.cv  = canvas
+
+        self._last   = None    # (week_dates, today, by_date) of the last draw
+        self._col_x  = []      # left edge of each day column
+        self._col_w  = 0
+        self._hits   = {}      # col → [(y1, y2, rect_id, task, editable, bg)]
+        self._hover  = None    # hit tuple under the pointer
+        self._spans  = []      # (y1, y2, from min, to min) of each session / rest row
+        self._press  = None    # (x, y, hit) while button 1 is down on an own bar
+        self._drag   = None    # drag state once the press has moved DRAG_SLOP
+
+        self.cv.bind("<ButtonPress-1>",   self._on_press, add="+")
+        self.cv.bind("<B1-Motion>",       self._on_drag, add="+")
+        self.cv.bind("<ButtonRelease-1>", self._on_release, add="+")
+        self.cv.bind("<Motion>",          self._on_motion, add="+")
+        self.cv.bind("<Leave>",           self._on_leave, add="+")
+
+    # ── Drawing ───────────────────────────────────────────────
+
+    def draw(self, week_dates, today, by_date):
+        self._last = (week_dates, today, by_date)
+        cv = self.cv
+        cv.delete("week")
+        self._hits  = {col: [] for col in range(7)}
+        self._hover = None
+        self._spans = []
+
+        width  = max(cv.winfo_width(), self.LABEL_W + self.LABEL_GAP + 7 * self.MIN_COL_W)
+        x0     = self.LABEL_W + self.LABEL_GAP
+        col_w  = (width - x0) / 7
+        self._col_x = [x0 + i * col_w for i in range(7)]
+        self._col_w = col_w
+        P = self.CELL_PAD
+
+        # ── Header row ──
+        cv.create_rectangle(0, 0, self.LABEL_W, self.HEADER_H,
+                            fill=C_ACCENT_DK, outline="", tags="week")
+        cv.create_text(self.LABEL_W / 2, self.HEADER_H / 2, text="Session\n/ Day",
+                       fill=C_WHITE, font=("Segoe UI", 9, "bold"),
+                       justify="center", tags="week")
+        for col, (day, date_str) in enumerate(zip(WDAY_SHORT, week_dates)):
+            is_today = date_str == today
+            hdr_bg   = C_TODAY_HDR if is_today else C_OTHER_HDR
+            hdr_fg   = C_TODAY_FG  if is_today else C_OTHER_FG
+            cx = self._col_x[col]
+            cv.create_rectangle(cx + P, 0, cx + col_w - P, self.HEADER_H,
+                                fill=hdr_bg, outline=C_BORDER, tags="week")
+            cv.create_text(cx + col_w / 2, 17, text=day, fill=hdr_fg,
+                           font=("Segoe UI", 10, "bold"), tags="week")
+            cv.create_text(cx + col_w / 2, 37, text=date_str[8:], fill=hdr_fg,
+                           font=("Segoe UI", 9), tags="week")
+
+        # ── Session rows ──
+        y = self.HEADER_H + 4
+        sessions = self.app.SESSIONS
+        for s_idx, (sname, ss, se) in enumerate(sessions):
+            per_col = [
+                [t for t in by_date[d] if times_overlap(t["start"], t["end"], ss, se)]
+                for d in week_dates
+            ]
+            most  = max((len(c) for c in per_col), default=0)
+            row_h = max(self.SESSION_H, most * (self.BAR_H + self.BAR_GAP) + self.BAR_GAP)
+
+            cv.create_rectangle(0, y + P, self.LABEL_W, y + row_h - P,
+                                fill=C_SECONDARY, outline="", tags="week")
+            cv.create_text(self.LABEL_W / 2, y + row_h / 2, text=sname,
+                           fill=C_SUBTEXT, font=("Segoe UI", 9, "bold"),
+                           width=75, justify="center", tags="week")
+
+            for col, session_tasks in enumerate(per_col):
+                cx = self._col_x[col]
+                cv.create_rectangle(cx + P, y + P, cx + col_w - P, y + row_h - P,
+                                    fill="#F0F7FF", outline=C_BORDER, tags="week")
+                by = y + P + self.BAR_GAP / 2
+                for t in session_tasks:
+                    self._draw_bar(col, cx, by, t, "source" not in t)
+                    by += self.BAR_H + self.BAR_GAP
+            self._spans.append((y, y + row_h, time_to_min(ss), time_to_min(se)))
+            y += row_h
+
+            # Rest row (thin) between sessions
+            if s_idx < len(sessions) - 1:
+                self._spans.append((y, y + self.REST_H,
+                                    time_to_min(se), time_to_min(sessions[s_idx + 1][1])))
+                cv.create_rectangle(0, y, self.LABEL_W, y + self.REST_H,
+                                    fill=C_REST, outline="", tags="week")
+                cv.create_text(self.LABEL_W / 2, y + self.REST_H / 2, text="Rest",
+                               fill=C_BORDER, font=("Segoe UI", 8), tags="week")
+                for col in range(7):
+                    cx = self._col_x[col]
+                    cv.create_rectangle(cx + P, y, cx + col_w - P, y + self.REST_H,
+                                        fill=C_REST, outline="", tags="week")
+                y += self.REST_H
+
+        cv.configure(scrollregion=(0, 0, width, y))
+        cv.tag_raise("drag")
+
+    def _draw_bar(self, col, cx, y, task, editable):
+        bar_bg, bar_bd, bar_fg, _hover = bar_colors(task)
+
+        x1 = cx + self.CELL_PAD + self.BAR_PADX
+        x2 = cx + self._col_w - self.CELL_PAD - self.BAR_PADX
+        y2 = y + self.BAR_H
+        rect = self.cv.create_rectangle(x1, y, x2, y2, fill=bar_bg, outline=bar_bd,
+                                        tags=("week", "bar"))
+        self.cv.create_rectangle(x1, y, x1 + 4, y2, fill=bar_fg, outline="",
+                                 tags=("week", "bar"))
+        self.cv.create_text(x1 + 10, y + 4, anchor="nw",
+                            text=f"{task['start']}–{task['end']}\n{truncate(task['heading'], 15)}",
+                            fill=bar_fg, font=("Segoe UI", 8), tags=("week", "bar"))
+        self._hits[col].append((y, y2, rect, task, editable, bar_bg))
+
+    def redraw(self):
+        """Re-layout the last drawn week (e.g. after a width change)."""
+        if self._last is not None:
+            self.draw(*self._last)
+
+    # ── Hit testing ───────────────────────────────────────────
+
+    def hit_test(self, x, y):
+        """Return the hit tuple of the bar at canvas coords (x, y), or None."""
+        if not self._col_x or x < self._col_x[0]:
+            return None
+        col = bisect.bisect_right(self._col_x, x) - 1
+        inset = self.CELL_PAD + self.BAR_PADX
+        if not (self._col_x[col] + inset <= x <= self._col_x[col] + self._col_w - inset):
+            return None
+        bars = self._hits.get(col, [])
+        i = bisect.bisect_right(bars, y, key=lambda h: h[0]) - 1
+        if i >= 0 and bars[i][0] <= y <= bars[i][1]:
+            return bars[i]
+        return None
+
+    def _event_hit(self, e):
+        return self.hit_test(self.cv.canvasx(e.x), self.cv.canvasy(e.y))
+
+    def _on_motion(self, e):
+        if self._press is not None:
+            return
+        hit = self._event_hit(e)
+        if hit is self._hover:
+            return
+        self._on_leave(e)
+        if hit:
+            self.cv.itemconfig(hit[2], fill=bar_colors(hit[3])[3])
+            if hit[4]:                                  # overlay tasks are read-only
+                self.cv.config(cursor="hand2")
+            self._hover = hit
+
+    def _on_leave(self, _e):
+        if self._hover:
+            self.cv.itemconfig(self._hover[2], fill=self._hover[5])
+            self._hover = None
+        if self._drag is None:
+            self.cv.config(cursor="")
+
+    # ── Click / drag ──────────────────────────────────────────
+
+    def _on_press(self, e):
+        hit = self._event_hit(e)
+        self._press = (e.x, e.y, hit) if hit and hit[4] else None
+        self._drag  = None
+
+    def _on_release(self, e):
+        press, drag = self._press, self._drag
+        self._press = self._drag = None
+        if drag is not None:
+            self.cv.delete("drag")
+            self.cv.config(cursor="")
+            self._drop(drag)
+        elif press is not None:
+            hit = self._event_hit(e)
+            if hit and hit[3] is press[2][3]:
+                TaskDetailWindow(self.app, hit[3])
+
+    def _on_drag(self, e):
+        if self._press is None:
+            return
+        x0, y0, hit = self._press
+        if self._drag is None:
+            if abs(e.x - x0) + abs(e.y - y0) < self.DRAG_SLOP or self.app.loading \
+                    or self.app.load_error is not None:
+                return
+            self._on_leave(e)
+            task = hit[3]
+            self._drag = {
+                "task":   task,
+                "dur":    max(time_to_min(task["end"]) - time_to_min(task["start"]), 5),
+                "ghost":  self.cv.create_rectangle(0, 0, 0, 0, width=2, dash=(4, 2), tags="drag"),
+                "label":  self.cv.create_text(0, 0, anchor="nw", font=("Segoe UI", 8, "bold"),
+                                              tags="drag"),
+                "target": None,
+                "ok":     False,
+            }
+            self.cv.config(cursor="fleur")
+        self._update_drag(self.cv.canvasx(e.x), self.cv.canvasy(e.y),
+                          self.SNAP_FINE if e.state & 0x0001 else self.SNAP_MIN)
+
+    def _pointer_minute(self, y):
+        """Time of day under canvas y, interpolated inside its session / rest row."""
+        if not self._spans:
+            return 0
+        if y <= self._spans[0][0]:
+            return self._spans[0][2]
+        i = bisect.bisect_right(self._spans, y, key=lambda sp: sp[0]) - 1
+        y1, y2, m1, m2 = self._spans[i]
+        return m1 + min(max((y - y1) / (y2 - y1), 0.0), 1.0) * (m2 - m1)
+
+    def drop_target(self, x, y, snap):
+        """(col, start min, end min) the dragged bar would land on at canvas (x, y)."""
+        col   = min(max(bisect.bisect_right(self._col_x, x) - 1, 0), 6)
+        dur   = self._drag["dur"]
+        start = round(self._pointer_minute(y) / snap) * snap
+        start = min(max(start, 0), 24 * 60 - dur)
+        return col, start, start + dur
+
+    def check_drop(self, col, start, end):
+        """(ok, date_key, feedback line, colours) for dropping the dragged task here."""
+        task = self._drag["task"]
+        week_dates = self._last[0]
+        weekly   = task.get("type") == "weekly"
+        date_key = f"W{col + 1}" if weekly else week_dates[col]
+        s, e     = _HHMM[start], _HHMM[end]
+        for rs, re_ in REST_PERIODS:
+            if times_overlap(s, e, rs, re_):
+                return False, date_key, f"Rest {rs}–{re_}", self.DROP_REST
+        clash = self.app.slots.conflict(date_key, s, e, task["type"], exclude=task)
+        if clash is None:
+            hit = self.app.overlay.conflict(date_key, s, e, task["type"])
+            clash = hit[1] if hit else None
+        if clash is not None:
+            return (False, date_key, f"Conflicts: {truncate(clash['heading'], 18)}",
+                    self.DROP_BAD)
+        return True, date_key, "Drop to move", self.DROP_OK
+
+    def _update_drag(self, x, y, snap):
+        drag   = self._drag
+        target = self.drop_target(x, y, snap)
+        if target != drag["target"]:          # same slot as last motion → nothing to re-check
+            drag["target"] = target
+            drag["ok"], drag["date"], note, (fill, outline) = self.check_drop(*target)
+            col, start, end = target
+            drag["note"] = (f"{WDAY_SHORT[col]} {_HHMM[start]}–{_HHMM[end]}\n{note}",
+                            fill, outline)
+        text, fill, outline = drag["note"]
+        col = drag["target"][0]
+        x1  = self._col_x[col] + self.CELL_PAD + self.BAR_PADX
+        x2  = self._col_x[col] + self._col_w - self.CELL_PAD - self.BAR_PADX
+        self.cv.coords(drag["ghost"], x1, y - 4, x2, y - 4 + self.BAR_H)
+        self.cv.itemconfig(drag["ghost"], fill=fill, outline=outline)
+        self.cv.coords(drag["label"], x1 + 6, y)
+        self.cv.itemconfig(drag["label"], text=text, fill=outline)
+        self.cv.tag_raise("drag")
+
+    def _drop(self, drag):
+        if not drag["ok"]:
+            self.cv.bell()
+            return
+        task = drag["task"]
+        _col, start, end = drag["target"]
+        moved = dict(task, date=drag["date"], start=_HHMM[start], end=_HHMM[end])
+        if moved != task and not self.app.repo.update(task, moved):
+            messagebox.showerror("Task Changed", STALE_TASK_MSG, parent=self.app.root)
+
+
+# ════════════════════════════════════════════════════════════════
+# DIAGNOSTICS
+# ════════════════════════════════════════════════════════════════
+
+DIAG_FILE = "diagnostics.jsonl"
+
+
+def _section_map(path):
+    """Sorted [(line, 'file: SECTION')] from the ═══ banner comments of a source file."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    out  = [(0, f"{stem}: (top)")]
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return out
+    for i in range(1, len(lines) - 1):
+        if lines[i - 1].startswith("# ═") and lines[i + 1].startswith("# ═"):
+            out.append((i + 1, f"{stem}: {lines[i][2:].strip()}"))
+    return out
+
+
+def count_widgets(root):
+    """Live Tk widgets under root, by widget class."""
+    counts = collections.Counter()
+    stack  = [root]
+    while stack:
+        w = stack.pop()
+        counts[w.winfo_class()] += 1
+        stack.extend(w.winfo_children())
+    return counts
+
+
+def task_model_bytes(tasks):
+    """Approximate bytes held by the task list: list + dicts + distinct values."""
+    total = sys.getsizeof(tasks)
+    seen  = set()
+    for t in tasks:
+        total += sys.getsizeof(t)
+        for v in t.values():
+            if id(v) not in seen:
+                seen.add(id(v))
+                total += sys.getsizeof(v)
+    return total
+
+
+class Diagnostics:
+    """
+    Opt-in memory diagnostics:  python main.py --diagnostics  (or TM_DIAGNOSTICS=1)
+    - tracemalloc snapshot, grouped by subsystem (the ═══ section of the newest
+      app frame that allocated), with the delta since the previous report
+    - live Tk widget counts per class
+    - bytes-per-task for the task dicts and for the search index
+    Reports go to stderr and, one JSON object per line, to DIAG_FILE so runs can
+    be compared. Every INTERVAL_MS, and on demand with Ctrl+Shift+D.
+    Only the snapshot and widget walk run on the Tk thread; grouping hundreds of
+    thousands of traces takes seconds and is done on a worker.
+    """
+
+    INTERVAL_MS = 60_000
+    DEPTH       = 16
+
+    def __init__(self, parent_app, path=DIAG_FILE):
+        self.app  = parent_app
+        self.path = path
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.DEPTH)
+
+        # Map our own source files → section banners, so traces can be attributed
+        self._sections = {}
+        for mod in (sys.modules[__name__], sys.modules.get("reminder")):
+            f = getattr(mod, "__file__", None)
+            if f:
+                self._sections[os.path.abspath(f)] = _section_map(f)
+        self._prev_subsys  = {}
+        self._prev_widgets = collections.Counter()
+        self._worker       = None
+
+        self.app.root.bind_all("<Control-D>", lambda _e: self.report("manual"))
+        self.app.root.after(self.INTERVAL_MS, self._periodic)
+
+    def _periodic(self):
+        self.report("periodic")
+        self.app.root.after(self.INTERVAL_MS, self._periodic)
+
+    def _subsystem(self, traceback):
+        for frame in reversed(traceback):          # newest frame first
+            sections = self._sections.get(os.path.abspath(frame.filename))
+            if sections:
+                i = bisect.bisect_right(sections, frame.lineno, key=lambda s: s[0]) - 1
+                return sections[i][1]
+        return "other"
+
+    def by_subsystem(self, snapshot):
+        totals = collections.Counter()
+        for stat in snapshot.statistics("traceback"):
+            totals[self._subsystem(stat.traceback)] += stat.size
+        return totals
+
+    def report(self, reason="manual"):
+        """Capture now, finish on a worker thread (returned; None if one is still busy)."""
+        if self._worker is not None and self._worker.is_alive():
+            return None
+        snap    = tracemalloc.take_snapshot()
+        widgets = count_widgets(self.app.root)
+        tasks   = list(self.app.tasks)              # stable copy for the worker
+        index   = self.app.search.approx_bytes()
+        self._worker = threading.Thread(
+            target=self.build_report, args=(reason, snap, widgets, tasks, index), daemon=True)
+        self._worker.start()
+        return self._worker
+
+    def build_report(self, reason, snap, widgets, tasks, index):
+        subsys  = self.by_subsystem(snap)
+        n_tasks = len(tasks)
+        model   = task_model_bytes(tasks)
+
+        rec = {
+            "time":          datetime.datetime.now().isoformat(timespec="seconds"),
+            "reason":        reason,
+            "traced_bytes":  sum(subsys.values()),
+            "subsystems":    dict(subsys.most_common()),
+            "subsys_delta":  {k: subsys[k] - self._prev_subsys.get(k, 0)
+                              for k in set(subsys) | set(self._prev_subsys)
+                              if subsys[k] != self._prev_subsys.get(k, 0)},
+            "widgets":       sum(widgets.values()),
+            "widget_delta":  dict(widgets - self._prev_widgets),
+            "widget_counts": dict(widgets.most_common()),
+            "tasks":         n_tasks,
+            "model_bytes":   model,
+            "index_bytes":   index,
+            "bytes_per_task": round((model + index) / n_tasks, 1) if n_tasks else None,
+        }
+        self._prev_subsys  = dict(subsys)
+        self._prev_widgets = widgets
+
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+        top = ", ".join(f"{k} {v / 1024:+.0f}K" for k, v in
+                        sorted(rec["subsys_delta"].items(), key=lambda kv: -abs(kv[1]))[:4])
+        print(f"[diag {rec['time']}] traced {rec['traced_bytes'] / 1024:.0f}K, "
+              f"widgets {rec['widgets']}, {n_tasks} tasks @ {rec['bytes_per_task']} B/task"
+              f"{' | ' + top if top else ''}", file=sys.stderr, flush=True)
+        return rec
+
+
 # ════════════════════════════════════════════════════════════════
 # MAIN APPLICATION
 # ════════════════════════════════════════════════════════════════
 
 class TimeManagerApp:
 
-    SESSIONS = [
-        ("Morning",   "06:00", "12:00"),
-        ("Afternoon", "13:00", "17:00"),
-        ("Evening",   "18:00", "23:00"),
-    ]
+    SESSIONS = SESSIONS
 
     def __init__(self):
         self.root = tk.Tk()
@@ -1173,13 +2852,44 @@ class TimeManagerApp:
         self.root.geometry("1260x800")
         self.root.minsize(960, 600)
 
-        self.tasks = load_tasks()
-
+        # Filled in chunks by TaskLoader; edits are refused until loading is done
+        # so a save can never overwrite data.txt with a partial list. If the
+        # load failed (load_error) the window stays read-only for good.
+        # All later edits go through self.repo (see _subscribe).
+        self.tasks    = []
+        self.repo     = TaskRepository(self.tasks)
+        self.search   = TaskSearchIndex()
+        self.day_load = DayLoadTable()
+        self.slots    = ConflictIndex()
+        self.loading  = True
+        self.load_error = None
+
+        self.reminders   = None
+        self._reminder_q = queue.Queue()
+
+        # Other instances may save the same data.txt (see SharedTaskFile)
+        self.store = SharedTaskFile()
+        self._pull = None          # StorePull in flight
+
+        # Read-only calendars drawn over the week (CALENDAR_SOURCES)
+        self.overlay = CalendarOverlay()
+
+        self.redraw = RedrawScheduler(self.root, covers={"week": ("scroll",)})
         self._build_ui()
+        self.redraw.register("week",     self._draw_calendar)
+        self.redraw.register("scroll",   self._apply_scroll)
+        self.redraw.register("overview", self._refresh_overview)
+        self.redraw.register("next",     self._draw_next_task)
+        self._next_shown = None
+        self._subscribe()
         self._tick_clock()
         self.refresh_calendar()
         self.refresh_next_task()
 
+        self._loader = TaskLoader()
+        self._loader.start()
+        self.root.after(1, self._drain_loader)
+
         # Create floating button after window is drawn
         self.root.after(400, lambda: setattr(self, "_fab", FloatingButton(self)))
 
@@ -1211,6 +2921,16 @@ class TimeManagerApp:
                       padx=20, pady=8
                       ).pack(side="right", padx=20, pady=14)
 
+        # Search box (right, next to Add note)
+        self._search_var   = tk.StringVar()
+        self._search_entry = styled_entry(topbar, textvariable=self._search_var, width=24)
+        self._search_entry.pack(side="right", pady=20, ipady=4)
+        add_placeholder(self._search_entry, self._search_var, SEARCH_PLACEHOLDER)
+        self._search_entry.bind("<KeyRelease>", self._on_search_key)
+        self._search_entry.bind("<Escape>", lambda _e: self._hide_search())
+        self._search_job = None
+        self._search_pop = None
+
         # Next-task bar (center)
         next_bar = tk.Frame(topbar, bg=C_WHITE,
                             highlightbackground=C_BORDER, highlightthickness=1)
@@ -1259,36 +2979,253 @@ class TimeManagerApp:
         self._canvas.bind("<Configure>", self._on_canvas_cfg)
         self._canvas.bind_all("<MouseWheel>", self._on_scroll)
 
+        # Canvas renderer draws straight onto the scroll canvas; the frame
+        # window is only used by the legacy widget renderer.
+        self._week_view = None
+        if WEEK_RENDERER == "canvas":
+            self._week_view = WeekCanvasRenderer(self, self._canvas)
+            self._canvas.itemconfig(self._canvas_win, state="hidden")
+
     def _on_frame_cfg(self, _e):
-        self._canvas.configure(scrollregion=self._canvas.bbox("all"))
+        self.redraw.mark("scroll")
 
-    def _on_canvas_cfg(self, e):
-        self._canvas.itemconfig(self._canvas_win, width=e.width)
+    def _on_canvas_cfg(self, _e):
+        self.redraw.mark("scroll")
+
+    def _apply_scroll(self):
+        if self._week_view is not None:
+            self._week_view.redraw()
+        else:
+            self._canvas.itemconfig(self._canvas_win, width=self._canvas.winfo_width())
+            self._canvas.configure(scrollregion=self._canvas.bbox("all"))
 
     def _on_scroll(self, e):
         self._canvas.yview_scroll(int(-1 * (e.delta // 120)), "units")
 
+    # ════════════════════════════════════════════════════════════
+    # BACKGROUND LOADING
+    # ════════════════════════════════════════════════════════════
+
+    def _drain_loader(self):
+        """Move parsed chunks into self.tasks, ~15 ms of work per tick."""
+        week     = set(get_week_dates())
+        deadline = time.perf_counter() + 0.015
+        touched  = False       # did anything visible this week arrive?
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload = self._loader.queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "chunk":
+                self.tasks.extend(payload)
+                touched = touched or any(
+                    t.get("type") == "weekly" or t["date"] in week for t in payload)
+            elif kind == "index":
+                self.search = payload
+            elif kind == "loads":
+                self.day_load = payload
+            elif kind == "slots":
+                self.slots = payload
+            elif kind == "error":
+                self.load_error = payload
+                messagebox.showerror("Load Error", f"Could not read {DATA_FILE}:\n{payload}\n\n"
+                                     "Tasks are shown read-only; nothing will be saved.")
+            elif kind == "done":
+                self.loading = False
+                if self.load_error is not None:
+                    self.refresh_calendar()
+                    self.refresh_next_task()
+                    return
+                self.store.adopt(self.tasks, self._loader.snapshot)
+                self.root.after(STORE_WATCH_MS, self._watch_store)
+                self._start_reminders()
+                self.refresh_calendar()
+                self.refresh_next_task()
+                return
+        if touched:
+            self.refresh_calendar()
+            self.refresh_next_task()
+        self.root.after(30, self._drain_loader)
+
     # ════════════════════════════════════════════════════════════
     # CLOCK
     # ════════════════════════════════════════════════════════════
 
     def _tick_clock(self):
         self._clock_var.set(datetime.datetime.now().strftime("%H:%M:%S"))
+        while not self._reminder_q.empty():
+            self._show_reminder(self._reminder_q.get_nowait())
         self.root.after(1000, self._tick_clock)
 
+    # ════════════════════════════════════════════════════════════
+    # REMINDERS
+    # ════════════════════════════════════════════════════════════
+
+    def _start_reminders(self):
+        if REMINDER_LEAD_MIN is None or self.reminders is not None:
+            return
+        # Hook runs on the service thread → hand over to Tk via the queue
+        self.reminders = ReminderService(load_tasks, DATA_FILE,
+                                         [self._reminder_q.put], REMINDER_LEAD_MIN)
+        self.reminders.start()
+
+    def refuse_edit(self, parent):
+        """True (after telling the user why) while tasks may not be changed."""
+        if self.load_error is not None:
+            messagebox.showinfo("Read-only", f"{DATA_FILE} could not be loaded, so changes "
+                                "are disabled to keep it intact.", parent=parent)
+        elif self.loading:
+            messagebox.showinfo("Loading", "Tasks are still loading, please try again in a moment.",
+                                parent=parent)
+        else:
+            return False
+        return True
+
+    def tasks_saved(self):
+        """Called after every save from the UI."""
+        if self.reminders is not None:
+            self.reminders.notify_changed()
+
+    # ════════════════════════════════════════════════════════════
+    # TASK CHANGES
+    # ════════════════════════════════════════════════════════════
+
+    def _subscribe(self):
+        # Persistence last: a save that merges publishes a "store" batch,
+        # which should reach the others after this one
+        self.repo.subscribe(self._index_changes)
+        self.repo.subscribe(self._view_changes)
+        self.repo.subscribe(self._next_changes)
+        self.repo.subscribe(self._persist_changes)
+
+    def _index_changes(self, changes, _origin):
+        for index in (self.search, self.day_load, self.slots):
+            apply_changes(index, changes)
+
+    def _view_changes(self, changes, _origin):
+        """Mark the week grid / today overview only if a change shows up there."""
+        week    = set(get_week_dates())
+        today   = datetime.date.today()
+        regions = set()
+        for c in changes:
+            for t in (c.old, c.new):
+                if t is None:
+                    continue
+                if t.get("type") == "weekly" or t["date"] in week:
+                    regions.add("week")
+                if occurs_on(t, today):
+                    regions.add("overview")
+        if regions:
+            self.redraw.mark(*regions)
+
+    def _next_changes(self, changes, _origin):
+        """Re-pick the next task only if the shown one changed or something comes before it."""
+        week  = get_week_dates()
+        now   = datetime.datetime.now()
+        shown = self._next_shown
+        key   = upcoming_key(shown, week, now) if shown is not None else None
+        for c in changes:
+            if shown is not None and c.old is shown:
+                break
+            if c.new is not None:
+                new_key = upcoming_key(c.new, week, now)
+                if new_key is not None and (key is None or new_key < key):
+                    break
+        else:
+            return
+        self.redraw.mark("next")
+
+    def _persist_changes(self, _changes, origin):
+        if origin == "local" and self.load_error is None:
+            self.save()
+        self.tasks_saved()
+
+    # ════════════════════════════════════════════════════════════
+    # SHARED STORE
+    # ════════════════════════════════════════════════════════════
+
+    def save(self):
+        """Persist self.tasks, merging in whatever other instances saved meanwhile."""
+        try:
+            merged, conflicts = self.store.commit(self.tasks)
+        except (OSError, TimeoutError) as exc:
+            messagebox.showerror("Save Error", f"Could not save {DATA_FILE}:\n{exc}")
+            return
+        self.repo.replace_all(merged)
+        self._report_conflicts(conflicts)
+
+    def _watch_store(self):
+        """Pick up saves made by other instances (one stat per tick) and source edits."""
+        if self.overlay.refresh():
+            self.refresh_calendar()
+        if self._pull is None and self.store.changed_on_disk():
+            self._pull = StorePull(self.store, self.tasks, self.repo.version)
+            self._pull.start()
+            self.root.after(30, self._finish_pull)
+        self.root.after(STORE_WATCH_MS, self._watch_store)
+
+    def _finish_pull(self):
+        """Apply a finished StorePull, unless tasks were edited or saved meanwhile
+        (the save merged disk in already; otherwise the next tick pulls again)."""
+        pull = self._pull
+        if pull.is_alive():
+            self.root.after(30, self._finish_pull)
+            return
+        self._pull = None
+        if (pull.result is None or pull.version != self.repo.version
+                or pull.base is not self.store.base):
+            return
+        merged, conflicts = self.store.accept(pull.result)
+        self.repo.replace_all(merged)
+        self._report_conflicts(conflicts)
+
+    def _report_conflicts(self, conflicts):
+        if conflicts:
+            lines = "\n".join(
+                f"• {truncate(a['heading'], 28)} ({a['date']} {a['start']}–{a['end']})"
+                f"  ↔  {truncate(b['heading'], 28)} ({b['date']} {b['start']}–{b['end']})"
+                for a, b in conflicts[:8])
+            messagebox.showwarning(
+                "Merged Changes",
+                "data.txt was changed by another window; both sets of changes were kept, "
+                f"but these now overlap:\n\n{lines}")
+
+    def _show_reminder(self, fields):
+        """Small toast in the bottom-right corner of the screen, auto-closing."""
+        toast = tk.Toplevel(self.root)
+        toast.overrideredirect(True)
+        toast.attributes("-topmost", True)
+        toast.configure(bg=C_ACCENT_DK)
+        body = tk.Frame(toast, bg=C_WHITE)
+        body.pack(padx=2, pady=2)
+        tk.Label(body, text=f"⏰  Starts in {fields['lead']} min  ·  {fields['start']}–{fields['end']}",
+                 bg=C_WHITE, fg=C_ACCENT_DK, font=("Segoe UI", 9, "bold"),
+                 padx=12, pady=6).pack(anchor="w")
+        tk.Label(body, text=truncate(fields["heading"], 40),
+                 bg=C_WHITE, fg=C_TEXT, font=("Segoe UI", 10),
+                 padx=12).pack(anchor="w", pady=(0, 8))
+        toast.update_idletasks()
+        x = toast.winfo_screenwidth()  - toast.winfo_width()  - 24
+        y = toast.winfo_screenheight() - toast.winfo_height() - 64
+        toast.geometry(f"+{x}+{y}")
+        toast.bind("<Button-1>", lambda _e: toast.destroy())
+        toast.after(15000, toast.destroy)
+
     # ════════════════════════════════════════════════════════════
     # NEXT TASK & TODAY OVERVIEW
     # ════════════════════════════════════════════════════════════
 
     def refresh_next_task(self):
-        nt = get_next_task(self.tasks)
+        self.redraw.mark("next", "overview")
+
+    def _draw_next_task(self):
+        nt = self._next_shown = get_next_task(self.tasks)
         if nt:
             self._next_time_var.set(f"  {nt['start']}–{nt['end']}  ")
             self._next_heading_var.set(nt["heading"])
         else:
             self._next_time_var.set("")
-            self._next_heading_var.set("No upcoming task")
-        self._refresh_overview()
+            self._next_heading_var.set("Loading tasks…" if self.loading else "No upcoming task")
 
     def _refresh_overview(self):
         for w in self._overview_inner.winfo_children():
@@ -1316,14 +3253,79 @@ class TimeManagerApp:
             tk.Label(inner, text=truncate(t["heading"], 24),
                      bg=b_bg, fg=C_TEXT, font=("Segoe UI", 9)).pack(anchor="w")
 
+    # ════════════════════════════════════════════════════════════
+    # SEARCH
+    # ════════════════════════════════════════════════════════════
+
+    def _on_search_key(self, e):
+        if e.keysym == "Escape":
+            return
+        # Debounce: one query per typing pause, not per keystroke
+        if self._search_job:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(120, self._run_search)
+
+    def _run_search(self):
+        self._search_job = None
+        query = self._search_var.get().strip()
+        hits  = self.search.search(query, limit=12) if query != SEARCH_PLACEHOLDER else []
+        if not hits:
+            self._hide_search()
+            return
+
+        if self._search_pop is None:
+            self._search_pop = tk.Toplevel(self.root)
+            self._search_pop.overrideredirect(True)
+            self._search_list = tk.Listbox(
+                self._search_pop, font=("Segoe UI", 9), bg=C_WHITE, fg=C_TEXT,
+                selectbackground=C_ACCENT_LT, selectforeground=C_ACCENT_DK,
+                relief="flat", highlightbackground=C_BORDER, highlightthickness=1,
+                activestyle="none", width=48)
+            self._search_list.pack(fill="both", expand=True)
+            self._search_list.bind("<ButtonRelease-1>", self._open_search_hit)
+            self._search_list.bind("<Return>", self._open_search_hit)
+
+        self._search_hits = hits
+        self._search_list.delete(0, "end")
+        for t in hits:
+            if t.get("type") == "weekly":
+                try:
+                    when = f"Every {WDAY_SHORT[int(t['date'][1:]) - 1]}"
+                except (ValueError, IndexError):
+                    when = t["date"]
+            else:
+                when = t["date"]
+            self._search_list.insert(
+                "end", f"  {when:<11} {t['start']}–{t['end']}   {truncate(t['heading'], 28)}")
+        self._search_list.config(height=len(hits))
+
+        x = self._search_entry.winfo_rootx()
+        y = self._search_entry.winfo_rooty() + self._search_entry.winfo_height() + 2
+        self._search_pop.geometry(f"+{x - 200}+{y}")
+        self._search_pop.lift()
+
+    def _open_search_hit(self, _e):
+        sel = self._search_list.curselection()
+        if not sel:
+            return
+        task = self._search_hits[sel[0]]
+        self._hide_search()
+        if any(t is task for t in self.tasks):
+            TaskDetailWindow(self, task)
+
+    def _hide_search(self):
+        if self._search_pop is not None:
+            self._search_pop.destroy()
+            self._search_pop = None
+
     # ════════════════════════════════════════════════════════════
     # CALENDAR RENDERING
     # ════════════════════════════════════════════════════════════
 
     def refresh_calendar(self):
-        for w in self._cal_frame.winfo_children():
-            w.destroy()
+        self.redraw.mark("week", "overview")
 
+    def _draw_calendar(self):
         week_dates  = get_week_dates()
         today       = datetime.date.today().isoformat()
         resolved    = resolve_tasks_for_week(self.tasks, week_dates)
@@ -1335,6 +3337,15 @@ class TimeManagerApp:
                 by_date[d].append(t)
         for d in by_date:
             by_date[d].sort(key=lambda x: time_to_min(x["start"]))
+        self.overlay.refresh()
+        by_date = self.overlay.merge_week(week_dates, by_date)
+
+        if self._week_view is not None:
+            self._week_view.draw(week_dates, today, by_date)
+            return
+
+        for w in self._cal_frame.winfo_children():
+            w.destroy()
 
         # Column weights
         self._cal_frame.columnconfigure(0, weight=0, minsize=82)
@@ -1408,22 +3419,16 @@ class TimeManagerApp:
                     tk.Label(rf, bg=C_REST, height=1).pack()
                 grid_row += 1
 
-        self._refresh_overview()
-
     def _render_bar(self, parent, task, cell_bg):
         """Render a colored task bar inside a calendar cell."""
-        idx      = self.tasks.index(task)
-        is_w     = task.get("type") == "weekly"
-        bar_bg   = C_WKLY_BG if is_w else C_ONCE_BG
-        bar_bd   = C_WKLY_BD if is_w else C_ONCE_BD
-        bar_fg   = C_WKLY_FG if is_w else C_ONCE_FG
-        hover_bg = "#BFDBFE" if is_w else "#FED7AA"
+        editable = not task.get("source")           # overlay tasks are read-only
+        bar_bg, bar_bd, bar_fg, hover_bg = bar_colors(task)
 
         label_text = f"{task['start']}–{task['end']}\n{truncate(task['heading'], 15)}"
 
         bar = tk.Frame(parent, bg=bar_bg,
                        highlightbackground=bar_bd, highlightthickness=1,
-                       cursor="hand2")
+                       cursor="hand2" if editable else "")
         bar.pack(fill="x", padx=5, pady=4)
 
         accent = tk.Frame(bar, bg=bar_fg, width=4)
@@ -1434,8 +3439,8 @@ class TimeManagerApp:
                        padx=5, pady=4, justify="left")
         lbl.pack(fill="x", side="left")
 
-        def on_click(_e, t=task, i=idx):
-            TaskDetailWindow(self, t, i)
+        def on_click(_e, t=task):
+            TaskDetailWindow(self, t)
 
         def on_enter(_e, b=bar, l=lbl, a=accent):
             b.config(bg=hover_bg); l.config(bg=hover_bg)
@@ -1444,7 +3449,8 @@ class TimeManagerApp:
             b.config(bg=ob); l.config(bg=ob)
 
         for w in (bar, lbl, accent):
-            w.bind("<Button-1>", on_click)
+            if editable:
+                w.bind("<Button-1>", on_click)
         bar.bind("<Enter>", on_enter);    lbl.bind("<Enter>", on_enter)
         bar.bind("<Leave>", on_leave);    lbl.bind("<Leave>", on_leave)
 
@@ -1468,5 +3474,10 @@ class TimeManagerApp:
 # ════════════════════════════════════════════════════════════════
 
 if __name__ == "__main__":
+    diagnostics = "--diagnostics" in sys.argv[1:] or bool(os.environ.get("TM_DIAGNOSTICS"))
+    if diagnostics:
+        tracemalloc.start(Diagnostics.DEPTH)     # before loading, so startup is traced too
     app = TimeManagerApp()
+    if diagnostics:
+        app.diagnostics = Diagnostics(app)
     app.run()
\ No newline at end of file
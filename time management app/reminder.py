@@ -0,0 +1,237 @@
+"""
+Reminder service for the Time Manager.
+Fires hooks N minutes before each upcoming one-time / weekly task starts.
+
+  python reminder.py [--lead 10] [--hook stdout] [--hook "cmd:notify-send {heading}"]
+                     [--hook udp:127.0.0.1:9999]
+
+- Upcoming occurrences sit in a heap ordered by fire time; the worker sleeps
+  until the earliest one instead of ticking every second. An occurrence
+  further off than HORIZON_DAYS is queued as a re-check for when it comes
+  within the horizon, so long-running daemons still fire it
+- data.txt is re-stat'ed every WATCH_INTERVAL seconds (or immediately on
+  notify_changed()); a reload only schedules added tasks and cancels removed
+  ones, so unchanged reminders are neither lost nor fired twice
+- Tk-free: the desktop app embeds it with its own hook, the CLI runs it alone
+- Loading and hooks run outside the lock, so notify_changed() never waits
+  on them; a failing load or hook is logged and the service keeps going
+"""
+
+import argparse
+import datetime
+import heapq
+import json
+import os
+import shlex
+import socket
+import subprocess
+import threading
+
+WATCH_INTERVAL = 5.0          # seconds between data.txt stat checks
+HORIZON_DAYS   = 8            # further occurrences are only queued as a re-check
+
+
+def _task_key(t):
+    return (t["date"], t["start"], t["end"], t["heading"], t.get("type", "once"))
+
+
+def next_occurrence(t, after: datetime.datetime):
+    """Start datetime of t's next occurrence strictly after `after`, or None."""
+    try:
+        h, m = map(int, t["start"].split(":"))
+        at   = datetime.time(h, m)
+        if t.get("type") == "weekly":
+            wday  = int(t["date"][1:]) - 1          # 0=Mon
+            ahead = (wday - after.weekday()) % 7
+            start = datetime.datetime.combine(after.date() + datetime.timedelta(days=ahead), at)
+            if start <= after:
+                start += datetime.timedelta(days=7)
+            return start
+        start = datetime.datetime.combine(datetime.date.fromisoformat(t["date"]), at)
+    except (ValueError, IndexError):
+        return None
+    return start if start > after else None
+
+
+# ════════════════════════════════════════════════════════════════
+# HOOKS
+# ════════════════════════════════════════════════════════════════
+
+def reminder_fields(t, start, lead_min):
+    return {
+        "heading": t["heading"], "content": t["content"], "type": t.get("type", "once"),
+        "start":   t["start"],   "end":     t["end"],
+        "date":    start.date().isoformat(), "lead": lead_min,
+    }
+
+
+def stdout_hook(fields):
+    print(f"⏰ {fields['date']} {fields['start']}–{fields['end']}  {fields['heading']}"
+          f"  (in {fields['lead']} min)", flush=True)
+
+
+def command_hook(template):
+    """Run a command; {heading}, {start}, … are filled per argument (no shell)."""
+    argv = shlex.split(template)
+
+    def hook(fields):
+        try:
+            subprocess.Popen([a.format(**fields) for a in argv])
+        except (OSError, KeyError, ValueError) as exc:
+            print(f"reminder: command hook failed: {exc}", flush=True)
+    return hook
+
+
+def udp_hook(host, port):
+    """Send each reminder as one JSON datagram; never blocks on a listener."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def hook(fields):
+        try:
+            sock.sendto(json.dumps(fields, ensure_ascii=False).encode("utf-8"), (host, port))
+        except OSError:
+            pass
+    return hook
+
+
+def make_hook(spec):
+    """'stdout' | 'cmd:<command>' | 'udp:<host>:<port>' → callable(fields)."""
+    if spec == "stdout":
+        return stdout_hook
+    if spec.startswith("cmd:"):
+        return command_hook(spec[4:])
+    if spec.startswith("udp:"):
+        host, _, port = spec[4:].rpartition(":")
+        return udp_hook(host or "127.0.0.1", int(port))
+    raise ValueError(f"unknown hook: {spec}")
+
+
+# ════════════════════════════════════════════════════════════════
+# SERVICE
+# ════════════════════════════════════════════════════════════════
+
+class ReminderService(threading.Thread):
+    """
+    Background reminder thread.
+    load:  callable returning the task list (main.load_tasks)
+    path:  file to watch for changes (main.DATA_FILE)
+    hooks: callables receiving a fields dict; called on this thread
+    """
+
+    def __init__(self, load, path, hooks, lead_min=10):
+        super().__init__(daemon=True)
+        self.load     = load
+        self.path     = path
+        self.hooks    = list(hooks)
+        self.lead     = datetime.timedelta(minutes=lead_min)
+        self.lead_min = lead_min
+
+        self._cond    = threading.Condition()
+        self._halt    = False
+        self._changed = True
+        self._stat    = None
+        self._heap    = []         # (fire_at, seq, key, gen, start); start None = re-check
+        self._live    = {}         # key → task, for tasks currently in data.txt
+        self._gen     = {}         # key → generation; bumped each time key is (re)added
+        self._seq     = 0
+
+    # ── Control (any thread) ──────────────────────────────────
+
+    def notify_changed(self):
+        """Ask for a reload now instead of at the next stat check."""
+        with self._cond:
+            self._changed = True
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._halt = True
+            self._cond.notify()
+
+    # ── Scheduling ────────────────────────────────────────────
+
+    def _push(self, key, now):
+        start = next_occurrence(self._live[key], now)
+        if start is None:
+            return
+        self._seq += 1
+        horizon = datetime.timedelta(days=HORIZON_DAYS)
+        if start - now > horizon:
+            heapq.heappush(self._heap, (start - horizon, self._seq, key, self._gen[key], None))
+            return
+        heapq.heappush(self._heap,
+                       (max(start - self.lead, now), self._seq, key, self._gen[key], start))
+
+    def _reload(self, now, changed):
+        try:
+            st   = os.stat(self.path)
+            stat = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stat = None
+        if stat == self._stat and not changed:
+            return
+        self._stat = stat           # a file that fails to load is retried once it changes
+        fresh = {_task_key(t): t for t in self.load()}
+        added = fresh.keys() - self._live.keys()
+        self._live = fresh
+        # Removed keys stay in the heap and are skipped when they come up;
+        # a re-added key gets a new generation so its old entry is skipped too
+        for key in added:
+            self._gen[key] = self._gen.get(key, 0) + 1
+            self._push(key, now)
+
+    def _fire_due(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            _fire_at, _seq, key, gen, start = heapq.heappop(self._heap)
+            t = self._live.get(key)
+            if t is None or gen != self._gen[key]:
+                continue                        # deleted (or re-added since)
+            if start is None:
+                self._push(key, now)            # now within the horizon
+                continue
+            fields = reminder_fields(t, start, round((start - now).total_seconds() / 60))
+            for hook in self.hooks:
+                try:
+                    hook(fields)
+                except Exception as exc:
+                    print(f"reminder: hook failed: {exc!r}", flush=True)
+            self._push(key, start)              # weekly → next week
+
+    def run(self):
+        # The heap and _live belong to this thread; the lock only guards the flags
+        while True:
+            with self._cond:
+                if self._halt:
+                    return
+                changed, self._changed = self._changed, False
+            now = datetime.datetime.now()
+            try:
+                self._reload(now, changed)
+                self._fire_due(now)
+            except Exception as exc:            # e.g. data.txt not valid UTF-8
+                print(f"reminder: {exc!r}", flush=True)
+            timeout = WATCH_INTERVAL
+            if self._heap:
+                timeout = min(timeout, (self._heap[0][0] - now).total_seconds())
+            with self._cond:
+                if not (self._halt or self._changed):
+                    self._cond.wait(max(timeout, 0.05))
+
+
+if __name__ == "__main__":
+    from main import DATA_FILE, load_tasks
+
+    parser = argparse.ArgumentParser(description="Fire reminders before Time Manager tasks start.")
+    parser.add_argument("--lead", type=int, default=10, help="minutes before start (default 10)")
+    parser.add_argument("--hook", action="append", default=[],
+                        help="stdout | cmd:<command with {heading} …> | udp:<host>:<port>")
+    args = parser.parse_args()
+
+    service = ReminderService(load_tasks, DATA_FILE,
+                              [make_hook(h) for h in args.hook or ["stdout"]], args.lead)
+    service.start()
+    try:
+        while service.is_alive():
+            service.join(1.0)
+    except KeyboardInterrupt:
+        service.stop()
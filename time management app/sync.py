@@ -0,0 +1,332 @@
+"""
+Delta sync for the Time Manager through a shared folder (USB stick, network
+share, Dropbox, …). Machines exchange change sets, never whole data.txt files.
+
+  python sync.py <folder> [--replica NAME] [--watch SECONDS]
+
+- Each machine (replica) appends its own changes to <folder>/<replica>.log
+  and reads the other logs from the byte offset it stopped at last time,
+  so a sync moves data proportional to the changes since the previous one
+- Local changes come from data.txt.journal, which SharedTaskFile appends to
+  on every save once the first sync has created it; if data.txt was edited
+  outside the app the journal no longer covers it and the file is diffed
+  in full instead
+- Tasks get stable ids; every change carries a Lamport clock and a deleted
+  task leaves a tombstone. Per id the highest (clock, replica) wins, so all
+  replicas converge on the same data whatever order logs are read in
+- Slots that now overlap (check_conflict) are reported, not dropped
+- Local bookkeeping (ids, clock, read offsets) lives in data.txt.sync
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import os
+import re
+import socket
+import sqlite3
+import time
+
+from main import (
+    DATA_FILE, JOURNAL_FILE, LOCK_FILE,
+    FileLock, SharedTaskFile,
+    load_tasks, merge_conflicts, parse_task_line, store_snapshot, task_line,
+)
+
+STATE_FILE = DATA_FILE + ".sync"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta    (key  TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS peers   (name TEXT PRIMARY KEY, offset INTEGER);
+CREATE TABLE IF NOT EXISTS records (id   TEXT PRIMARY KEY, clock INTEGER,
+                                    replica TEXT, line TEXT);   -- line NULL = tombstone
+CREATE INDEX IF NOT EXISTS records_line ON records (line);
+"""
+
+
+def default_replica():
+    return re.sub(r"[^\w.-]", "_", socket.gethostname()) or "replica"
+
+
+# ════════════════════════════════════════════════════════════════
+# LOCAL STATE
+# ════════════════════════════════════════════════════════════════
+
+class SyncState:
+    """
+    STATE_FILE (sqlite). Nothing is committed until save(), so an interrupted
+    sync leaves the previous state intact and is simply redone.
+    """
+
+    def __init__(self, path=STATE_FILE, replica=None):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+        # The name is fixed by the first sync; it is what peers know us by
+        self.replica = self.get("replica") or replica or default_replica()
+        self.clock   = int(self.get("clock") or 0)
+
+    def get(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, json.dumps(value)))
+
+    def save(self):
+        self.set("replica", self.replica)
+        self.set("clock", self.clock)
+        self.db.commit()
+
+    # ── Peers ─────────────────────────────────────────────────
+
+    def peer_offset(self, name):
+        row = self.db.execute("SELECT offset FROM peers WHERE name=?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def set_peer_offset(self, name, offset):
+        self.db.execute("INSERT OR REPLACE INTO peers VALUES (?, ?)", (name, offset))
+
+    # ── Records ───────────────────────────────────────────────
+
+    def alive_ids(self, line):
+        return [r[0] for r in self.db.execute(
+            "SELECT id FROM records WHERE line=? ORDER BY id", (line,))]
+
+    def alive_lines(self):
+        return collections.Counter(r[0] for r in self.db.execute(
+            "SELECT line FROM records WHERE line IS NOT NULL"))
+
+    def new_id(self, line):
+        """Content-derived id, so replicas importing the same line agree on it."""
+        h = hashlib.blake2b(line.encode("utf-8"), digest_size=8).hexdigest()
+        n = 0
+        while self.db.execute("SELECT 1 FROM records WHERE id=? AND line IS NOT NULL",
+                              (f"{h}-{n}",)).fetchone():
+            n += 1
+        return f"{h}-{n}"
+
+    def apply(self, op):
+        """
+        Last-writer-wins by (clock, replica); advances the Lamport clock.
+        Returns (old line, new line) if the visible line changed, else None.
+        """
+        self.clock = max(self.clock, op["clock"])
+        rec = self.db.execute("SELECT clock, replica, line FROM records WHERE id=?",
+                              (op["id"],)).fetchone()
+        if rec is not None and (rec[0], rec[1]) >= (op["clock"], op["replica"]):
+            return None
+        self.db.execute("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                        (op["id"], op["clock"], op["replica"], op["line"]))
+        old = rec[2] if rec else None
+        return None if old == op["line"] else (old, op["line"])
+
+
+# ════════════════════════════════════════════════════════════════
+# LOCAL CHANGES
+# ════════════════════════════════════════════════════════════════
+
+def local_changes(state):
+    """
+    [(deleted lines, added lines), …] saved locally since the last sync,
+    one group per save. Journal offset / covered stat are staged in state.
+    """
+    with FileLock(LOCK_FILE):
+        stat   = store_snapshot()[1]
+        offset = state.get("journal", 0)
+        try:
+            size = os.path.getsize(JOURNAL_FILE)
+        except OSError:
+            size = None
+        if size is not None and offset > size:
+            offset = 0                  # truncated by a sync that did not finish
+        if size is not None and 0 < offset == size:
+            open(JOURNAL_FILE, "w").close()    # everything in it already synced
+            size = offset = 0
+
+        entries = []
+        if size:
+            with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+                f.seek(offset)
+                entries = [json.loads(line) for line in f]
+        covered = entries[-1]["stat"] if entries else state.get("stat")
+
+        if size is None or covered is None or tuple(covered) != tuple(stat or ()):
+            # First sync, or data.txt written behind the journal's back
+            have   = collections.Counter(task_line(t)[:-1] for t in load_tasks())
+            known  = state.alive_lines()
+            groups = [(list((known - have).elements()), list((have - known).elements()))]
+            if size is None:
+                open(JOURNAL_FILE, "a").close()
+                size = 0
+        else:
+            groups = [(e["del"], e["add"]) for e in entries
+                      if not e["origin"].startswith("sync")]
+        state.set("journal", size)
+        state.set("stat", stat)
+    return groups
+
+
+def local_ops(state, groups):
+    """
+    Turn saved line diffs into ops (applied to state as they are made).
+    Within one save, the k-th deleted line and k-th added line are taken as
+    an edit of the same task (the app saves one edit at a time).
+    """
+    ops = []
+
+    def emit(rid, line):
+        state.clock += 1
+        op = {"id": rid, "clock": state.clock, "replica": state.replica, "line": line}
+        state.apply(op)
+        ops.append(op)
+
+    for dels, adds in groups:
+        del_ids = []
+        for line in dels:
+            ids = [i for i in state.alive_ids(line) if i not in del_ids]
+            if ids:
+                del_ids.append(ids[0])
+        for k, line in enumerate(adds):
+            emit(del_ids[k] if k < len(del_ids) else state.new_id(line), line)
+        for rid in del_ids[len(adds):]:
+            emit(rid, None)
+    return ops
+
+
+# ════════════════════════════════════════════════════════════════
+# EXCHANGE
+# ════════════════════════════════════════════════════════════════
+
+def append_log(folder, replica, ops):
+    if not ops:
+        return
+    with open(os.path.join(folder, replica + ".log"), "a", encoding="utf-8") as f:
+        f.writelines(json.dumps(op, ensure_ascii=False) + "\n" for op in ops)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_peers(state, folder):
+    """Yield the ops other replicas logged since we last read them."""
+    for name in sorted(os.listdir(folder)):
+        peer = name[:-4]
+        if not name.endswith(".log") or peer == state.replica:
+            continue
+        offset = state.peer_offset(peer)
+        with open(os.path.join(folder, name), "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1         # a peer may still be writing its last line
+        for raw in data[:end].splitlines():
+            if raw.strip():
+                yield json.loads(raw)
+        state.set_peer_offset(peer, offset + end)
+
+
+def apply_to_data(pending):
+    """Write a pending {batch, del, add} into data.txt. Returns overlap pairs."""
+    shared   = SharedTaskFile()
+    snapshot = store_snapshot()
+    tasks    = load_tasks()
+    shared.adopt(tasks, snapshot)
+
+    drop = collections.Counter(pending["del"])
+    keep = []
+    for t in tasks:
+        line = task_line(t)[:-1]
+        if drop[line] > 0:
+            drop[line] -= 1
+            continue
+        keep.append(t)
+    new = [t for t in map(parse_task_line, pending["add"]) if t is not None]
+    merged, _ = shared.commit(keep + new, origin=f"sync:{pending['batch']}")
+    return merge_conflicts(merged, new)
+
+
+def _already_applied(batch):
+    """Whether the journal has the save for this batch (crash after writing data.txt)."""
+    try:
+        with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+            return any(json.loads(line)["origin"] == f"sync:{batch}" for line in f)
+    except OSError:
+        return False
+
+
+def sync_folder(folder, state):
+    """
+    One sync round. Returns {"sent", "received", "conflicts"}.
+    Order: stage local ops → log them → read peers → commit state (with the
+    data.txt change as "pending") → apply to data.txt → clear pending.
+    """
+    os.makedirs(folder, exist_ok=True)
+    conflicts = []
+    pending   = state.get("pending")
+    if pending is not None:
+        if not _already_applied(pending["batch"]):
+            conflicts += apply_to_data(pending)
+        state.set("pending", None)
+        state.db.commit()
+
+    ops = local_ops(state, local_changes(state))
+    append_log(folder, state.replica, ops)
+
+    removed, added = collections.Counter(), collections.Counter()
+    received = 0
+    for op in read_peers(state, folder):
+        received += 1
+        change = state.apply(op)
+        if change is None:
+            continue
+        old, new = change
+        if old is not None:
+            if added[old]:
+                added[old] -= 1
+            else:
+                removed[old] += 1
+        if new is not None:
+            added[new] += 1
+
+    pending = None
+    if removed or added:
+        state.clock += 1
+        pending = {"batch": f"{state.replica}.{state.clock}",
+                   "del": list(removed.elements()), "add": list(added.elements())}
+    state.set("pending", pending)
+    state.save()
+
+    if pending is not None:
+        conflicts += apply_to_data(pending)
+        state.set("pending", None)
+        state.db.commit()
+    return {"sent": len(ops), "received": received, "conflicts": conflicts}
+
+
+def format_result(r):
+    lines = [f"sync: sent {r['sent']}, received {r['received']} change(s)"]
+    for a, b in r["conflicts"]:
+        lines.append(f"  overlap: {a['date']} {a['start']}-{a['end']} {a['heading']}"
+                     f"  <->  {b['date']} {b['start']}-{b['end']} {b['heading']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync Time Manager data through a shared folder.")
+    parser.add_argument("folder")
+    parser.add_argument("--replica", help="name for this machine (first sync only; default hostname)")
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="keep syncing every SECONDS instead of once")
+    args = parser.parse_args()
+
+    state = SyncState(replica=args.replica)
+    try:
+        while True:
+            result = sync_folder(args.folder, state)
+            if not args.watch:
+                print(format_result(result))
+                break
+            if result["sent"] or result["received"] or result["conflicts"]:
+                print(format_result(result), flush=True)
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        pass
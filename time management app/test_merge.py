@@ -0,0 +1,64 @@
+"""
+Tests for the three-way merge behind SharedTaskFile.
+
+  python -m unittest test_merge
+"""
+
+import collections
+import unittest
+
+from main import merge_conflicts, merge_tasks, task_line
+
+
+def task(heading, start="08:00", end="09:00", date="2026-01-05"):
+    return {"date": date, "start": start, "end": end,
+            "heading": heading, "content": "", "type": "once"}
+
+
+def base_of(*tasks):
+    return collections.Counter(task_line(t) for t in tasks)
+
+
+class MergeTasksTest(unittest.TestCase):
+
+    def test_both_sides_added_same_line(self):
+        a = task("a")
+        merged, added = merge_tasks(collections.Counter(), [a], [dict(a)])
+        self.assertEqual(len(merged), 1)
+        self.assertIs(merged[0], a)
+        self.assertEqual(added, [])
+        self.assertEqual(merge_conflicts(merged, added), [])
+
+    def test_same_line_added_more_often_by_us(self):
+        a1, a2 = task("a"), task("a")
+        merged, added = merge_tasks(collections.Counter(), [a1, a2], [dict(a1)])
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(len({id(t) for t in merged}), 2)
+        self.assertEqual(len(added), 1)
+
+    def test_keeps_their_additions_and_ours(self):
+        b = task("b")
+        ours, theirs = task("ours", "10:00", "11:00"), task("theirs", "12:00", "13:00")
+        merged, added = merge_tasks(base_of(b), [b, ours], [dict(b), theirs])
+        self.assertEqual(merged, [b, theirs, ours])
+        self.assertIs(merged[0], b)
+        self.assertEqual(added, [ours])
+
+    def test_our_removal_wins(self):
+        b, c = task("b"), task("c", "10:00", "11:00")
+        merged, _ = merge_tasks(base_of(b, c), [c], [dict(b), dict(c)])
+        self.assertEqual(merged, [c])
+
+    def test_overlap_with_their_addition_is_reported(self):
+        ours, theirs = task("ours"), task("theirs", "08:30", "09:30")
+        merged, added = merge_tasks(collections.Counter(), [ours], [theirs])
+        self.assertEqual(merge_conflicts(merged, added), [(ours, theirs)])
+
+    def test_conflicts_skip_additions_merged_away(self):
+        a = task("a")
+        merged = [dict(a)]                      # a's line came from disk, not our dict
+        self.assertEqual(merge_conflicts(merged, [a]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,50 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import os
+import csv
+import sqlite3
+import threading
 
-# ─────────────────────────────────────────────
-#  DỮ LIỆU TEMPLATE MẶC ĐỊNH
-# ─────────────────────────────────────────────
-DEFAULT_TEMPLATES = {
-    "C": {
-        "ext": ".c",
-        "format": (
-            "/*==========================================================\n"
-            "{problem}\n"
-            "==========================================================*/\n\n"
-            "{solution}"
-        ),
-    },
-    "C++": {
-        "ext": ".cpp",
-        "format": (
-            "/*==========================================================\n"
-            "{problem}\n"
-            "==========================================================*/\n\n"
-            "{solution}"
-        ),
-    },
-    "Python": {
-        "ext": ".py",
-        "format": (
-            '"""\n'
-            "============================================================\n"
-            "{problem}\n"
-            "============================================================\n"
-            '"""\n\n'
-            "{solution}"
-        ),
-    },
-    "Java": {
-        "ext": ".java",
-        "format": (
-            "/*==========================================================\n"
-            "{problem}\n"
-            "==========================================================*/\n\n"
-            "{solution}"
-        ),
-    },
-}
+from template_core import (
+    ExerciseIndex, TemplateError, TemplateStore,
+    TOOLCHAINS, WRITE_POLICIES, WRITTEN, check_name, compile_template, fan_out, format_rebuild_report, format_report,
+    format_verify_report, read_manifest, rebuild, render_batch, verify, walk_exercises,
+    write_exercise,
+)
 
 # ─────────────────────────────────────────────
 #  BẢNG MÀU & FONT
@@ -68,6 +34,9 @@ FONT_TITLE = ("Segoe UI", 13, "bold")
 FONT_MONO  = ("Consolas", 10)
 FONT_BTN   = ("Segoe UI", 9, "bold")
 
+TEMPLATE_WATCH_MS = 2000   # chu kỳ kiểm tra file template bị sửa từ instance khác
+SEARCH_DELAY_MS   = 150    # gõ xong bao lâu thì tìm trong catalog
+
 
 # ═══════════════════════════════════════════════════════
 #  WIDGET TIỆN ÍCH
@@ -149,6 +118,23 @@ def styled_button(parent, text, command, accent=True, width=18, **kw):
     return btn
 
 
+ASK_POLICY = "Hỏi mỗi lần"
+
+
+def policy_box(parent, variable, ask=False, width=30):
+    """Combobox chọn cách xử lý file đã tồn tại; variable giữ mô tả đang hiển thị."""
+    values = ([ASK_POLICY] if ask else []) + list(WRITE_POLICIES.values())
+    if variable.get() not in values:
+        variable.set(values[0])
+    return ttk.Combobox(parent, textvariable=variable, values=values, state="readonly",
+                        style="Dark.TCombobox", width=width, font=FONT_MAIN)
+
+
+def policy_of(label: str):
+    """Mô tả trong policy_box → tên policy (None = hỏi người dùng)."""
+    return next((k for k, v in WRITE_POLICIES.items() if v == label), None)
+
+
 # ═══════════════════════════════════════════════════════
 #  CỬA SỔ CHỈNH SỬA TEMPLATE
 # ═══════════════════════════════════════════════════════
@@ -156,10 +142,10 @@ def styled_button(parent, text, command, accent=True, width=18, **kw):
 class EditTemplateWindow(tk.Toplevel):
     """Cửa sổ con cho phép xem & chỉnh sửa template theo từng ngôn ngữ."""
 
-    def __init__(self, parent, templates: dict, on_saved=None):
+    def __init__(self, parent, store: TemplateStore, on_saved=None):
         super().__init__(parent)
-        self.templates = templates   # tham chiếu dict gốc
-        self.on_saved  = on_saved    # callback() sau khi lưu thành công
+        self.store    = store       # kho template dùng chung (lưu ra file)
+        self.on_saved = on_saved    # callback() sau khi lưu thành công
 
         self.title("Edit Templates")
         self.configure(bg=THEME["bg"])
@@ -197,12 +183,12 @@ class EditTemplateWindow(tk.Toplevel):
             font=FONT_LABEL,
         ).pack(side="left", padx=(0, 8))
 
-        self.lang_var = tk.StringVar(value=list(self.templates.keys())[0])
+        self.lang_var = tk.StringVar(value=list(self.store.templates().keys())[0])
 
         self.lang_combo = ttk.Combobox(
             row_lang,
             textvariable=self.lang_var,
-            values=list(self.templates.keys()),
+            values=list(self.store.templates().keys()),
             state="readonly",
             style="Dark.TCombobox",
             width=14,
@@ -212,6 +198,13 @@ class EditTemplateWindow(tk.Toplevel):
         self.lang_combo.bind("<<ComboboxSelected>>",
                              lambda _: self._load_language(self.lang_var.get()))
 
+        tk.Button(
+            row_lang, text="+", command=self._add_language,
+            bg=THEME["bg_panel"], fg=THEME["text"],
+            font=FONT_BTN, relief="flat", cursor="hand2", padx=6,
+            activebackground=THEME["border"], activeforeground=THEME["text"],
+        ).pack(side="left", padx=(6, 0))
+
         tk.Label(
             row_lang, text="Extension:",
             bg=THEME["bg"], fg=THEME["text_dim"],
@@ -225,7 +218,7 @@ class EditTemplateWindow(tk.Toplevel):
         # ── Label hướng dẫn ─────────────────────────────
         tk.Label(
             self,
-            text="Template format  (dùng {problem} và {solution}):",
+            text="Template format  (dùng {problem}, {solution}, {filename}):",
             bg=THEME["bg"], fg=THEME["text"],
             font=FONT_LABEL,
         ).pack(anchor="w", padx=16)
@@ -236,10 +229,12 @@ class EditTemplateWindow(tk.Toplevel):
 
         text_frame, self.text_template = styled_text(editor_container, height=16)
         text_frame.pack(fill="both", expand=True)
+        self.text_template.tag_configure("error", background="#7F1D1D")
 
         tk.Label(
             self,
-            text="  Tip: {problem} → đề bài   |   {solution} → code",
+            text="  Tip: {problem} → đề bài   |   {solution} → code   |   "
+                 "{filename} → tên file   |   {{ }} → dấu ngoặc",
             bg=THEME["bg"], fg=THEME["text_dim"],
             font=("Segoe UI", 8),
         ).pack(anchor="w", padx=16)
@@ -254,8 +249,21 @@ class EditTemplateWindow(tk.Toplevel):
         styled_button(btn_row, "✖  Close", self.destroy,
                       accent=False, width=10).pack(side="right", padx=(0, 8))
 
+    def _add_language(self):
+        lang = simpledialog.askstring("Thêm ngôn ngữ", "Tên ngôn ngữ mới:", parent=self)
+        lang = (lang or "").strip()
+        if not lang:
+            return
+        values = list(self.lang_combo["values"])
+        if lang not in values:
+            self.lang_combo.configure(values=values + [lang])
+        self.lang_var.set(lang)
+        self._load_language(lang)
+        if not self.text_template.get("1.0", "end-1c"):
+            self.text_template.insert("1.0", "{problem}\n\n{solution}")
+
     def _load_language(self, lang: str):
-        tmpl = self.templates.get(lang, {})
+        tmpl = self.store.templates().get(lang, {})
         self.ext_var.set(tmpl.get("ext", ""))
         self.text_template.delete("1.0", "end")
         self.text_template.insert("1.0", tmpl.get("format", ""))
@@ -265,12 +273,17 @@ class EditTemplateWindow(tk.Toplevel):
         new_format = self.text_template.get("1.0", "end-1c")
         new_ext    = self.ext_var.get().strip()
 
-        if "{problem}" not in new_format or "{solution}" not in new_format:
-            messagebox.showwarning(
-                "Thiếu placeholder",
-                "Template phải chứa cả {problem} và {solution}.",
-                parent=self,
-            )
+        # Biên dịch ngay khi lưu: lỗi placeholder hiện ở đây, không phải lúc sinh file
+        self.text_template.tag_remove("error", "1.0", "end")
+        try:
+            compile_template(new_format)
+        except TemplateError as exc:
+            if exc.line is not None:
+                pos = f"{exc.line}.{exc.col - 1}"
+                self.text_template.tag_add("error", pos, f"{pos} + 1c")
+                self.text_template.mark_set("insert", pos)
+                self.text_template.see(pos)
+            messagebox.showwarning("Template lỗi", str(exc), parent=self)
             return
 
         if not new_ext:
@@ -284,8 +297,12 @@ class EditTemplateWindow(tk.Toplevel):
         if not new_ext.startswith("."):
             new_ext = "." + new_ext
 
-        self.templates[lang]["format"] = new_format
-        self.templates[lang]["ext"]    = new_ext
+        try:
+            self.store.save(lang, new_ext, new_format)
+        except OSError as exc:
+            messagebox.showerror("Lỗi lưu template",
+                                 f"Không ghi được {self.store.path}:\n{exc}", parent=self)
+            return
 
         if self.on_saved:
             self.on_saved()
@@ -297,6 +314,400 @@ class EditTemplateWindow(tk.Toplevel):
         )
 
 
+# ═══════════════════════════════════════════════════════
+#  CỬA SỔ SINH FILE HÀNG LOẠT
+# ═══════════════════════════════════════════════════════
+
+class BatchWindow(tk.Toplevel):
+    """Chọn manifest / thư mục nguồn → sinh toàn bộ file, xem báo cáo cuối."""
+
+    def __init__(self, parent, store: TemplateStore, save_dir: str, on_done=None):
+        super().__init__(parent)
+        self.store     = store
+        self.on_done   = on_done     # callback(report) sau khi chạy xong
+
+        self.title("Batch Generate")
+        self.configure(bg=THEME["bg"])
+        self.geometry("620x480")
+        self.minsize(520, 400)
+
+        self.source_var    = tk.StringVar()
+        self.out_var       = tk.StringVar(value=save_dir)
+        self.policy_var    = tk.StringVar(value=WRITE_POLICIES["skip"])
+        self._build_ui()
+
+    def _build_ui(self):
+        tk.Label(
+            self, text="Sinh file hàng loạt",
+            bg=THEME["bg"], fg=THEME["accent2"], font=FONT_TITLE,
+        ).pack(anchor="w", padx=16, pady=(14, 4))
+        ttk.Separator(self).pack(fill="x", padx=16, pady=(0, 8))
+
+        styled_label(self, "Manifest (.json / .csv / .yaml) hoặc thư mục NN_problem.txt + NN_solution.*"
+                     ).pack(anchor="w", padx=16)
+        row_src = tk.Frame(self, bg=THEME["bg"])
+        row_src.pack(fill="x", padx=16, pady=(3, 8))
+        styled_entry(row_src, textvariable=self.source_var).pack(
+            side="left", fill="x", expand=True, ipady=4)
+        styled_button(row_src, "File", self._browse_manifest,
+                      accent=False, width=6).pack(side="left", padx=(6, 0))
+        styled_button(row_src, "Thư mục", self._browse_folder,
+                      accent=False, width=8).pack(side="left", padx=(6, 0))
+
+        styled_label(self, "Thư mục lưu file").pack(anchor="w", padx=16)
+        styled_entry(self, textvariable=self.out_var).pack(fill="x", padx=16, pady=(3, 8), ipady=4)
+
+        row_policy = tk.Frame(self, bg=THEME["bg"])
+        row_policy.pack(fill="x", padx=16)
+        styled_label(row_policy, "File đã tồn tại:").pack(side="left", padx=(0, 8))
+        policy_box(row_policy, self.policy_var).pack(side="left")
+
+        report_frame, self.text_report = styled_text(self, height=10)
+        report_frame.pack(fill="both", expand=True, padx=16, pady=8)
+
+        btn_row = tk.Frame(self, bg=THEME["bg"])
+        btn_row.pack(fill="x", padx=16, pady=(0, 14))
+        self.btn_run = styled_button(btn_row, "Generate", self._run, accent=True, width=14)
+        self.btn_run.pack(side="right")
+        self.btn_rebuild = styled_button(btn_row, "Rebuild", self._rebuild, accent=False, width=10)
+        self.btn_rebuild.pack(side="left")
+        self.btn_verify = styled_button(btn_row, "Verify", self._verify, accent=False, width=10)
+        self.btn_verify.pack(side="left", padx=(8, 0))
+        styled_button(btn_row, "✖  Close", self.destroy,
+                      accent=False, width=10).pack(side="right", padx=(0, 8))
+
+    def _browse_manifest(self):
+        chosen = filedialog.askopenfilename(
+            parent=self, title="Chọn manifest",
+            filetypes=[("Manifest", "*.json *.csv *.yaml *.yml *.txt"), ("Tất cả", "*.*")],
+        )
+        if chosen:
+            self.source_var.set(chosen)
+
+    def _browse_folder(self):
+        chosen = filedialog.askdirectory(parent=self, title="Chọn thư mục bài tập")
+        if chosen:
+            self.source_var.set(chosen)
+
+    def _show(self, text):
+        self.text_report.delete("1.0", "end")
+        self.text_report.insert("1.0", text)
+
+    def _run(self):
+        source, out = self.source_var.get().strip(), self.out_var.get().strip()
+        if not source or not out:
+            messagebox.showerror("Lỗi", "Vui lòng chọn nguồn và thư mục lưu!", parent=self)
+            return
+        self._set_busy(True)
+        policy    = policy_of(self.policy_var.get())
+        templates = self.store.templates()     # bản mới nhất trên đĩa, không đổi khi đang chạy
+
+        def work():
+            try:
+                entries = read_manifest(source, templates)
+                report  = render_batch(entries, templates, out, policy=policy)
+                text    = f"{len(entries)} mục trong manifest\n\n" + format_report(report)
+            except (OSError, ValueError, csv.Error) as exc:
+                report, text = None, f"Không đọc được manifest:\n{exc}"
+            self.after(0, lambda: self._finish(report, text))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _rebuild(self):
+        """Sinh lại file trong thư mục lưu có template / đầu vào đã đổi (theo manifest)."""
+        out = self.out_var.get().strip()
+        if not out:
+            messagebox.showerror("Lỗi", "Vui lòng chọn thư mục lưu!", parent=self)
+            return
+        self._set_busy(True)
+        templates = self.store.templates()
+
+        def work():
+            try:
+                report = rebuild(out, templates)
+                text   = format_rebuild_report(report)
+            except OSError as exc:
+                report, text = None, f"Không rebuild được:\n{exc}"
+            self.after(0, lambda: self._finish(report, text))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _verify(self):
+        """Biên dịch + chạy test mọi lời giải trong thư mục lưu (kết quả cũ lấy từ cache)."""
+        out = self.out_var.get().strip()
+        if not out or not os.path.isdir(out):
+            messagebox.showerror("Lỗi", "Thư mục lưu không tồn tại!", parent=self)
+            return
+        self._set_busy(True)
+
+        def work():
+            text = format_verify_report(verify(walk_exercises(out, TOOLCHAINS)))
+            self.after(0, lambda: self._finish(None, text))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _set_busy(self, busy):
+        state = "disabled" if busy else "normal"
+        self.btn_run.config(state=state)
+        self.btn_rebuild.config(state=state)
+        self.btn_verify.config(state=state)
+        if busy:
+            self._show("Đang xử lý…")
+
+    def _finish(self, report, text):
+        if not self.winfo_exists():
+            return
+        self._set_busy(False)
+        self._show(text)
+        if report is not None and self.on_done:
+            self.on_done(report)
+
+
+# ═══════════════════════════════════════════════════════
+#  CỬA SỔ FAN-OUT (MỘT ĐỀ, NHIỀU NGÔN NGỮ)
+# ═══════════════════════════════════════════════════════
+
+class FanOutWindow(tk.Toplevel):
+    """Một đề bài + lời giải riêng cho từng ngôn ngữ → sinh cả bộ trong một lần."""
+
+    def __init__(self, parent, store: TemplateStore, name: str, problem: str,
+                 save_dir: str, first: tuple = None, on_done=None):
+        super().__init__(parent)
+        self.store   = store
+        self.on_done = on_done       # callback(report) sau khi ghi xong
+
+        self.title("Fan-out")
+        self.configure(bg=THEME["bg"])
+        self.geometry("720x640")
+        self.minsize(560, 520)
+
+        self.name_var      = tk.StringVar(value=name)
+        self.out_var       = tk.StringVar(value=save_dir)
+        self.policy_var    = tk.StringVar(value=WRITE_POLICIES["skip"])
+        self.atomic_var    = tk.BooleanVar(value=True)
+        self.langs         = {}      # lang → (BooleanVar chọn, Text lời giải)
+        self._build_ui(problem)
+        if first is not None and first[0] in self.langs:      # (lang, code) từ form chính
+            include, text = self.langs[first[0]]
+            text.insert("1.0", first[1])
+            include.set(bool(first[1]))
+
+    def _build_ui(self, problem):
+        tk.Label(
+            self, text="Một đề — nhiều ngôn ngữ",
+            bg=THEME["bg"], fg=THEME["accent2"], font=FONT_TITLE,
+        ).pack(anchor="w", padx=16, pady=(14, 4))
+        ttk.Separator(self).pack(fill="x", padx=16, pady=(0, 8))
+
+        row = tk.Frame(self, bg=THEME["bg"])
+        row.pack(fill="x", padx=16)
+        styled_label(row, "Tên file").pack(side="left")
+        styled_entry(row, textvariable=self.name_var, width=20).pack(
+            side="left", padx=(8, 16), ipady=3)
+        styled_label(row, "Thư mục lưu").pack(side="left")
+        styled_entry(row, textvariable=self.out_var).pack(
+            side="left", fill="x", expand=True, padx=(8, 0), ipady=3)
+
+        styled_label(self, "Đề bài").pack(anchor="w", padx=16, pady=(8, 3))
+        problem_frame, self.text_problem = styled_text(self, height=6)
+        problem_frame.pack(fill="x", padx=16)
+        self.text_problem.insert("1.0", problem)
+
+        styled_label(self, "Lời giải theo ngôn ngữ (tick để xuất)").pack(
+            anchor="w", padx=16, pady=(8, 3))
+        notebook = ttk.Notebook(self, style="Dark.TNotebook")
+        notebook.pack(fill="both", expand=True, padx=16)
+        for lang in self.store.templates():
+            tab = tk.Frame(notebook, bg=THEME["bg"])
+            include = tk.BooleanVar(value=False)
+            tk.Checkbutton(
+                tab, text=f"Xuất {lang}", variable=include,
+                bg=THEME["bg"], fg=THEME["text"], selectcolor=THEME["bg_input"],
+                activebackground=THEME["bg"], activeforeground=THEME["text"],
+                font=FONT_LABEL,
+            ).pack(anchor="w", pady=(4, 2))
+            frame, text = styled_text(tab, height=10)
+            frame.pack(fill="both", expand=True)
+            # Gõ lời giải là tự chọn ngôn ngữ đó
+            text.bind("<Key>", lambda _e, v=include: v.set(True), add="+")
+            notebook.add(tab, text=lang)
+            self.langs[lang] = (include, text)
+
+        opts = tk.Frame(self, bg=THEME["bg"])
+        opts.pack(fill="x", padx=16, pady=(6, 0))
+        tk.Checkbutton(
+            opts, text="Tất cả hoặc không (atomic)", variable=self.atomic_var,
+            bg=THEME["bg"], fg=THEME["text"], selectcolor=THEME["bg_input"],
+            activebackground=THEME["bg"], activeforeground=THEME["text"],
+            font=FONT_LABEL,
+        ).pack(side="left", padx=(0, 16))
+        styled_label(opts, "File đã tồn tại:").pack(side="left", padx=(0, 8))
+        policy_box(opts, self.policy_var, width=26).pack(side="left")
+
+        btn_row = tk.Frame(self, bg=THEME["bg"])
+        btn_row.pack(fill="x", padx=16, pady=(8, 14))
+        self.btn_run = styled_button(btn_row, "Generate", self._run, accent=True, width=14)
+        self.btn_run.pack(side="right")
+        styled_button(btn_row, "✖  Close", self.destroy,
+                      accent=False, width=10).pack(side="right", padx=(0, 8))
+
+    def _run(self):
+        name = self.name_var.get().strip()
+        out  = self.out_var.get().strip()
+        solutions = {lang: text.get("1.0", "end-1c").strip()
+                     for lang, (include, text) in self.langs.items() if include.get()}
+        if not name or not out:
+            messagebox.showerror("Lỗi", "Vui lòng nhập tên file và thư mục lưu!", parent=self)
+            return
+        if not solutions:
+            messagebox.showerror("Lỗi", "Chưa chọn ngôn ngữ nào!", parent=self)
+            return
+        problem   = self.text_problem.get("1.0", "end-1c").strip()
+        templates = self.store.templates()
+        policy, atomic = policy_of(self.policy_var.get()), self.atomic_var.get()
+        self.btn_run.config(state="disabled")
+
+        def work():
+            try:
+                report = fan_out(templates, name, problem, solutions, out,
+                                 policy=policy, atomic=atomic)
+            except OSError as exc:
+                report = {"created": [], "overwritten": [], "skipped": [],
+                          "errors": [(name, str(exc))], "dir": out}
+            self.after(0, lambda: self._finish(report, atomic))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _finish(self, report, atomic):
+        if not self.winfo_exists():
+            return
+        self.btn_run.config(state="normal")
+        text = format_report(report)
+        if report["errors"]:
+            if atomic:
+                text = "Không file nào được ghi (atomic).\n\n" + text
+            messagebox.showwarning("Fan-out chưa trọn vẹn", text, parent=self)
+        else:
+            messagebox.showinfo("Fan-out xong", text, parent=self)
+        if self.on_done:
+            self.on_done(report)
+
+
+# ═══════════════════════════════════════════════════════
+#  CỬA SỔ CATALOG BÀI TẬP
+# ═══════════════════════════════════════════════════════
+
+class CatalogWindow(tk.Toplevel):
+    """Tìm bài tập đã sinh (chỉ mục toàn văn); double-click → nạp bài vào form."""
+
+    def __init__(self, parent, index: ExerciseIndex, store: TemplateStore, on_open=None):
+        super().__init__(parent)
+        self.index    = index
+        self.store    = store
+        self.on_open  = on_open      # callback(path, entry) khi chọn một bài
+        self._pending = None
+        self._results = {}           # item id của Treeview → path
+
+        self.title("Catalog")
+        self.configure(bg=THEME["bg"])
+        self.geometry("760x560")
+        self.minsize(560, 420)
+
+        self.query_var  = tk.StringVar()
+        self.status_var = tk.StringVar(value="Đang quét lại các thư mục…")
+        self._build_ui()
+        self.query_var.trace_add("write", lambda *_: self._schedule_search())
+        self._search()
+        self._rescan()
+
+    def _build_ui(self):
+        tk.Label(
+            self, text="Catalog bài tập",
+            bg=THEME["bg"], fg=THEME["accent2"], font=FONT_TITLE,
+        ).pack(anchor="w", padx=16, pady=(14, 4))
+        ttk.Separator(self).pack(fill="x", padx=16, pady=(0, 8))
+
+        row = tk.Frame(self, bg=THEME["bg"])
+        row.pack(fill="x", padx=16, pady=(0, 8))
+        entry = styled_entry(row, textvariable=self.query_var)
+        entry.pack(side="left", fill="x", expand=True, ipady=4)
+        entry.focus_set()
+        styled_button(row, "+ Thư mục", self._add_root,
+                      accent=False, width=10).pack(side="left", padx=(6, 0))
+        styled_button(row, "Quét lại", self._rescan,
+                      accent=False, width=9).pack(side="left", padx=(6, 0))
+
+        self.tree = ttk.Treeview(self, columns=("lang", "snippet"), style="Dark.Treeview")
+        self.tree.heading("#0", text="Tên")
+        self.tree.heading("lang", text="Ngôn ngữ")
+        self.tree.heading("snippet", text="Đề bài")
+        self.tree.column("#0", width=140, stretch=False)
+        self.tree.column("lang", width=80, stretch=False)
+        self.tree.column("snippet", width=480)
+        self.tree.pack(fill="both", expand=True, padx=16)
+        self.tree.bind("<Double-1>", self._open_selected)
+        self.tree.bind("<Return>", self._open_selected)
+
+        tk.Label(
+            self, textvariable=self.status_var,
+            bg=THEME["bg"], fg=THEME["text_dim"], font=("Segoe UI", 8), anchor="w",
+        ).pack(fill="x", padx=16, pady=(4, 12))
+
+    # ── Tìm kiếm ────────────────────────────────────────
+
+    def _schedule_search(self):
+        if self._pending is not None:
+            self.after_cancel(self._pending)
+        self._pending = self.after(SEARCH_DELAY_MS, self._search)
+
+    def _search(self):
+        self._pending = None
+        results = self.index.search(self.query_var.get())
+        self.tree.delete(*self.tree.get_children())
+        self._results = {}
+        for e in results:
+            iid = self.tree.insert("", "end", text=e["name"], values=(e["lang"], e["snippet"]))
+            self._results[iid] = e["path"]
+        self.status_var.set(f"{len(results)} kết quả")
+
+    def _open_selected(self, _event=None):
+        sel = self.tree.selection()
+        if not sel or not self.on_open:
+            return
+        path  = self._results[sel[0]]
+        entry = self.index.get(path)
+        if entry is not None:
+            self.on_open(path, entry)
+
+    # ── Quét thư mục (nền) ──────────────────────────────
+
+    def _add_root(self):
+        chosen = filedialog.askdirectory(parent=self, title="Thêm thư mục bài tập vào catalog")
+        if chosen:
+            self.index.add_root(chosen)
+            self._rescan()
+
+    def _rescan(self):
+        templates = self.store.templates()
+
+        def work():
+            try:
+                stats = self.index.rescan(templates)
+                text  = f"Đã quét: cập nhật {stats['indexed']}, xóa {stats['removed']} file"
+            except (OSError, ValueError, sqlite3.Error) as exc:
+                text  = f"Quét lỗi: {exc}"
+            self.after(0, lambda: self._rescanned(text))
+
+        self.status_var.set("Đang quét lại các thư mục…")
+        threading.Thread(target=work, daemon=True).start()
+
+    def _rescanned(self, text):
+        if not self.winfo_exists():
+            return
+        self._search()
+        self.status_var.set(text)
+
+
 # ═══════════════════════════════════════════════════════
 #  CỬA SỔ CHÍNH
 # ═══════════════════════════════════════════════════════
@@ -306,7 +717,8 @@ class CodeTemplateApp(tk.Tk):
 
     def __init__(self):
         super().__init__()
-        self.templates = {lang: dict(data) for lang, data in DEFAULT_TEMPLATES.items()}
+        self.store  = TemplateStore()
+        self._index = None           # ExerciseIndex, mở khi cần lần đầu
 
         self.title("Code Template Generator")
         self.configure(bg=THEME["bg"])
@@ -319,6 +731,17 @@ class CodeTemplateApp(tk.Tk):
 
         self._apply_ttk_style()
         self._build_ui()
+        self.after(TEMPLATE_WATCH_MS, self._watch_templates)
+
+    @property
+    def templates(self) -> dict:
+        return self.store.templates()
+
+    @property
+    def index(self) -> ExerciseIndex:
+        if self._index is None:
+            self._index = ExerciseIndex()
+        return self._index
 
     # ── TTK style ───────────────────────────────────────
     def _apply_ttk_style(self):
@@ -362,6 +785,38 @@ class CodeTemplateApp(tk.Tk):
             arrowcolor=[("readonly", THEME["accent"])],
         )
 
+        style.configure("Dark.TNotebook", background=THEME["bg"], bordercolor=THEME["border"])
+        style.configure(
+            "Dark.TNotebook.Tab",
+            background=THEME["bg_panel"],
+            foreground=THEME["text_dim"],
+            padding=(12, 4),
+            font=FONT_LABEL,
+        )
+        style.map("Dark.TNotebook.Tab",
+                  background=[("selected", THEME["accent"])],
+                  foreground=[("selected", THEME["btn_fg"])])
+
+        style.configure(
+            "Dark.Treeview",
+            background=THEME["bg_input"],
+            fieldbackground=THEME["bg_input"],
+            foreground=THEME["text"],
+            bordercolor=THEME["border"],
+            rowheight=22,
+            font=FONT_MAIN,
+        )
+        style.map("Dark.Treeview",
+                  background=[("selected", THEME["accent"])],
+                  foreground=[("selected", THEME["btn_fg"])])
+        style.configure(
+            "Dark.Treeview.Heading",
+            background=THEME["bg_panel"],
+            foreground=THEME["text_dim"],
+            font=FONT_LABEL,
+            relief="flat",
+        )
+
     # ── UI chính ────────────────────────────────────────
     def _build_ui(self):
         # Header
@@ -484,6 +939,13 @@ class CodeTemplateApp(tk.Tk):
             highlightbackground=THEME["border"],
         ).pack(side="left", padx=(6, 0))
 
+        # Khi file đã tồn tại: hỏi (như cũ) hoặc một policy cố định
+        policy_row = tk.Frame(parent, bg=THEME["bg"])
+        policy_row.pack(fill="x", padx=20, pady=(0, 6))
+        styled_label(policy_row, "File đã tồn tại").pack(side="left", padx=(0, 8))
+        self.policy_var = tk.StringVar(value=ASK_POLICY)
+        policy_box(policy_row, self.policy_var, ask=True).pack(side="left")
+
         ttk.Separator(parent).pack(fill="x", padx=20, pady=8)
 
         # ══ Section: Đề bài ═════════════════════════════
@@ -502,6 +964,15 @@ class CodeTemplateApp(tk.Tk):
         solution_frame, self.text_solution = styled_text(parent, height=14)
         solution_frame.pack(fill="x", padx=20, pady=(0, 6))  # fill="x", không expand
 
+        self.verify_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            parent, text="Kiểm tra lời giải sau khi tạo (biên dịch + chạy test .in/.out)",
+            variable=self.verify_var,
+            bg=THEME["bg"], fg=THEME["text_dim"], selectcolor=THEME["bg_input"],
+            activebackground=THEME["bg"], activeforeground=THEME["text"],
+            font=("Segoe UI", 8),
+        ).pack(anchor="w", padx=20)
+
         ttk.Separator(parent).pack(fill="x", padx=20, pady=8)
 
         # ── Nút hành động ───────────────────────────────
@@ -512,6 +983,12 @@ class CodeTemplateApp(tk.Tk):
                       accent=True,  width=16).pack(side="left")
         styled_button(btn_row, "Edit Template", self._open_edit_template,
                       accent=False, width=16).pack(side="left", padx=(10, 0))
+        styled_button(btn_row, "Batch…", self._open_batch,
+                      accent=False, width=10).pack(side="left", padx=(10, 0))
+        styled_button(btn_row, "Fan-out…", self._open_fan_out,
+                      accent=False, width=10).pack(side="left", padx=(10, 0))
+        styled_button(btn_row, "Catalog", self._open_catalog,
+                      accent=False, width=10).pack(side="left", padx=(10, 0))
         styled_button(btn_row, "Clear All",     self._clear_all,
                       accent=False, width=12).pack(side="right")
 
@@ -543,6 +1020,18 @@ class CodeTemplateApp(tk.Tk):
         self.ext_label_var.set(f"→  {ext}" if ext else "")
         self._set_status(f"Ngôn ngữ: {lang}  ({ext})")
 
+    def _watch_templates(self):
+        """Instance khác (hoặc người dùng) sửa templates.json → nạp lại, không cần khởi động lại."""
+        if self.store.changed():
+            self.store.reload()
+            self._refresh_languages()
+            self._set_status(self.store.error or "Đã nạp lại template từ file cấu hình.")
+        self.after(TEMPLATE_WATCH_MS, self._watch_templates)
+
+    def _refresh_languages(self):
+        self.lang_combo.configure(values=list(self.templates.keys()))
+        self._on_language_change()
+
     def _browse_directory(self):
         chosen = filedialog.askdirectory(
             title="Chọn thư mục lưu file",
@@ -569,17 +1058,17 @@ class CodeTemplateApp(tk.Tk):
             messagebox.showerror("Lỗi", "Vui lòng chọn ngôn ngữ lập trình!")
             return
 
-        tmpl = self.templates[language]
-        ext  = tmpl["ext"]
-        fmt  = tmpl["format"]
+        tmpl          = self.templates[language]
+        full_filename = file_name + tmpl["ext"]
+        try:
+            check_name(full_filename)
+        except ValueError as exc:
+            messagebox.showerror("Tên file không hợp lệ", str(exc))
+            return
 
         try:
-            content = fmt.format(
-                problem  = problem_text  or "(Chưa có đề bài)",
-                solution = solution_text or "(Chưa có lời giải)",
-                filename = file_name,
-            )
-        except KeyError as exc:
+            compile_template(tmpl["format"])
+        except TemplateError as exc:
             messagebox.showerror(
                 "Lỗi Template",
                 f"Template bị lỗi placeholder: {exc}\n"
@@ -587,46 +1076,119 @@ class CodeTemplateApp(tk.Tk):
             )
             return
 
-        full_filename = file_name + ext
-        illegal = r'\/:*?"<>|'
-        if any(ch in full_filename for ch in illegal):
-            messagebox.showerror(
-                "Tên file không hợp lệ",
-                f"Tên file không được chứa các ký tự: {illegal}",
-            )
-            return
-
-        os.makedirs(save_dir, exist_ok=True)
-        full_path = os.path.join(save_dir, full_filename)
-
-        if os.path.exists(full_path):
-            if not messagebox.askyesno(
-                "File đã tồn tại",
-                f"'{full_filename}' đã tồn tại.\nBạn có muốn ghi đè không?",
-            ):
-                return
+        policy = policy_of(self.policy_var.get())
+        if policy is None:
+            policy = "skip"
+            if os.path.exists(os.path.join(save_dir, full_filename)):
+                if not messagebox.askyesno(
+                    "File đã tồn tại",
+                    f"'{full_filename}' đã tồn tại.\nBạn có muốn ghi đè không?",
+                ):
+                    return
+                policy = "overwrite"
 
         try:
-            with open(full_path, "w", encoding="utf-8") as f:
-                f.write(content)
+            status, full_path = write_exercise(tmpl, file_name, problem_text, solution_text,
+                                               save_dir, policy=policy, lang=language)
         except OSError as exc:
             messagebox.showerror("Lỗi ghi file", f"Không thể ghi file:\n{exc}")
             return
 
+        if status in ("skipped", "identical"):
+            why = "đã tồn tại" if status == "skipped" else "nội dung giống hệt"
+            self._set_status(f"Bỏ qua ({why}): {full_path}")
+            return
+
+        self._index_written([full_path], save_dir)
         self._set_status(f"Đã tạo: {full_path}")
+        if self.verify_var.get():
+            self._verify_created(full_path)
         messagebox.showinfo("Tạo file thành công!", f"File đã tạo:\n{full_path}")
 
     def _open_edit_template(self):
         """Mở cửa sổ chỉnh sửa template (modal)."""
-        def _on_saved():
-            # Đồng bộ danh sách ngôn ngữ trong combobox sau khi lưu
-            self.lang_combo.configure(values=list(self.templates.keys()))
-            self._on_language_change()
-
-        win = EditTemplateWindow(self, self.templates, on_saved=_on_saved)
+        # on_saved: đồng bộ danh sách ngôn ngữ trong combobox sau khi lưu
+        win = EditTemplateWindow(self, self.store, on_saved=self._refresh_languages)
         win.grab_set()
         self.wait_window(win)
 
+    def _open_fan_out(self):
+        """Một đề → nhiều ngôn ngữ; đề, tên file và lời giải đang nhập được mang sang."""
+        FanOutWindow(
+            self, self.store,
+            self.entry_filename.get().strip(),
+            self.text_problem.get("1.0", "end-1c").strip(),
+            self.save_dir_var.get().strip(),
+            first=(self.lang_var.get(), self.text_solution.get("1.0", "end-1c").strip()),
+            on_done=self._on_written,
+        )
+
+    def _open_batch(self):
+        """Mở cửa sổ sinh file hàng loạt (không modal, chạy nền)."""
+        BatchWindow(self, self.store, self.save_dir_var.get().strip(), on_done=self._on_written)
+
+    def _on_written(self, report):
+        """Sau batch / rebuild / fan-out: cập nhật catalog + status bar."""
+        written = [n for key in WRITTEN + ("rebuilt",) for n in report.get(key, ())]
+        self._index_written([os.path.join(report["dir"], n) for n in written], report["dir"])
+        if "rebuilt" in report:
+            self._set_status(f"Rebuild: sinh lại {len(written)} file, "
+                             f"giữ nguyên {len(report['unchanged'])}, lỗi {len(report['errors'])}")
+            return
+        self._set_status(f"Đã ghi {len(written)} file, bỏ qua {len(report['skipped'])}, "
+                         f"lỗi {len(report['errors'])}")
+
+    def _open_catalog(self):
+        """Mở catalog bài tập (không modal); chọn một bài → nạp lại vào form."""
+        try:
+            CatalogWindow(self, self.index, self.store, on_open=self._load_exercise)
+        except (OSError, sqlite3.Error) as exc:
+            messagebox.showerror("Lỗi catalog", f"Không mở được catalog:\n{exc}")
+
+    def _load_exercise(self, path, entry):
+        self.entry_filename.delete(0, "end")
+        self.entry_filename.insert(0, entry["name"])
+        if entry["lang"] in self.templates:
+            self.lang_var.set(entry["lang"])
+        self.text_problem.delete("1.0", "end")
+        self.text_problem.insert("1.0", entry["problem"])
+        self.text_solution.delete("1.0", "end")
+        self.text_solution.insert("1.0", entry["solution"])
+        self.save_dir_var.set(os.path.dirname(path))
+        self._set_status(f"Đã nạp: {path}")
+
+    def _verify_created(self, path):
+        """Kiểm tra nền; kết quả hiện ở status bar, lỗi thì hiện thêm hộp thoại."""
+        def work():
+            res = verify([path])[0]
+            self.after(0, lambda: self._verified(res))
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def _verified(self, res):
+        name = os.path.basename(res["path"])
+        if res["status"] == "pass":
+            self._set_status(f"✔ {name}: đạt ({res['stage']})")
+        elif res["status"] == "skipped":
+            self._set_status(f"{name}: không kiểm tra — {res['message']}")
+        else:
+            self._set_status(f"✖ {name}: lỗi ở bước {res['stage']}")
+            messagebox.showwarning(f"Lời giải lỗi: {name}", res["message"] or res["status"])
+
+    def _index_written(self, paths, root):
+        """Cập nhật catalog cho các file vừa ghi (luồng nền, lỗi chỉ làm catalog cũ đi)."""
+        if not paths:
+            return
+        templates = self.templates
+
+        def work():
+            try:
+                self.index.index_files(paths, templates, root)
+            except (OSError, sqlite3.Error):
+                pass
+
+        threading.Thread(target=work, daemon=True).start()
+
     def _clear_all(self):
         if messagebox.askyesno("Xác nhận", "Xóa toàn bộ nội dung đã nhập?"):
             self.entry_filename.delete(0, "end")
@@ -0,0 +1,1874 @@
+"""
+Phần lõi (không cần Tk) của Code Template Generator: kho template, biên dịch,
+render và ghi file. Giao diện main.py và CLI bên dưới dùng chung module này.
+
+  python template_core.py render --lang Python --name ex01 \\
+                                 --problem-file p.txt --solution-file s.py --out bai_tap
+  python template_core.py render --lang C --name ex02 --problem-file - < de.txt
+  python template_core.py batch manifest.json --out bai_tap [--policy skip-identical]
+  python template_core.py rebuild bai_tap [--force]   # sau khi sửa template
+  python template_core.py import bai_tap --catalog catalog.json [--find "sàng nguyên tố"]
+  python template_core.py search "sang nguyen to java" [--add bai_tap]   # catalog có chỉ mục
+  python template_core.py verify bai_tap [--no-tests]    # gcc / g++ / javac / py_compile
+  python template_core.py fanout --name ex01 --problem-file p.txt \\
+                                 --solution C=s.c --solution Python=s.py --out bai_tap --atomic
+  python template_core.py --serve        # mỗi dòng stdin là một request JSON
+
+- Không import tkinter, module nặng chỉ nạp khi cần, nên gọi hàng nghìn lần trong vòng lặp vẫn nhanh;
+  --serve còn tránh được cả chi phí khởi động interpreter
+- Template lấy từ cùng file cấu hình với giao diện (TemplateStore)
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import threading
+
+# csv, tempfile, concurrent.futures, argparse được import trong hàm dùng chúng:
+# một lệnh render đơn lẻ không phải trả chi phí nạp các module đó
+
+# ─────────────────────────────────────────────
+#  DỮ LIỆU TEMPLATE MẶC ĐỊNH
+# ─────────────────────────────────────────────
+DEFAULT_TEMPLATES = {
+    "C": {
+        "ext": ".c",
+        "format": (
+            "/*==========================================================\n"
+            "{problem}\n"
+            "==========================================================*/\n\n"
+            "{solution}"
+        ),
+    },
+    "C++": {
+        "ext": ".cpp",
+        "format": (
+            "/*==========================================================\n"
+            "{problem}\n"
+            "==========================================================*/\n\n"
+            "{solution}"
+        ),
+    },
+    "Python": {
+        "ext": ".py",
+        "format": (
+            '"""\n'
+            "============================================================\n"
+            "{problem}\n"
+            "============================================================\n"
+            '"""\n\n'
+            "{solution}"
+        ),
+    },
+    "Java": {
+        "ext": ".java",
+        "format": (
+            "/*==========================================================\n"
+            "{problem}\n"
+            "==========================================================*/\n\n"
+            "{solution}"
+        ),
+    },
+}
+
+ILLEGAL_CHARS   = r'\/:*?"<>|'
+EMPTY_PROBLEM   = "(Chưa có đề bài)"
+EMPTY_SOLUTION  = "(Chưa có lời giải)"
+BATCH_WORKERS   = 8
+MANIFEST_NAME   = ".template_manifest.json"   # ghi lại đầu vào của từng file đã sinh
+MANIFEST_LOG    = ".template_manifest.log"    # record mới nối vào đây, gộp lại khi rebuild
+
+
+# ═══════════════════════════════════════════════════════
+#  BIÊN DỊCH TEMPLATE
+# ═══════════════════════════════════════════════════════
+
+SLOTS          = ("problem", "solution", "filename")
+REQUIRED_SLOTS = ("problem", "solution")
+
+
+class TemplateError(ValueError):
+    """Template sai cú pháp; line / col (đếm từ 1) trỏ tới chỗ lỗi."""
+
+    def __init__(self, message, line=None, col=None):
+        where = f" (dòng {line}, cột {col})" if line is not None else ""
+        super().__init__(message + where)
+        self.line = line
+        self.col  = col
+
+
+class CompiledTemplate:
+    """
+    Template đã biên dịch: literals[0], slots[0], literals[1], …, literals[-1].
+    - literals: đoạn chữ cố định ({{ / }} đã đổi thành { / })
+    - slots:    tên placeholder ('problem' | 'solution' | 'filename')
+    Render = một lần join, không còn str.format lúc sinh file.
+    """
+
+    __slots__ = ("source", "literals", "slots")
+
+    def __init__(self, source, literals, slots):
+        self.source   = source
+        self.literals = literals
+        self.slots    = slots
+
+    def render(self, values: dict) -> str:
+        parts = [self.literals[0]]
+        for slot, lit in zip(self.slots, self.literals[1:]):
+            parts.append(values[slot])
+            parts.append(lit)
+        return "".join(parts)
+
+
+_COMPILED = {}   # source → CompiledTemplate
+
+
+def compile_template(source: str) -> CompiledTemplate:
+    """Biên dịch có cache: mỗi chuỗi template chỉ biên dịch một lần."""
+    compiled = _COMPILED.get(source)
+    if compiled is None:
+        if len(_COMPILED) > 256:
+            _COMPILED.clear()
+        compiled = _COMPILED[source] = _compile(source)
+    return compiled
+
+
+def _compile(source: str) -> CompiledTemplate:
+    """
+    Biên dịch chuỗi template.
+    Hợp lệ: {problem} {solution} {filename}, {{ và }} cho dấu ngoặc thật.
+    Mọi dấu { } lẻ khác → TemplateError kèm vị trí.
+    """
+    literals, slots, buf = [], [], []
+    i, n = 0, len(source)
+
+    def where(pos):
+        line = source.count("\n", 0, pos) + 1
+        return line, pos - (source.rfind("\n", 0, pos) + 1) + 1
+
+    while i < n:
+        ch = source[i]
+        if ch == "{" and source.startswith("{{", i):
+            buf.append("{")
+            i += 2
+        elif ch == "}" and source.startswith("}}", i):
+            buf.append("}")
+            i += 2
+        elif ch == "{":
+            close = source.find("}", i + 1)
+            name  = source[i + 1:close] if close != -1 else ""
+            if name not in SLOTS:
+                raise TemplateError(
+                    f"placeholder không hợp lệ '{source[i:close + 1] if close != -1 else '{'}'"
+                    " — dùng {problem}, {solution}, {filename} hoặc {{ }} cho dấu ngoặc",
+                    *where(i))
+            literals.append("".join(buf))
+            slots.append(name)
+            buf = []
+            i = close + 1
+        elif ch == "}":
+            raise TemplateError("dấu '}' lẻ — viết '}}' nếu muốn dấu ngoặc thật", *where(i))
+        else:
+            j = min((k for k in (source.find("{", i), source.find("}", i)) if k != -1),
+                    default=n)
+            buf.append(source[i:j])
+            i = j
+    literals.append("".join(buf))
+
+    missing = [s for s in REQUIRED_SLOTS if s not in slots]
+    if missing:
+        raise TemplateError("template phải chứa " + " và ".join("{" + s + "}" for s in missing))
+    return CompiledTemplate(source, tuple(literals), tuple(slots))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=12).hexdigest()
+
+
+# ═══════════════════════════════════════════════════════
+#  KHO TEMPLATE (LƯU TRONG THƯ MỤC CẤU HÌNH)
+# ═══════════════════════════════════════════════════════
+
+def config_dir() -> str:
+    """%APPDATA%/code-template-generator (Windows) hoặc ~/.config/code-template-generator."""
+    if os.name == "nt" and os.environ.get("APPDATA"):
+        base = os.environ["APPDATA"]
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, "code-template-generator")
+
+
+def _replace_json(path, data):
+    """Ghi JSON ra file tạm rồi rename → instance khác không bao giờ đọc file dở."""
+    import tempfile
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class TemplateStore:
+    """
+    Template + ngôn ngữ thêm vào, lưu ở <config_dir>/templates.json;
+    bản biên dịch cache ở templates.cache.json (theo hash của format).
+    - Đọc lười: lần đầu gọi templates() mới đọc file
+    - templates() stat file mỗi lần gọi; file đổi (instance khác lưu) → đọc lại
+    - dict trả về coi như chỉ-đọc: mỗi lần lưu tạo dict mới, nên luồng batch
+      đang dùng dict cũ không bị ảnh hưởng
+    """
+
+    def __init__(self, folder=None):
+        folder          = folder or config_dir()
+        self.path       = os.path.join(folder, "templates.json")
+        self.cache_path = os.path.join(folder, "templates.cache.json")
+        self.error      = None          # lỗi đọc file gần nhất (giữ bản cũ)
+        self._templates = None
+        self._stat      = None
+        self._lock      = threading.Lock()
+
+    def _disk_stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def changed(self) -> bool:
+        return self._templates is None or self._disk_stat() != self._stat
+
+    def templates(self) -> dict:
+        if self.changed():
+            self.reload()
+        return self._templates
+
+    def reload(self):
+        with self._lock:
+            stat = self._disk_stat()
+            if stat is None:
+                fresh = {lang: dict(data) for lang, data in DEFAULT_TEMPLATES.items()}
+            else:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        raw = json.load(f)["templates"]
+                    fresh = {str(lang): {"ext": data["ext"], "format": data["format"]}
+                             for lang, data in raw.items()}
+                except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+                    self.error = f"Không đọc được {self.path}: {exc}"
+                    self._stat = stat
+                    if self._templates is None:
+                        self._templates = {lang: dict(data)
+                                           for lang, data in DEFAULT_TEMPLATES.items()}
+                    return
+            self.error = None
+            self._load_compiled(fresh)
+            self._templates, self._stat = fresh, stat
+
+    def _load_compiled(self, templates):
+        """Nạp bản biên dịch từ cache; format không có trong cache sẽ biên dịch khi cần."""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        for data in templates.values():
+            source = data["format"]
+            hit    = cache.get(text_hash(source)) if isinstance(cache, dict) else None
+            if source not in _COMPILED and isinstance(hit, dict):
+                try:
+                    _COMPILED[source] = CompiledTemplate(
+                        source, tuple(hit["literals"]), tuple(hit["slots"]))
+                except (KeyError, TypeError):
+                    pass
+
+    def save(self, lang: str, ext: str, fmt: str):
+        """
+        Lưu một ngôn ngữ (thêm mới nếu chưa có). Đọc lại file trước khi ghi
+        để không đè mất thay đổi của instance khác. Template lỗi → TemplateError.
+        """
+        compiled = compile_template(fmt)
+        self.reload()
+        with self._lock:
+            fresh = {k: dict(v) for k, v in self._templates.items()}
+            fresh[lang] = {"ext": ext, "format": fmt}
+            _replace_json(self.path, {"version": 1, "templates": fresh})
+            cache = {}
+            for data in fresh.values():
+                try:
+                    c = compiled if data["format"] == fmt else compile_template(data["format"])
+                except TemplateError:
+                    continue
+                cache[text_hash(c.source)] = {"literals": c.literals, "slots": c.slots}
+            try:
+                _replace_json(self.cache_path, cache)
+            except OSError:
+                pass                    # cache chỉ để tăng tốc, thiếu cũng được
+            self._templates, self._stat = fresh, self._disk_stat()
+
+
+# ═══════════════════════════════════════════════════════
+#  GHI FILE AN TOÀN
+# ═══════════════════════════════════════════════════════
+
+WRITE_POLICIES = {                # policy → mô tả (khi file đích đã tồn tại)
+    "overwrite":      "Ghi đè",
+    "skip":           "Bỏ qua",
+    "skip-identical": "Bỏ qua nếu giống hệt, khác thì ghi đè",
+    "suffix":         "Ghi sang tên mới: _2, _3…",
+    "backup":         "Ghi đè, sao lưu bản cũ thành .~1~, .~2~…",
+}
+STATUSES    = ("created", "overwritten", "renamed", "backup", "skipped", "identical")
+WRITTEN     = ("created", "overwritten", "renamed", "backup")   # trạng thái có ghi ra đĩa
+FSYNC_BATCH = 64                  # số file gom lại trước mỗi lượt fsync + rename
+LIST_AFTER  = 8                   # quá số file này trong một thư mục → listdir một lần thay vì stat
+
+
+def _temp_beside(path):
+    """Tên file tạm ẩn cùng thư mục với path (rename sang path là nguyên tử)."""
+    folder, base = os.path.split(path)
+    return os.path.join(folder, f".{base}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+
+def _discard(paths):
+    for p in paths:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+def _fsync_path(path, directory=False):
+    """fsync theo đường dẫn; thư mục chỉ fsync được trên POSIX."""
+    if directory and os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY if directory else os.O_RDWR)
+    try:
+        os.fsync(fd)
+    except OSError:
+        if not directory:
+            raise
+    finally:
+        os.close(fd)
+
+
+def _backup_name(path):
+    n = 1
+    while os.path.exists(f"{path}.~{n}~"):
+        n += 1
+    return f"{path}.~{n}~"
+
+
+def _make_backup(path):
+    """Giữ bản hiện tại của path dưới tên .~N~ (hard link, không được thì copy)."""
+    backup = _backup_name(path)
+    try:
+        os.link(path, backup)
+    except OSError:
+        import shutil
+        shutil.copy2(path, backup)
+    return backup
+
+
+class FileWriter:
+    """
+    Ghi file bài tập: nội dung ra file tạm cạnh đích rồi os.replace, nên
+    crash giữa chừng không bao giờ để lại file cụt.
+    - policy:  xử lý khi đích đã tồn tại (WRITE_POLICIES), không bao giờ hỏi
+    - durable: fsync dữ liệu trước khi rename và fsync thư mục sau đó;
+               gom theo lô `batch` file (None = cả lần chạy) cho mỗi lượt
+    - atomic:  flush() là một giao dịch — hoặc mọi file vào chỗ, hoặc hoàn
+               tác hết rồi ném OSError
+    write() an toàn khi gọi từ nhiều thread; file chỉ xuất hiện ở đích sau
+    flush() (tự gọi khi lô đầy, hoặc khi ra khỏi `with`).
+    File nào đã tồn tại: vài file đầu trong một thư mục được stat riêng (ghi
+    lẻ một file không phải listdir cả thư mục lớn), sau đó là một lần listdir
+    cho cả thư mục.
+    """
+
+    def __init__(self, policy="skip", durable=True, atomic=False, batch=FSYNC_BATCH):
+        if policy not in WRITE_POLICIES:
+            raise ValueError(f"policy không hợp lệ: {policy} (có: {', '.join(WRITE_POLICIES)})")
+        self.policy   = policy
+        self.durable  = durable
+        self.atomic   = atomic
+        self.batch    = batch
+        self._lock    = threading.Lock()
+        self._claimed = set()        # đích đã được giao trong writer này
+        self._listing = {}           # thư mục → tên file có sẵn (normcase)
+        self._lookups = {}           # thư mục → số lần đã stat, trước khi listdir
+        self._pending = []           # (file tạm, đích, trạng thái)
+        self._failed  = []           # rename lỗi ở các lượt flush tự động
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_):
+        if exc_type is not None:
+            self.discard()
+            return
+        failed = self.flush()
+        if failed:
+            raise OSError(f"không ghi được {failed[0][0]}: {failed[0][1]}")
+
+    # ── Ghi ─────────────────────────────────────────────
+
+    def _exists(self, path):
+        """Đích có sẵn trên đĩa lúc writer bắt đầu ghi vào thư mục đó. Gọi khi giữ _lock."""
+        folder, name = os.path.split(os.path.abspath(path))
+        names = self._listing.get(folder)
+        if names is None:
+            seen = self._lookups[folder] = self._lookups.get(folder, 0) + 1
+            if seen <= LIST_AFTER:
+                return os.path.exists(path)
+            try:
+                names = {os.path.normcase(n) for n in os.listdir(folder)}
+            except OSError:
+                names = set()               # thư mục chưa có → mọi file đều mới
+            self._listing[folder] = names
+        return os.path.normcase(name) in names
+
+    def _plan(self, path):
+        """→ (trạng thái, đích thật, cần so nội dung). Gọi khi đang giữ _lock."""
+        taken = path in self._claimed
+        if not taken and not self._exists(path):
+            return "created", path, False
+        if self.policy == "skip":
+            return "skipped", path, False
+        if self.policy == "skip-identical":
+            return "overwritten", path, not taken
+        if self.policy == "suffix":
+            base, ext = os.path.splitext(path)
+            n = 2
+            while f"{base}_{n}{ext}" in self._claimed or self._exists(f"{base}_{n}{ext}"):
+                n += 1
+            return "renamed", f"{base}_{n}{ext}", False
+        return ("backup" if self.policy == "backup" else "overwritten"), path, False
+
+    def write(self, path: str, content: str):
+        """
+        Trả về (trạng thái, đích thật): 'created' | 'overwritten' | 'renamed'
+        (policy suffix) | 'backup' | 'skipped' | 'identical'. Lỗi ghi → OSError.
+        """
+        with self._lock:
+            status, target, compare = self._plan(path)
+            if status not in WRITTEN:
+                return status, target
+            self._claimed.add(target)
+        if compare:                         # skip-identical: đọc file cũ ngoài khoá
+            try:
+                same = _read_text_raw(target) == content
+            except (OSError, UnicodeDecodeError):
+                same = False
+            if same:
+                with self._lock:
+                    self._claimed.discard(target)
+                return "identical", target
+        tmp = _temp_beside(target)
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(content)
+        except OSError:
+            _discard([tmp])
+            with self._lock:
+                self._claimed.discard(target)
+            raise
+        with self._lock:
+            self._pending.append((tmp, target, status))
+            full = self.batch is not None and len(self._pending) >= self.batch
+        if full and not self.atomic:
+            failed = self.flush()
+            with self._lock:
+                self._failed += failed      # trả về ở lần flush() kế tiếp
+        return status, target
+
+    def discard(self):
+        """Bỏ mọi file đang chờ (chưa rename), đích không bị đụng tới."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        _discard([tmp for tmp, _, _ in pending])
+
+    # ── Flush ───────────────────────────────────────────
+
+    def flush(self) -> list:
+        """
+        fsync cả lô → rename từng file vào chỗ → fsync các thư mục một lần.
+        Trả về [(đích, lý do)] các file không rename được (không atomic), kể cả
+        ở các lượt flush tự động trước đó.
+        atomic: lỗi bất kỳ → hoàn tác cả lô và ném OSError.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+            earlier, self._failed  = self._failed, []
+        if not pending:
+            return earlier
+        try:
+            if self.durable:
+                for tmp, _, _ in pending:
+                    _fsync_path(tmp)
+        except OSError:
+            _discard([tmp for tmp, _, _ in pending])
+            if self.atomic:
+                raise
+            return earlier + [(target, "fsync lỗi") for _, target, _ in pending]
+
+        failed = earlier
+        if self.atomic:
+            self._commit_all(pending)
+        else:
+            for tmp, target, status in pending:
+                try:
+                    if status == "backup":
+                        _make_backup(target)
+                    os.replace(tmp, target)
+                except OSError as exc:
+                    _discard([tmp])
+                    failed.append((target, str(exc)))
+        if self.durable:
+            for folder in {os.path.dirname(os.path.abspath(t)) for _, t, _ in pending}:
+                _fsync_path(folder, directory=True)
+        return failed
+
+    def _commit_all(self, pending):
+        """Rename cả lô; lỗi giữa chừng → trả lại đúng trạng thái cũ rồi ném lại lỗi."""
+        done    = []                               # (đích, bản giữ tạm file cũ | None)
+        backups = []
+        try:
+            for tmp, target, status in pending:
+                if status == "backup":
+                    backups.append(_make_backup(target))
+                keep = None
+                if os.path.exists(target):
+                    keep = _temp_beside(target) + ".old"
+                    os.replace(target, keep)
+                done.append((target, keep))
+                os.replace(tmp, target)
+        except OSError:
+            for target, keep in reversed(done):
+                try:
+                    if keep is not None:
+                        os.replace(keep, target)
+                    elif os.path.exists(target):
+                        os.remove(target)
+                except OSError:
+                    pass
+            _discard(backups + [tmp for tmp, _, _ in pending])
+            raise
+        _discard([keep for _, keep in done if keep is not None])
+
+
+# ═══════════════════════════════════════════════════════
+#  RENDER & SINH FILE HÀNG LOẠT
+# ═══════════════════════════════════════════════════════
+
+def render_content(tmpl: dict, file_name: str, problem: str, solution: str) -> str:
+    """Ghép đề bài + lời giải vào template đã biên dịch. Template lỗi → TemplateError."""
+    return compile_template(tmpl["format"]).render({
+        "problem":  problem  or EMPTY_PROBLEM,
+        "solution": solution or EMPTY_SOLUTION,
+        "filename": file_name,
+    })
+
+
+def lang_by_ext(templates: dict) -> dict:
+    """'.py' → 'Python' (ext đầu tiên thắng nếu trùng)."""
+    out = {}
+    for lang, data in templates.items():
+        out.setdefault(data["ext"].lower(), lang)
+    return out
+
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+
+def _read_text_raw(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _read_block_manifest(path):
+    """
+    Manifest dạng YAML đơn giản:
+        - name: ex01
+          lang: C++
+          problem_file: p01.txt
+          solution_file: s01.cpp
+    """
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("- "):
+                entries.append({})
+                line = line[2:]
+            key, sep, value = line.partition(":")
+            if sep and entries:
+                entries[-1][key.strip()] = value.strip().strip('"\'')
+    return entries
+
+
+def _read_folder(folder, templates):
+    """Thư mục gồm các cặp NN_problem.txt / NN_solution.<ext>."""
+    by_ext   = lang_by_ext(templates)
+    problems = {}
+    entries  = {}
+    for name in sorted(os.listdir(folder)):
+        m = re.fullmatch(r"(\d+)_problem\.txt", name)
+        if m:
+            problems[m.group(1)] = name
+            continue
+        m = re.fullmatch(r"(\d+)_solution(\.\w+)", name)
+        if m:
+            entries[m.group(1)] = {
+                "name":          m.group(1),
+                "lang":          by_ext.get(m.group(2).lower(), ""),
+                "solution_file": name,
+            }
+    for nn, prob in problems.items():
+        entries.setdefault(nn, {"name": nn, "lang": ""})["problem_file"] = prob
+    return [entries[nn] for nn in sorted(entries)]
+
+
+def read_manifest(source: str, templates: dict) -> list:
+    """
+    Đọc danh sách bài tập từ .json / .csv / .yaml (.yml, .txt) hoặc một thư mục.
+    Mỗi mục: name, lang, problem | problem_file, solution | solution_file
+    (đường dẫn tương đối tính từ thư mục chứa manifest).
+    Trả về list dict {name, lang, problem, solution, error}.
+    """
+    import csv
+    if os.path.isdir(source):
+        base, raw = source, _read_folder(source, templates)
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        ext  = os.path.splitext(source)[1].lower()
+        if ext == ".json":
+            with open(source, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            if isinstance(raw, dict):
+                raw = raw.get("items", [])
+        elif ext == ".csv":
+            with open(source, "r", encoding="utf-8", newline="") as f:
+                raw = list(csv.DictReader(f))
+        else:
+            raw = _read_block_manifest(source)
+
+    by_ext  = lang_by_ext(templates)
+    entries = []
+    for item in raw:
+        if not isinstance(item, dict):
+            raise ValueError(f"mục manifest không hợp lệ: {item!r}")
+        item  = {k.strip().lower(): (v or "") for k, v in item.items() if k}
+        entry = {
+            "name":     str(item.get("name", "")).strip(),
+            "lang":     str(item.get("lang") or item.get("language") or "").strip(),
+            "problem":  str(item.get("problem", "")).strip(),
+            "solution": str(item.get("solution", "")).strip(),
+            "error":    None,
+        }
+        try:
+            if item.get("problem_file"):
+                entry["problem_file"] = os.path.join(base, item["problem_file"])
+                entry["problem"]      = _read_text(entry["problem_file"])
+            if item.get("solution_file"):
+                entry["solution_file"] = os.path.join(base, item["solution_file"])
+                entry["solution"]      = _read_text(entry["solution_file"])
+                if not entry["lang"]:
+                    sol_ext = os.path.splitext(item["solution_file"])[1].lower()
+                    entry["lang"] = by_ext.get(sol_ext, "")
+        except (OSError, UnicodeDecodeError) as exc:
+            entry["error"] = f"không đọc được file: {exc}"
+        entries.append(entry)
+    return entries
+
+
+def check_name(full_name: str):
+    """Tên file (kèm ext) chứa ký tự cấm → ValueError."""
+    if any(ch in full_name for ch in ILLEGAL_CHARS):
+        raise ValueError(f"Tên file không được chứa các ký tự: {ILLEGAL_CHARS}")
+
+
+def write_exercise(tmpl: dict, name: str, problem: str, solution: str,
+                   save_dir: str, policy="skip", lang=None):
+    """
+    Render + ghi một bài tập qua FileWriter. Trả về (trạng thái, đường dẫn thật),
+    trạng thái xem FileWriter.write.
+    Có lang → file được ghi vào manifest của save_dir (để rebuild sau này).
+    Lỗi: TemplateError, ValueError (tên file / policy), OSError.
+    """
+    full_name = name + tmpl["ext"]
+    check_name(full_name)
+    content = render_content(tmpl, name, problem, solution)
+    os.makedirs(save_dir or ".", exist_ok=True)
+    with FileWriter(policy) as writer:
+        status, path = writer.write(os.path.join(save_dir, full_name), content)
+    if lang is not None and status in WRITTEN:
+        _record_quietly(save_dir, {os.path.basename(path): make_record(
+            tmpl, lang, name, problem, solution, content)})
+    return status, path
+
+
+def _new_report(save_dir, *keys):
+    report = {k: [] for k in keys + ("errors",)}
+    report["dir"] = save_dir
+    return report
+
+
+def _drop_failed(report, failed, records=None):
+    """Rename lỗi lúc flush → chuyển file đó từ danh sách đã ghi sang errors."""
+    for path, why in failed:
+        full_name = os.path.basename(path)
+        for key, names in report.items():
+            if key != "errors" and isinstance(names, list) and full_name in names:
+                names.remove(full_name)
+        if records is not None:
+            records.pop(full_name, None)
+        report["errors"].append((full_name, f"không ghi được: {why}"))
+
+
+def render_batch(entries: list, templates: dict, save_dir: str,
+                 policy="skip", workers=BATCH_WORKERS) -> dict:
+    """
+    Render + ghi toàn bộ entries vào save_dir qua một FileWriter chung
+    (policy áp cho file đã tồn tại, không bao giờ hỏi; fsync theo lô).
+    Ghi file song song qua thread pool.
+    Trả về báo cáo {created, overwritten, renamed, backup, skipped, identical,
+    errors: [(name, lý do)]}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    os.makedirs(save_dir, exist_ok=True)
+    report = _new_report(save_dir, *STATUSES)
+    jobs   = []
+    taken  = set()
+
+    for e in entries:
+        name = e["name"] or "(không tên)"
+        if e.get("error"):
+            report["errors"].append((name, e["error"]))
+            continue
+        if not e["name"]:
+            report["errors"].append((name, "thiếu tên file"))
+            continue
+        tmpl = templates.get(e["lang"])
+        if tmpl is None:
+            report["errors"].append((name, f"ngôn ngữ không hợp lệ: '{e['lang']}'"))
+            continue
+        full_name = e["name"] + tmpl["ext"]
+        try:
+            check_name(full_name)
+        except ValueError as exc:
+            report["errors"].append((name, str(exc)))
+            continue
+        if full_name in taken:
+            report["errors"].append((name, f"trùng tên trong manifest: {full_name}"))
+            continue
+        taken.add(full_name)
+        try:
+            content = render_content(tmpl, e["name"], e["problem"], e["solution"])
+        except TemplateError as exc:
+            report["errors"].append((name, f"template '{e['lang']}' lỗi: {exc}"))
+            continue
+        jobs.append((full_name, e, tmpl, content))
+
+    records = {}
+    writer  = FileWriter(policy)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(full_name, e, tmpl, content,
+                    pool.submit(writer.write, os.path.join(save_dir, full_name), content))
+                   for full_name, e, tmpl, content in jobs]
+        for full_name, e, tmpl, content, fut in futures:
+            try:
+                status, path = fut.result()
+            except OSError as exc:
+                report["errors"].append((full_name, f"không ghi được: {exc}"))
+                continue
+            report[status].append(os.path.basename(path))
+            if status in WRITTEN:
+                records[os.path.basename(path)] = make_record(
+                    tmpl, e["lang"], e["name"], e["problem"], e["solution"], content,
+                    e.get("problem_file"), e.get("solution_file"))
+    _drop_failed(report, writer.flush(), records)
+    _record_quietly(save_dir, records)
+    return report
+
+
+def fan_out(templates: dict, name: str, problem: str, solutions: dict, save_dir: str,
+            policy="skip", atomic=False, workers=BATCH_WORKERS) -> dict:
+    """
+    Sinh cùng một đề cho nhiều ngôn ngữ: solutions = {lang: code}.
+    Render tất cả trước, rồi ghi song song qua một FileWriter.
+    atomic=True: hoặc đủ cả bộ, hoặc không file nào thay đổi — lỗi render,
+      file đã tồn tại với policy 'skip', hay lỗi ghi / rename giữa chừng
+      đều huỷ cả bộ (FileWriter atomic hoàn tác phần đã rename).
+    Trả về báo cáo như render_batch.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    report = _new_report(save_dir, *STATUSES)
+    jobs   = []                                   # (lang, path, content)
+    for lang, solution in solutions.items():
+        tmpl = templates.get(lang)
+        if tmpl is None:
+            report["errors"].append((lang, "ngôn ngữ không hợp lệ"))
+            continue
+        full_name = name + tmpl["ext"]
+        try:
+            check_name(full_name)
+            content = render_content(tmpl, name, problem, solution)
+        except ValueError as exc:                 # gồm cả TemplateError
+            report["errors"].append((full_name, str(exc)))
+            continue
+        path = os.path.join(save_dir, full_name)
+        if atomic and policy == "skip" and os.path.exists(path):
+            report["errors"].append((full_name, "đã tồn tại"))
+            continue
+        jobs.append((lang, path, content))
+    if len({path for _, path, _ in jobs}) < len(jobs):
+        report["errors"].append((name, "hai ngôn ngữ dùng chung extension"))
+    if atomic and report["errors"]:
+        return report                             # chưa ghi gì cả
+    os.makedirs(save_dir, exist_ok=True)
+
+    records = {}
+    writer  = FileWriter(policy, atomic=atomic, batch=None)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(lang, content, pool.submit(writer.write, path, content))
+                   for lang, path, content in jobs]
+        for lang, content, fut in futures:
+            try:
+                status, path = fut.result()
+            except OSError as exc:
+                report["errors"].append((lang, f"không ghi được: {exc}"))
+                continue
+            report[status].append(os.path.basename(path))
+            if status in WRITTEN:
+                records[os.path.basename(path)] = make_record(
+                    templates[lang], lang, name, problem, solutions[lang], content)
+
+    if atomic and report["errors"]:
+        writer.discard()
+        for key in STATUSES:
+            report[key] = []
+        return report
+    try:
+        failed = writer.flush()
+    except OSError as exc:                        # atomic: đã hoàn tác toàn bộ
+        for key in STATUSES:
+            report[key] = []
+        report["errors"].append((name, f"không hoàn tất, đã hoàn tác: {exc}"))
+        return report
+    _drop_failed(report, failed, records)
+    _record_quietly(save_dir, records)
+    return report
+
+
+def format_report(report: dict, limit=50) -> str:
+    """Báo cáo tổng kết một lần chạy hàng loạt."""
+    lines = [
+        f"Tạo mới:  {len(report['created'])}",
+        f"Ghi đè:   {len(report['overwritten'])}",
+        f"Bỏ qua (đã tồn tại): {len(report['skipped'])}",
+    ]
+    for key, label in (("identical", "Giống hệt (giữ nguyên)"),
+                       ("renamed",   "Ghi sang tên mới (_2…)"),
+                       ("backup",    "Ghi đè, đã sao lưu bản cũ")):
+        if report.get(key):
+            lines.append(f"{label}: {len(report[key])}")
+    lines.append(f"Lỗi:      {len(report['errors'])}")
+    if report["errors"]:
+        lines.append("")
+        lines += [f"  ✖ {name}: {why}" for name, why in report["errors"][:limit]]
+        if len(report["errors"]) > limit:
+            lines.append(f"  … và {len(report['errors']) - limit} lỗi khác")
+    return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════
+#  MANIFEST SINH FILE & REBUILD
+# ═══════════════════════════════════════════════════════
+#
+# <save_dir>/.template_manifest.json:
+#   {"version": 1, "files": {"ex01.py": {name, lang, problem, solution,
+#     problem_file?, solution_file?, template, inputs, content}}}
+# template / inputs / content là text_hash của format, của đầu vào và của
+# nội dung đã ghi ra đĩa.
+# <save_dir>/.template_manifest.log: mỗi dòng ["ex01.py", record], dòng sau
+# đè dòng trước. Mỗi lần sinh file chỉ nối thêm vài dòng (không ghi lại cả
+# manifest); rebuild gộp log vào file .json rồi xoá log.
+
+_MANIFEST_LOCK = threading.Lock()
+
+
+class _ManifestLock:
+    """Khoá manifest của save_dir, giữa các thread và giữa các tiến trình (GUI, CLI, --serve)."""
+
+    def __init__(self, save_dir):
+        self.path = os.path.join(save_dir, MANIFEST_NAME + ".lock")
+        self.fd   = None
+
+    def __enter__(self):
+        _MANIFEST_LOCK.acquire()
+        try:
+            self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    def __exit__(self, *_exc):
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        self._release()
+
+    def _release(self):
+        if self.fd is not None:
+            os.close(self.fd)           # đóng fd cũng nhả flock
+            self.fd = None
+        _MANIFEST_LOCK.release()
+
+
+def inputs_hash(name: str, problem: str, solution: str) -> str:
+    return text_hash("\0".join((name, problem, solution)))
+
+
+def make_record(tmpl, lang, name, problem, solution, content,
+                problem_file=None, solution_file=None) -> dict:
+    rec = {
+        "name":     name,
+        "lang":     lang,
+        "problem":  problem,
+        "solution": solution,
+        "template": text_hash(tmpl["format"]),
+        "inputs":   inputs_hash(name, problem, solution),
+        "content":  text_hash(content),
+    }
+    if problem_file:
+        rec["problem_file"] = os.path.abspath(problem_file)
+    if solution_file:
+        rec["solution_file"] = os.path.abspath(solution_file)
+    return rec
+
+
+def load_generated(save_dir: str) -> dict:
+    """{tên file: record} từ manifest của save_dir (+ log); {} nếu chưa có / hỏng."""
+    try:
+        with open(os.path.join(save_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            files = json.load(f).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        files = {}
+    if not isinstance(files, dict):
+        files = {}
+    try:
+        with open(os.path.join(save_dir, MANIFEST_LOG), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    name, rec = json.loads(line)
+                except ValueError:
+                    continue                # dòng cuối đang ghi dở / hỏng
+                if isinstance(name, str) and isinstance(rec, dict):
+                    files[name] = rec
+    except (OSError, UnicodeDecodeError):
+        pass
+    return files
+
+
+def record_generated(save_dir: str, records: dict, compact=False):
+    """
+    Nối records vào log của manifest: chi phí theo số record mới, không theo
+    kích thước manifest. compact=True gộp log vào manifest trước (rebuild).
+    """
+    if not records and not compact:
+        return
+    lines = "".join(json.dumps([name, rec], ensure_ascii=False) + "\n"
+                    for name, rec in records.items())
+    log   = os.path.join(save_dir, MANIFEST_LOG)
+    with _ManifestLock(save_dir):
+        if compact and os.path.exists(log):
+            # Manifest mới = cũ + log; nếu dừng giữa chừng, đọc lại log chỉ lặp lại cùng giá trị
+            _replace_json(os.path.join(save_dir, MANIFEST_NAME),
+                          {"version": 1, "files": load_generated(save_dir)})
+            open(log, "w").close()
+        if lines:
+            with open(log, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+def _record_quietly(save_dir, records):
+    # File bài tập đã ghi xong; manifest lỗi chỉ làm rebuild sau này không biết file đó
+    try:
+        record_generated(save_dir, records)
+    except OSError:
+        pass
+
+
+def _rebuild_one(save_dir, full_name, rec, tmpl, force, writer):
+    """→ (trạng thái, record mới | None, lý do). Chạy trong thread pool."""
+    problem, solution = rec.get("problem", ""), rec.get("solution", "")
+    try:
+        if rec.get("problem_file") and os.path.exists(rec["problem_file"]):
+            problem = _read_text(rec["problem_file"])
+        if rec.get("solution_file") and os.path.exists(rec["solution_file"]):
+            solution = _read_text(rec["solution_file"])
+    except (OSError, UnicodeDecodeError) as exc:
+        return "error", None, f"không đọc được file nguồn: {exc}"
+
+    path = os.path.join(save_dir, full_name)
+    if (not force and rec.get("template") == text_hash(tmpl["format"])
+            and rec.get("inputs") == inputs_hash(rec["name"], problem, solution)
+            and os.path.exists(path)):
+        return "unchanged", None, ""          # không render, không chạm tới file
+
+    try:
+        content = render_content(tmpl, rec["name"], problem, solution)
+    except TemplateError as exc:
+        return "error", None, f"template '{rec['lang']}' lỗi: {exc}"
+    try:
+        on_disk = text_hash(_read_text_raw(path))
+    except FileNotFoundError:
+        on_disk = None
+    except (OSError, UnicodeDecodeError) as exc:
+        return "error", None, f"không đọc được: {exc}"
+    if on_disk is not None and on_disk != rec.get("content") and not force:
+        return "modified", None, "file đã bị sửa tay sau khi sinh (dùng --force để ghi đè)"
+
+    new_rec = make_record(tmpl, rec["lang"], rec["name"], problem, solution, content,
+                          rec.get("problem_file"), rec.get("solution_file"))
+    if on_disk == new_rec["content"]:
+        return "unchanged", new_rec, ""       # nội dung y hệt → giữ nguyên mtime
+    try:
+        writer.write(path, content)
+    except OSError as exc:
+        return "error", None, f"không ghi được: {exc}"
+    return "rebuilt", new_rec, ""
+
+
+def rebuild(save_dir: str, templates: dict, force=False, workers=BATCH_WORKERS) -> dict:
+    """
+    Sinh lại các file trong manifest của save_dir mà template hoặc đầu vào
+    (kể cả problem_file / solution_file gốc) đã đổi; song song qua thread pool.
+    File bị sửa tay sau khi sinh được giữ nguyên, trừ khi force=True.
+    Trả về {rebuilt, unchanged, modified, errors: [(tên, lý do)]}.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    report = {"rebuilt": [], "unchanged": [], "modified": [], "errors": [], "dir": save_dir}
+    jobs   = []
+    for full_name, rec in load_generated(save_dir).items():
+        tmpl = templates.get(rec.get("lang"))
+        if tmpl is None or "name" not in rec:
+            report["errors"].append((full_name, f"ngôn ngữ không hợp lệ: '{rec.get('lang')}'"))
+            continue
+        jobs.append((full_name, rec, tmpl))
+
+    records = {}
+    writer  = FileWriter("overwrite")       # đã quyết định ghi đè file nào ở _rebuild_one
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(full_name, pool.submit(_rebuild_one, save_dir, full_name, rec, tmpl,
+                                           force, writer))
+                   for full_name, rec, tmpl in jobs]
+        for full_name, fut in futures:
+            status, new_rec, why = fut.result()
+            if status == "error":
+                report["errors"].append((full_name, why))
+                continue
+            report[status].append(full_name)
+            if new_rec is not None:
+                records[full_name] = new_rec
+    _drop_failed(report, writer.flush(), records)
+    record_generated(save_dir, records, compact=True)
+    return report
+
+
+def format_rebuild_report(report: dict, limit=50) -> str:
+    lines = [
+        f"Sinh lại:     {len(report['rebuilt'])}",
+        f"Không đổi:    {len(report['unchanged'])}",
+        f"Sửa tay (giữ nguyên): {len(report['modified'])}",
+        f"Lỗi:          {len(report['errors'])}",
+    ]
+    if report["modified"]:
+        lines.append("")
+        lines += [f"  ✎ {name}" for name in report["modified"][:limit]]
+    if report["errors"]:
+        lines.append("")
+        lines += [f"  ✖ {name}: {why}" for name, why in report["errors"][:limit]]
+    return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════
+#  ĐỌC NGƯỢC FILE ĐÃ SINH → CATALOG
+# ═══════════════════════════════════════════════════════
+
+PARSE_CHUNK     = 64 * 1024     # đọc file theo khối, không đọc cả file một lần
+IMPORT_CHUNK    = 256           # số file mỗi job khi chia cho process pool
+IMPORT_INLINE   = 512           # cây nhỏ hơn thì parse ngay trong process hiện tại
+
+
+def parse_stream(compiled: CompiledTemplate, f, chunk=PARSE_CHUNK):
+    """
+    Tách một file đã sinh thành giá trị các slot bằng cách khớp lần lượt các
+    đoạn literal của template. f: file text đã mở. Không khớp → None.
+    Slot cuối lấy phần còn lại của file (trừ literal đuôi); các slot khác
+    kết thúc ở lần xuất hiện đầu tiên của literal kế tiếp.
+    """
+    buf = ""
+
+    def fill(need):
+        nonlocal buf
+        while len(buf) < need:
+            more = f.read(chunk)
+            if not more:
+                return False
+            buf += more
+        return True
+
+    head = compiled.literals[0]
+    if not fill(len(head)) or not buf.startswith(head):
+        return None
+    buf    = buf[len(head):]
+    values = {}
+    last   = len(compiled.slots) - 1
+
+    for i, slot in enumerate(compiled.slots):
+        lit = compiled.literals[i + 1]
+        if i == last:
+            rest = buf + f.read()
+            if not rest.endswith(lit):
+                return None
+            value = rest[:len(rest) - len(lit)]
+        else:
+            parts = []
+            while True:
+                k = buf.find(lit)
+                if k != -1:
+                    parts.append(buf[:k])
+                    buf = buf[k + len(lit):]
+                    break
+                keep = len(lit) - 1          # literal có thể nằm vắt qua hai khối
+                if len(buf) > keep:
+                    parts.append(buf[:len(buf) - keep])
+                    buf = buf[len(buf) - keep:]
+                more = f.read(chunk)
+                if not more:
+                    return None
+                buf += more
+            value = "".join(parts)
+        if slot in values and values[slot] != value:
+            return None                      # slot lặp lại phải cùng giá trị
+        values[slot] = value
+
+    if values.get("problem") == EMPTY_PROBLEM:
+        values["problem"] = ""
+    if values.get("solution") == EMPTY_SOLUTION:
+        values["solution"] = ""
+    return values
+
+
+def parse_file(path: str, candidates) -> dict:
+    """
+    candidates: [(lang, format)] cùng extension với file. Thử lần lượt, trả về
+    entry {name, lang, problem, solution, path, mtime, size} hoặc
+    {path, error} nếu không template nào khớp.
+    """
+    try:
+        st = os.stat(path)
+        for lang, fmt in candidates:
+            with open(path, "r", encoding="utf-8") as f:
+                values = parse_stream(compile_template(fmt), f)
+            if values is not None:
+                return {
+                    "name":     os.path.splitext(os.path.basename(path))[0],
+                    "lang":     lang,
+                    "problem":  values["problem"].strip(),
+                    "solution": values["solution"].strip(),
+                    "path":     path,
+                    "mtime":    st.st_mtime_ns,
+                    "size":     st.st_size,
+                }
+    except (OSError, UnicodeDecodeError, TemplateError) as exc:
+        return {"path": path, "error": str(exc)}
+    return {"path": path, "error": "không khớp template nào"}
+
+
+def candidates_by_ext(templates: dict) -> dict:
+    """'.c' → [(lang, format), …]: mọi template có thể đã sinh ra file đuôi đó."""
+    by_ext = {}
+    for lang, data in templates.items():
+        by_ext.setdefault(data["ext"].lower(), []).append((lang, data["format"]))
+    return by_ext
+
+
+def _parse_chunk(paths, by_ext):
+    return [parse_file(p, by_ext[os.path.splitext(p)[1].lower()]) for p in paths]
+
+
+def walk_exercises(root: str, exts) -> list:
+    """Mọi file có extension trong exts dưới root (bỏ qua file / thư mục ẩn)."""
+    out, stack = [], [root]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                if e.name.startswith("."):
+                    continue
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif os.path.splitext(e.name)[1].lower() in exts:
+                    out.append(e.path)
+    out.sort()
+    return out
+
+
+def import_tree(root: str, templates: dict, workers=None, paths=None) -> dict:
+    """
+    Quét root, đọc ngược từng file theo template cùng extension.
+    Cây lớn được chia khối cho process pool (parse là việc của CPU).
+    Trả về {"items": [entry…], "unmatched": [(path, lý do)…]}; items dùng được
+    luôn làm manifest cho render_batch (sinh lại theo template mới).
+    """
+    by_ext = candidates_by_ext(templates)
+    if paths is None:
+        paths = walk_exercises(root, by_ext)
+
+    workers = workers or os.cpu_count() or 1
+    chunks  = [paths[i:i + IMPORT_CHUNK] for i in range(0, len(paths), IMPORT_CHUNK)]
+    if len(paths) < IMPORT_INLINE or workers == 1:
+        results = [r for c in chunks for r in _parse_chunk(c, by_ext)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [r for rs in pool.map(_parse_chunk, chunks, [by_ext] * len(chunks))
+                       for r in rs]
+
+    catalog = {"items": [], "unmatched": []}
+    for r in results:
+        if "error" in r:
+            catalog["unmatched"].append((r["path"], r["error"]))
+        else:
+            catalog["items"].append(r)
+    return catalog
+
+
+def search_items(items, query: str) -> list:
+    """Mục chứa mọi từ trong query (không phân biệt hoa thường) ở tên, ngôn ngữ, đề, code."""
+    terms = query.lower().split()
+    return [e for e in items
+            if all(t in "\0".join((e["name"], e["lang"], e["problem"], e["solution"])).lower()
+                   for t in terms)]
+
+
+# ═══════════════════════════════════════════════════════
+#  CATALOG: CHỈ MỤC TOÀN VĂN TRÊN ĐĨA
+# ═══════════════════════════════════════════════════════
+
+CATALOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, root TEXT,
+                                  mtime INTEGER, size INTEGER);
+CREATE INDEX IF NOT EXISTS files_root ON files (root);
+"""
+# docs.rowid = files.id; FTS5 bỏ dấu nên "sang nguyen to" khớp "Sàng nguyên tố"
+CATALOG_FTS   = ("CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(name, lang, problem, solution, "
+                 "tokenize='unicode61 remove_diacritics 2')")
+CATALOG_PLAIN = "CREATE TABLE IF NOT EXISTS docs (rowid INTEGER PRIMARY KEY, name, lang, problem, solution)"
+
+
+class ExerciseIndex:
+    """
+    Catalog các bài tập đã sinh, lưu ở <config_dir>/catalog.db (sqlite).
+    - Theo dõi một số thư mục gốc (roots); rescan() chỉ parse lại file có
+      (mtime, size) đổi, xóa file không còn trên đĩa
+    - index_files() cập nhật ngay các file vừa ghi (form, batch, rebuild)
+    - search() dùng FTS5 (không có FTS5 → LIKE, chậm hơn nhưng vẫn đúng)
+    Mỗi thread dùng connection riêng, nên quét nền và tìm kiếm chạy song song được.
+    """
+
+    def __init__(self, path=None):
+        self.path   = path or os.path.join(config_dir(), "catalog.db")
+        self._local = threading.local()
+        self.fts    = True
+        self._db()                      # tạo schema ngay, lỗi đường dẫn báo sớm
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            import sqlite3
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = self._local.db = sqlite3.connect(self.path, timeout=10)
+            db.executescript(CATALOG_SCHEMA)
+            try:
+                db.execute(CATALOG_FTS)
+            except sqlite3.OperationalError:
+                db.execute(CATALOG_PLAIN)
+            self.fts = "fts5" in (db.execute(
+                "SELECT sql FROM sqlite_master WHERE name='docs'").fetchone()[0] or "").lower()
+        return db
+
+    # ── Roots ─────────────────────────────────────────────
+
+    def roots(self) -> list:
+        return [r[0] for r in self._db().execute("SELECT path FROM roots ORDER BY path")]
+
+    def add_root(self, root: str):
+        db = self._db()
+        with db:
+            db.execute("INSERT OR IGNORE INTO roots VALUES (?)", (os.path.abspath(root),))
+
+    # ── Cập nhật ──────────────────────────────────────────
+
+    def _upsert(self, db, root, items):
+        for e in items:
+            row = db.execute("SELECT id FROM files WHERE path=?", (e["path"],)).fetchone()
+            if row is None:
+                fid = db.execute("INSERT INTO files (path, root, mtime, size) VALUES (?, ?, ?, ?)",
+                                 (e["path"], root, e["mtime"], e["size"])).lastrowid
+            else:
+                fid = row[0]
+                db.execute("UPDATE files SET root=?, mtime=?, size=? WHERE id=?",
+                           (root, e["mtime"], e["size"], fid))
+                db.execute("DELETE FROM docs WHERE rowid=?", (fid,))
+            db.execute("INSERT INTO docs (rowid, name, lang, problem, solution) "
+                       "VALUES (?, ?, ?, ?, ?)",
+                       (fid, e["name"], e["lang"], e["problem"], e["solution"]))
+
+    def _remove(self, db, paths):
+        for path in paths:
+            row = db.execute("SELECT id FROM files WHERE path=?", (path,)).fetchone()
+            if row is not None:
+                db.execute("DELETE FROM docs WHERE rowid=?", (row[0],))
+                db.execute("DELETE FROM files WHERE id=?", (row[0],))
+
+    def index_files(self, paths, templates: dict, root: str):
+        """Parse + cập nhật đúng các file này (vừa được ghi); root được theo dõi luôn."""
+        root   = os.path.abspath(root)
+        by_ext = candidates_by_ext(templates)
+        paths  = [os.path.abspath(p) for p in paths
+                  if os.path.splitext(p)[1].lower() in by_ext]
+        results = _parse_chunk(paths, by_ext)
+        db = self._db()
+        with db:
+            db.execute("INSERT OR IGNORE INTO roots VALUES (?)", (root,))
+            self._upsert(db, root, [r for r in results if "error" not in r])
+            self._remove(db, [r["path"] for r in results if "error" in r])
+
+    def rescan(self, templates: dict, roots=None) -> dict:
+        """Đồng bộ chỉ mục với đĩa theo (mtime, size). Trả về {indexed, removed}."""
+        db    = self._db()
+        exts  = candidates_by_ext(templates)
+        stats = {"indexed": 0, "removed": 0}
+        for root in roots or self.roots():
+            known = {p: (m, s) for p, m, s in db.execute(
+                "SELECT path, mtime, size FROM files WHERE root=?", (root,))}
+            changed, seen = [], set()
+            for path in walk_exercises(root, exts):
+                seen.add(path)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if known.get(path) != (st.st_mtime_ns, st.st_size):
+                    changed.append(path)
+            gone    = [p for p in known if p not in seen]
+            catalog = import_tree(root, templates, paths=changed) if changed else \
+                {"items": [], "unmatched": []}
+            with db:
+                self._upsert(db, root, catalog["items"])
+                self._remove(db, gone + [p for p, _ in catalog["unmatched"]])
+            stats["indexed"] += len(catalog["items"])
+            stats["removed"] += len(gone)
+        return stats
+
+    # ── Tìm kiếm ──────────────────────────────────────────
+
+    def search(self, query: str, limit=200) -> list:
+        """
+        Bài chứa mọi từ trong query (tiền tố, không dấu, không phân biệt hoa thường).
+        Trả về [{path, name, lang, snippet}], tốt nhất trước.
+        """
+        terms = re.findall(r"\w+", query)
+        db    = self._db()
+        if not terms:
+            rows = db.execute(
+                "SELECT f.path, d.name, d.lang, substr(d.problem, 1, 120) "
+                "FROM files f JOIN docs d ON d.rowid = f.id ORDER BY d.name LIMIT ?", (limit,))
+        elif self.fts:
+            # remove_diacritics không coi đ là d có dấu → thử thêm biến thể đ
+            match = " AND ".join(
+                f'("{t}"* OR "{t.lower().replace("d", "đ")}"*)' if "d" in t.lower() else f'"{t}"*'
+                for t in terms)
+            rows  = db.execute(
+                "SELECT f.path, d.name, d.lang, snippet(docs, 2, '«', '»', '…', 12) "
+                "FROM docs d JOIN files f ON f.id = d.rowid "
+                "WHERE docs MATCH ? ORDER BY rank LIMIT ?", (match, limit))
+        else:
+            cond = " AND ".join(["(d.name || ' ' || d.lang || ' ' || d.problem || ' ' || "
+                                 "d.solution) LIKE ?"] * len(terms))
+            rows = db.execute(
+                "SELECT f.path, d.name, d.lang, substr(d.problem, 1, 120) "
+                f"FROM files f JOIN docs d ON d.rowid = f.id WHERE {cond} ORDER BY d.name LIMIT ?",
+                [f"%{t}%" for t in terms] + [limit])
+        return [{"path": p, "name": n, "lang": l, "snippet": " ".join((s or "").split())}
+                for p, n, l, s in rows]
+
+    def get(self, path: str):
+        """Toàn bộ nội dung đã index của một file ({name, lang, problem, solution}) hoặc None."""
+        row = self._db().execute(
+            "SELECT d.name, d.lang, d.problem, d.solution FROM files f "
+            "JOIN docs d ON d.rowid = f.id WHERE f.path=?", (path,)).fetchone()
+        return None if row is None else dict(zip(("name", "lang", "problem", "solution"), row))
+
+
+# ═══════════════════════════════════════════════════════
+#  KIỂM TRA LỜI GIẢI (BIÊN DỊCH & CHẠY TEST)
+# ═══════════════════════════════════════════════════════
+#
+# Test đi kèm (tuỳ chọn), cạnh file bài tập ex01.cpp:
+#   ex01.in / ex01.out              một cặp
+#   ex01.tests/1.in, 1.out, …       nhiều cặp
+# .in không có .out → chỉ kiểm tra chương trình chạy xong, mã thoát 0.
+
+COMPILE_TIMEOUT = 60            # giây cho một lần biên dịch
+RUN_TIMEOUT     = 5             # giây cho mỗi test
+VERIFY_OUTPUT   = 2000          # cắt bớt thông báo lỗi trong báo cáo
+
+_EXE = ".exe" if os.name == "nt" else ""
+
+# ext → (tên, công cụ cần có, lệnh biên dịch, lệnh chạy); {src} {dir} {exe} {cls}
+TOOLCHAINS = {
+    ".c":    ("gcc",       ("gcc",),          ["gcc", "-O1", "-o", "{exe}", "{src}", "-lm"],
+              ["{exe}"]),
+    ".cpp":  ("g++",       ("g++",),          ["g++", "-O1", "-o", "{exe}", "{src}"],
+              ["{exe}"]),
+    ".java": ("javac",     ("javac", "java"), ["javac", "-encoding", "UTF-8", "-d", "{dir}", "{src}"],
+              ["java", "-cp", "{dir}", "{cls}"]),
+    ".py":   ("py_compile", (),               None,
+              [sys.executable, "{src}"]),
+}
+
+
+def toolchain_for(path: str):
+    """Toolchain cho file, hoặc None nếu không hỗ trợ / máy chưa cài."""
+    import shutil
+    chain = TOOLCHAINS.get(os.path.splitext(path)[1].lower())
+    if chain is None or not all(shutil.which(tool) for tool in chain[1]):
+        return None
+    return chain
+
+
+def find_tests(path: str) -> list:
+    """[(file .in, file .out hoặc None)] đi kèm bài tập."""
+    stem  = os.path.splitext(path)[0]
+    pairs = []
+    if os.path.exists(stem + ".in"):
+        pairs.append((stem + ".in", stem + ".out" if os.path.exists(stem + ".out") else None))
+    folder = stem + ".tests"
+    if os.path.isdir(folder):
+        for name in sorted(os.listdir(folder)):
+            if name.endswith(".in"):
+                out = os.path.join(folder, name[:-3] + ".out")
+                pairs.append((os.path.join(folder, name), out if os.path.exists(out) else None))
+    return pairs
+
+
+def _same_output(got: str, want: str) -> bool:
+    """So sánh bỏ qua khoảng trắng cuối dòng và dòng trống cuối file."""
+    def norm(text):
+        return [line.rstrip() for line in text.replace("\r\n", "\n").rstrip().split("\n")]
+    return norm(got) == norm(want)
+
+
+def _verify_key(path, chain, tests) -> str:
+    # "2": Java được biên dịch theo tên public class; kết quả cache trước đó không còn đúng
+    parts = ["2", chain[0], _read_text_raw(path)]
+    for inp, out in tests:
+        parts += [os.path.basename(inp), _read_text_raw(inp), _read_text_raw(out) if out else ""]
+    return text_hash("\0".join(parts))
+
+
+def _subst(argv, **kw):
+    return [a.format(**kw) for a in argv]
+
+
+_JAVA_NOISE  = re.compile(r'/\*.*?\*/|//[^\n]*|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.S)
+_JAVA_PUBLIC = re.compile(r"\bpublic\s+(?:(?:final|abstract|sealed|strictfp)\s+)*"
+                          r"(?:class|interface|enum|record)\s+(\w+)")
+_JAVA_TYPE   = re.compile(r"\b(?:class|interface|enum|record)\s+(\w+)")
+_JAVA_MAIN   = re.compile(r"\bstatic\s+(?:(?:public|final)\s+)*void\s+main\s*\(")
+
+
+def java_classes(source: str):
+    """
+    → (tên file cần đặt, class để chạy) cho một file Java, hoặc None ở chỗ
+    không tìm thấy. javac bắt file trùng tên public class (thường là Main,
+    không phải ex01), còn java cần class chứa main.
+    """
+    code  = _JAVA_NOISE.sub(" ", source)         # đề bài nằm trong comment đầu file
+    pub   = _JAVA_PUBLIC.search(code)
+    main  = _JAVA_MAIN.search(code)
+    owner = None
+    if main:
+        types = [m for m in _JAVA_TYPE.finditer(code) if m.start() < main.start()]
+        owner = types[-1].group(1) if types else None
+    return (pub.group(1) if pub else None), owner
+
+
+def verify_one(path: str, run_tests=True, compile_timeout=COMPILE_TIMEOUT,
+               run_timeout=RUN_TIMEOUT) -> dict:
+    """
+    Biên dịch (và chạy test) một file trong thư mục tạm.
+    Trả về {path, status: pass|fail|skipped|error, stage, message, timeout}.
+    """
+    import py_compile
+    import subprocess
+    import tempfile
+
+    def result(status, stage="", message="", timeout=False):
+        return {"path": path, "status": status, "stage": stage,
+                "message": message[-VERIFY_OUTPUT:], "timeout": timeout}
+
+    chain = toolchain_for(path)
+    if chain is None:
+        return result("skipped", message="không có toolchain cho loại file này")
+    name, _tools, compile_cmd, run_cmd = chain
+    src = os.path.abspath(path)
+    with tempfile.TemporaryDirectory(prefix="verify-") as tmp:
+        kw = {"src": src, "dir": tmp, "exe": os.path.join(tmp, "prog" + _EXE),
+              "cls": os.path.splitext(os.path.basename(path))[0]}
+        try:
+            if "{cls}" in run_cmd:
+                # Java: biên dịch bản chép tên <public class>.java, chạy class có main
+                file_cls, main_cls = java_classes(_read_text_raw(src))
+                kw["src"] = os.path.join(tmp, (file_cls or kw["cls"]) + ".java")
+                kw["cls"] = main_cls or file_cls or kw["cls"]
+                with open(kw["src"], "w", encoding="utf-8") as f:
+                    f.write(_read_text_raw(src))
+            if compile_cmd is None:
+                py_compile.compile(src, cfile=os.path.join(tmp, "prog.pyc"), doraise=True)
+            else:
+                proc = subprocess.run(_subst(compile_cmd, **kw), cwd=tmp, capture_output=True,
+                                      text=True, errors="replace", timeout=compile_timeout)
+                if proc.returncode != 0:
+                    return result("fail", "compile", proc.stderr or proc.stdout)
+        except subprocess.TimeoutExpired:
+            return result("error", "compile", f"{name}: quá {compile_timeout}s", timeout=True)
+        except py_compile.PyCompileError as exc:
+            return result("fail", "compile", str(exc))
+        except (OSError, UnicodeDecodeError) as exc:
+            return result("error", "compile", str(exc))
+
+        if not run_tests:
+            return result("pass", "compile")
+        tests = find_tests(path)
+        for inp, out in tests:
+            label = os.path.basename(inp)
+            try:
+                with open(inp, "r", encoding="utf-8") as f:
+                    proc = subprocess.run(_subst(run_cmd, **kw), cwd=tmp, stdin=f,
+                                          capture_output=True, text=True, encoding="utf-8",
+                                          errors="replace", timeout=run_timeout)
+            except subprocess.TimeoutExpired:
+                return result("fail", "test", f"{label}: quá {run_timeout}s", timeout=True)
+            except OSError as exc:
+                return result("error", "test", f"{label}: {exc}")
+            if proc.returncode != 0:
+                return result("fail", "test", f"{label}: mã thoát {proc.returncode}\n{proc.stderr}")
+            if out is not None and not _same_output(proc.stdout, _read_text_raw(out)):
+                return result("fail", "test", f"{label}: sai output\n{proc.stdout}")
+        return result("pass", "test" if tests else "compile")
+
+
+def verify(paths, run_tests=True, workers=None, cache_path=None, **timeouts) -> list:
+    """
+    Kiểm tra nhiều file song song. Mỗi job chủ yếu chờ trình biên dịch /
+    chương trình (process con), nên dùng thread pool cỡ số CPU.
+    Kết quả pass/fail lưu cache theo hash (nội dung file + test + toolchain):
+    file không đổi thì không biên dịch lại. Lỗi hạ tầng / timeout không cache.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    cache_path = cache_path or os.path.join(config_dir(), "verify_cache.json")
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    results, jobs = {}, []
+    for path in paths:
+        chain = toolchain_for(path)
+        if chain is None:
+            results[path] = verify_one(path)
+            continue
+        tests = find_tests(path) if run_tests else []
+        try:
+            key = _verify_key(path, chain, tests) + ("" if run_tests else ":c")
+        except (OSError, UnicodeDecodeError) as exc:
+            results[path] = {"path": path, "status": "error", "stage": "", "message": str(exc)}
+            continue
+        hit = cache.get(key)
+        if hit is not None:
+            results[path] = dict(hit, path=path, cached=True)
+        else:
+            jobs.append((path, key))
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [(path, key, pool.submit(verify_one, path, run_tests, **timeouts))
+                   for path, key in jobs]
+        for path, key, fut in futures:
+            res = results[path] = fut.result()
+            if res["status"] in ("pass", "fail") and not res["timeout"]:
+                cache[key] = {k: res[k] for k in ("status", "stage", "message")}
+    if jobs:
+        try:
+            _replace_json(cache_path, cache)
+        except OSError:
+            pass
+    return [results[p] for p in paths]
+
+
+def format_verify_report(results: list, limit=50) -> str:
+    count = {}
+    for r in results:
+        count[r["status"]] = count.get(r["status"], 0) + 1
+    cached = sum(1 for r in results if r.get("cached"))
+    lines  = [f"Đạt: {count.get('pass', 0)}   Lỗi: {count.get('fail', 0)}   "
+              f"Bỏ qua: {count.get('skipped', 0)}   Sự cố: {count.get('error', 0)}"
+              f"   (từ cache: {cached})"]
+    bad = [r for r in results if r["status"] in ("fail", "error")]
+    for r in bad[:limit]:
+        first = r["message"].strip().splitlines()[:3]
+        lines.append(f"  ✖ {r['path']} [{r['stage']}]")
+        lines += [f"      {line}" for line in first]
+    if len(bad) > limit:
+        lines.append(f"  … và {len(bad) - limit} file khác")
+    return "\n".join(lines)
+
+
+# ═══════════════════════════════════════════════════════
+#  CLI
+# ═══════════════════════════════════════════════════════
+
+def _read_arg_text(path, stdin):
+    """'-' → đọc stdin (một lần), None → chuỗi rỗng."""
+    if path is None:
+        return ""
+    if path == "-":
+        return stdin.read().strip()
+    return _read_text(path)
+
+
+def serve_request(store: TemplateStore, req: dict) -> dict:
+    """
+    Một request --serve: {lang, name, problem, solution, out?, policy?}
+    (policy mặc định 'skip'; 'overwrite': true vẫn được hiểu là policy 'overwrite').
+    Có 'out' → ghi file, trả {ok, status, path}; không có → trả {ok, content}.
+    """
+    for key in ("lang", "name", "problem", "solution", "out", "policy"):
+        if req.get(key) is not None and not isinstance(req[key], str):
+            return {"ok": False, "error": f"'{key}' phải là chuỗi"}
+    tmpl = store.templates().get(req.get("lang", ""))
+    if tmpl is None:
+        return {"ok": False, "error": f"ngôn ngữ không hợp lệ: {req.get('lang')!r}"}
+    name = req.get("name", "")
+    if not name:
+        return {"ok": False, "error": "thiếu tên file"}
+    problem, solution = req.get("problem") or "", req.get("solution") or ""
+    if req.get("out") is None:
+        return {"ok": True, "content": render_content(tmpl, name, problem, solution)}
+    policy = req.get("policy") or ("overwrite" if req.get("overwrite") else "skip")
+    status, path = write_exercise(tmpl, name, problem, solution, req["out"],
+                                  policy=policy, lang=req["lang"])
+    return {"ok": True, "status": status, "path": path}
+
+
+def serve(store: TemplateStore, stdin=sys.stdin, stdout=sys.stdout):
+    """Vòng lặp JSON-lines: mỗi dòng vào một request, mỗi dòng ra một kết quả."""
+    for line in stdin:
+        if not line.strip():
+            continue
+        try:
+            req = json.loads(line)
+            res = serve_request(store, req) if isinstance(req, dict) else \
+                {"ok": False, "error": "request phải là object JSON"}
+        except (ValueError, OSError) as exc:     # JSON hỏng, TemplateError, lỗi ghi
+            res = {"ok": False, "error": str(exc)}
+        except (TypeError, KeyError) as exc:     # request lạ mà kiểm tra ở trên bỏ sót
+            res = {"ok": False, "error": f"request không hợp lệ: {exc!r}"}
+        stdout.write(json.dumps(res, ensure_ascii=False) + "\n")
+        stdout.flush()
+
+
+def _policy_args(p):
+    p.add_argument("--policy", choices=list(WRITE_POLICIES), default="skip",
+                   help="khi file đã tồn tại (mặc định: skip)")
+    p.add_argument("--overwrite", dest="policy", action="store_const", const="overwrite",
+                   help="viết tắt của --policy overwrite")
+
+
+def main(argv=None) -> int:
+    import argparse
+    import csv
+
+    parser = argparse.ArgumentParser(
+        prog="template_core.py", description="Sinh file bài tập theo template (không cần giao diện).")
+    parser.add_argument("--config", metavar="DIR", help="thư mục cấu hình (mặc định %(default)s)",
+                        default=config_dir())
+    parser.add_argument("--serve", action="store_true",
+                        help="đọc request JSON từng dòng trên stdin, trả kết quả trên stdout")
+    sub = parser.add_subparsers(dest="cmd")
+
+    p = sub.add_parser("render", help="sinh một file")
+    p.add_argument("--lang", required=True)
+    p.add_argument("--name", required=True, help="tên file, không kèm extension")
+    p.add_argument("--problem-file", metavar="PATH", help="'-' để đọc stdin")
+    p.add_argument("--solution-file", metavar="PATH", help="'-' để đọc stdin")
+    p.add_argument("--out", metavar="DIR", help="thư mục lưu; bỏ trống → in ra stdout")
+    _policy_args(p)
+
+    p = sub.add_parser("batch", help="sinh hàng loạt từ manifest (.json/.csv/.yaml) hoặc thư mục")
+    p.add_argument("source")
+    p.add_argument("--out", metavar="DIR", required=True)
+    _policy_args(p)
+
+    p = sub.add_parser("rebuild", help="sinh lại file có template / đầu vào đã đổi")
+    p.add_argument("dir", help="thư mục đã sinh file (có .template_manifest.json)")
+    p.add_argument("--force", action="store_true",
+                   help="sinh lại tất cả, ghi đè cả file đã sửa tay")
+
+    p = sub.add_parser("import", help="đọc ngược cây thư mục bài tập đã sinh thành catalog")
+    p.add_argument("root")
+    p.add_argument("--catalog", metavar="FILE",
+                   help="ghi catalog (.json, dùng được làm manifest cho lệnh batch)")
+    p.add_argument("--find", metavar="TEXT", help="chỉ in các bài chứa mọi từ trong TEXT")
+    p.add_argument("--workers", type=int, help="số process (mặc định: số CPU)")
+
+    p = sub.add_parser("search", help="tìm trong catalog (chỉ mục toàn văn, quét lại theo mtime)")
+    p.add_argument("query", nargs="?", default="")
+    p.add_argument("--add", metavar="DIR", action="append", default=[],
+                   help="theo dõi thêm thư mục này")
+    p.add_argument("--limit", type=int, default=50)
+
+    p = sub.add_parser("verify", help="biên dịch (và chạy test .in/.out) các lời giải")
+    p.add_argument("paths", nargs="+", metavar="PATH", help="file hoặc thư mục")
+    p.add_argument("--no-tests", action="store_true", help="chỉ biên dịch")
+    p.add_argument("--workers", type=int)
+    p.add_argument("--timeout", type=float, default=RUN_TIMEOUT, help="giây cho mỗi test")
+
+    p = sub.add_parser("fanout", help="một đề, nhiều ngôn ngữ trong một lần")
+    p.add_argument("--name", required=True)
+    p.add_argument("--problem-file", metavar="PATH", help="'-' để đọc stdin")
+    p.add_argument("--solution", action="append", default=[], metavar="LANG=FILE",
+                   required=True, help="lặp lại cho từng ngôn ngữ")
+    p.add_argument("--out", metavar="DIR", required=True)
+    _policy_args(p)
+    p.add_argument("--atomic", action="store_true",
+                   help="hoặc ghi đủ mọi ngôn ngữ, hoặc không ghi gì")
+
+    args  = parser.parse_args(argv)
+    store = TemplateStore(args.config)
+    if args.serve:
+        serve(store)
+        return 0
+    if args.cmd is None:
+        parser.error("cần chọn lệnh (render | batch | rebuild | import | search | verify | "
+                     "fanout) hoặc --serve")
+    templates = store.templates()
+
+    try:
+        if args.cmd == "render":
+            if args.problem_file == "-" and args.solution_file == "-":
+                parser.error("chỉ một trong --problem-file / --solution-file được là '-'")
+            tmpl = templates.get(args.lang)
+            if tmpl is None:
+                parser.error(f"ngôn ngữ không hợp lệ: {args.lang} (có: {', '.join(templates)})")
+            problem  = _read_arg_text(args.problem_file, sys.stdin)
+            solution = _read_arg_text(args.solution_file, sys.stdin)
+            if args.out is None:
+                sys.stdout.write(render_content(tmpl, args.name, problem, solution))
+                return 0
+            status, path = write_exercise(tmpl, args.name, problem, solution, args.out,
+                                          policy=args.policy, lang=args.lang)
+            print(f"{status}: {path}")
+            return 1 if status == "skipped" else 0
+
+        if args.cmd == "rebuild":
+            report = rebuild(args.dir, templates, force=args.force)
+            print(format_rebuild_report(report))
+            return 1 if report["errors"] else 0
+
+        if args.cmd == "import":
+            catalog = import_tree(args.root, templates, workers=args.workers)
+            if args.catalog:
+                _replace_json(os.path.abspath(args.catalog), {"items": catalog["items"]})
+            shown = search_items(catalog["items"], args.find) if args.find else []
+            for e in shown:
+                print(f"{e['lang']:<8} {e['path']}")
+            print(f"{len(catalog['items'])} bài đọc được, {len(catalog['unmatched'])} file không khớp"
+                  + (f", {len(shown)} khớp '{args.find}'" if args.find else ""))
+            for path, why in catalog["unmatched"][:20]:
+                print(f"  ✖ {path}: {why}")
+            return 0
+
+        if args.cmd == "search":
+            index = ExerciseIndex(os.path.join(args.config, "catalog.db"))
+            for root in args.add:
+                index.add_root(root)
+            index.rescan(templates)
+            for e in index.search(args.query, limit=args.limit):
+                print(f"{e['lang']:<8} {e['path']}\n         {e['snippet'][:100]}")
+            return 0
+
+        if args.cmd == "fanout":
+            solutions = {}
+            for spec in args.solution:
+                lang, sep, path = spec.partition("=")
+                if not sep:
+                    parser.error(f"--solution cần dạng LANG=FILE: {spec}")
+                solutions[lang] = _read_text(path)
+            problem = _read_arg_text(args.problem_file, sys.stdin)
+            report  = fan_out(templates, args.name, problem, solutions, args.out,
+                              policy=args.policy, atomic=args.atomic)
+            print(format_report(report))
+            return 1 if report["errors"] else 0
+
+        if args.cmd == "verify":
+            files = []
+            for path in args.paths:
+                files += walk_exercises(path, TOOLCHAINS) if os.path.isdir(path) else [path]
+            results = verify(files, run_tests=not args.no_tests, workers=args.workers,
+                             cache_path=os.path.join(args.config, "verify_cache.json"),
+                             run_timeout=args.timeout)
+            print(format_verify_report(results))
+            return 1 if any(r["status"] in ("fail", "error") for r in results) else 0
+
+        entries = read_manifest(args.source, templates)
+        report  = render_batch(entries, templates, args.out, policy=args.policy)
+        print(format_report(report))
+        return 1 if report["errors"] else 0
+    except (OSError, ValueError, csv.Error) as exc:
+        print(f"Lỗi: {exc}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())